@@ -0,0 +1,101 @@
+import os
+import math
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+
+# ── Window / budget settings ──────────────────────────────────────
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "6"))      # kept verbatim
+CONTEXT_FOLD_BATCH = int(os.getenv("CONTEXT_FOLD_BATCH", "4"))          # turns folded per summary update
+ROUTER_CONTEXT_TOKENS = int(os.getenv("ROUTER_CONTEXT_TOKENS", "600"))
+RESPONSE_CONTEXT_TOKENS = int(os.getenv("RESPONSE_CONTEXT_TOKENS", "4000"))
+# Longest unsummarized tail ever handed to the graph (also the tail storage reads)
+CONTEXT_MAX_MESSAGES = (CONTEXT_RECENT_TURNS + CONTEXT_FOLD_BATCH) * 2 + 1
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+GROQ_MODEL_NAME = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
+llm = ChatGroq(model=GROQ_MODEL_NAME, temperature=0)
+
+summary_prompt = ChatPromptTemplate.from_template("""
+You maintain a running summary of a conversation between a user and OdiaLingua, an Odia-language assistant.
+Update the existing summary with the new messages below. Write the summary in Odia, at most 8 sentences.
+Keep names, places, dates, numbers and any facts the user was told exactly as written. Drop greetings and small talk.
+
+EXISTING SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:
+""")
+summary_chain = summary_prompt | llm
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 UTF-8 bytes per token (an Odia character is 3 bytes)."""
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+def build_context(messages_history: list, summary: str = "", summarized_count: int = 0, base_seq: int = 0) -> list:
+    """
+    Convert stored history into graph messages: the running summary (if any)
+    followed by the not-yet-summarized tail, capped so a stalled summary
+    can never let the window grow without bound. `base_seq` is the sequence
+    number of messages_history[0] when only a tail was loaded.
+    """
+    start = max(summarized_count - base_seq, len(messages_history) - CONTEXT_MAX_MESSAGES, 0)
+    recent = messages_history[start:]
+    messages = [
+        HumanMessage(content=msg['content']) if msg['role'] == 'user'
+        else AIMessage(content=msg['content'])
+        for msg in recent
+    ]
+    if summary:
+        messages.insert(0, SystemMessage(content=SUMMARY_PREFIX + summary))
+    return messages
+
+def trim_to_budget(messages: list, max_tokens: int) -> list:
+    """
+    Newest-first selection of messages that fit in `max_tokens`. The most
+    recent message is always kept; a leading summary is kept if it still fits.
+    """
+    if not messages:
+        return []
+    summary = messages[0] if isinstance(messages[0], SystemMessage) else None
+    body = messages[1:] if summary else messages
+
+    kept, used = [], 0
+    for msg in reversed(body):
+        cost = estimate_tokens(msg.content)
+        if kept and used + cost > max_tokens:
+            break
+        kept.append(msg)
+        used += cost
+    kept.reverse()
+
+    if summary and used + estimate_tokens(summary.content) <= max_tokens:
+        kept.insert(0, summary)
+    return kept
+
+def format_for_prompt(messages: list, max_tokens: int) -> str:
+    """Render a node's slice of the conversation as `type: content` lines."""
+    return "\n".join(f"{m.type}: {m.content}" for m in trim_to_budget(messages, max_tokens))
+
+def pending_fold(messages_history: list, summarized_count: int, base_seq: int = 0):
+    """
+    Return (messages to fold into the summary, new summarizedCount), or None
+    while the unsummarized tail is still short enough. Messages older than
+    the loaded tail (base_seq) are skipped rather than re-read.
+    """
+    keep_from = base_seq + len(messages_history) - CONTEXT_RECENT_TURNS * 2
+    start = max(summarized_count, base_seq)
+    if keep_from - start < CONTEXT_FOLD_BATCH * 2:
+        return None
+    return messages_history[start - base_seq:keep_from - base_seq], keep_from
+
+async def update_summary(summary: str, new_messages: list) -> str:
+    """Fold `new_messages` into the running Odia summary."""
+    print("--- UPDATING CONVERSATION SUMMARY ---")
+    rendered = "\n".join(f"{m['role']}: {m['content']}" for m in new_messages)
+    result = await summary_chain.ainvoke({"summary": summary or "(none)", "messages": rendered})
+    return result.content.strip()
@@ -0,0 +1,138 @@
+"""
+First-tier intent classifier for the router.
+
+Combines compiled keyword/regex rules with a character-trigram similarity
+model over a small seed set in Odia script, romanized Odia, Hinglish and
+English. Runs in microseconds; the router only falls back to the LLM when
+the confidence here is below its threshold.
+"""
+import math
+import re
+from collections import Counter
+
+INTENTS = ("research", "weather", "response")
+
+# ── Rules ─────────────────────────────────────────────────────────
+# Latin-script patterns use word boundaries. Odia/Devanagari stems are matched
+# as substrings since case suffixes attach directly (ଭୁବନେଶ୍ୱରରେ, ପାଗର).
+# Strong cues name the intent on their own; weak cues are common in it but
+# also in other questions ("rate of photosynthesis", "mp in physics", "kie"
+# meaning "who" in general), so they only tip the balance.
+_RULES = {
+    "weather": [
+        r"\b(weather|forecast|temperature|humidity|humid|rain(s|ing|y|fall)?|storm|cyclone|monsoon|umbrella|snow(ing)?|sunny)\b",
+        r"\b(paag|paaga|paga|mausam|mosam|barsha|barasa|barish|garmi|thanda|thand|baadal|badal|toofan|tapamatra|chhata)\b",
+        "ପାଗ", "ବର୍ଷା", "ତାପମାତ୍ରା", "ବାତ୍ୟା", "ଗରମ", "ଥଣ୍ଡା", "ମୌସୁମୀ", "ଆର୍ଦ୍ରତା", "ଛତା", "ମେଘ",
+        "मौसम", "बारिश", "तापमान",
+    ],
+    "research": [
+        r"\b(latest|recent|news|election|elected|appointed|sensex|stock|taza)\b",
+        r"\b(chief minister|prime minister|president|governor|minister|mla|mayor|chief justice|chief secretary)\b",
+        r"\b(bartaman|khabar|samachar|mukhyamantri|pradhanmantri)\b",
+        r"\b20[2-9]\d\b",
+        "ମୁଖ୍ୟମନ୍ତ୍ରୀ", "ପ୍ରଧାନମନ୍ତ୍ରୀ", "ରାଷ୍ଟ୍ରପତି", "ରାଜ୍ୟପାଳ", "ମନ୍ତ୍ରୀ", "ବର୍ତ୍ତମାନ", "ଖବର", "ନିର୍ବାଚନ", "ଫଳାଫଳ",
+        "मुख्यमंत्री", "प्रधानमंत्री", "खबर", "चुनाव",
+    ],
+    "response": [
+        r"^\W*(namaskar|namaskara|namaste|hello|hi|hey|good (morning|evening|night))\b",
+        r"\b(kemiti achh?a|kemiti achh?anti|kaise ho|how are you|thank you|thanks|dhanyabad|dhanyavad|shukriya)\b",
+        r"\b(galpa|kabita|kavita|kahani|story|poem|joke|write|lekha|lekhi|translate|meaning|explain|define|history|itihasa)\b",
+        r"\b(formula|equation|law|theory|physics|chemistry|biology|science|recipe|samjhao|bujhaa?|niyam|what does|how does)\b",
+        "ନମସ୍କାର", "ଧନ୍ୟବାଦ", "କେମିତି ଅଛ", "କବିତା", "ଗଳ୍ପ", "ଇତିହାସ", "ଅର୍ଥ", "ବୁଝାଅ", "ନିୟମ", "ସୂତ୍ର",
+        "नमस्ते", "धन्यवाद", "कविता", "कहानी",
+    ],
+}
+_WEAK_RULES = {
+    "weather": [
+        r"\b(hot|cold|windy|wind|degree|degrees|garam)\b",
+        "ପବନ",
+    ],
+    "research": [
+        r"\b(who is|who's|who won|current|currently|now|today|result|results|score|price|rate|match)\b",
+        r"\b(mp|cm|pm|ekhani|kie|kiye|kaun|kon|abhi|daam|dar|jitila)\b",
+        "କିଏ", "ଏବେ", "ଦାମ", "ଦର", "कौन",
+    ],
+    "response": [
+        r"\b(what is|kya hai|kana)\b",
+    ],
+}
+
+def _compile(pattern: str):
+    return re.compile(pattern if pattern.startswith(("\\b", "^")) else re.escape(pattern), re.IGNORECASE)
+
+_COMPILED_RULES = {intent: [_compile(p) for p in patterns] for intent, patterns in _RULES.items()}
+_COMPILED_WEAK_RULES = {intent: [_compile(p) for p in patterns] for intent, patterns in _WEAK_RULES.items()}
+
+# ── Seed examples for the trigram model ───────────────────────────
+SEED_EXAMPLES = {
+    "weather": [
+        "ଭୁବନେଶ୍ୱରରେ ପାଗ କେମିତି ଅଛି?", "ଆଜି କଟକରେ ବର୍ଷା ହେବ କି?", "ପୁରୀର ତାପମାତ୍ରା କେତେ?",
+        "Bhubaneswar re paag kemiti achhi?", "aaji barsha heba ki", "Cuttack re kete garmi",
+        "Bhubaneswar mein mausam kaisa hai?", "aaj barish hogi kya",
+        "What is the weather like in Bhubaneswar?", "temperature in Puri today", "will it rain tomorrow in Cuttack",
+    ],
+    "research": [
+        "ଓଡ଼ିଶାର ବର୍ତ୍ତମାନର ମୁଖ୍ୟମନ୍ତ୍ରୀ କିଏ?", "ଭାରତର ପ୍ରଧାନମନ୍ତ୍ରୀ କିଏ?", "ଆଜିର ଖବର କଣ?",
+        "Odisha ra CM kie?", "Odisha ra bartaman mukhyamantri kie", "Bharat ra pradhanmantri kie",
+        "Odisha ka CM kaun hai?", "abhi India ka president kon he",
+        "Who is the current CM of Odisha?", "latest news about Odisha", "who won the 2024 election in Odisha",
+    ],
+    "response": [
+        "ନମସ୍କାର", "ମୋତେ ଏକ କବିତା ଲେଖି ଦିଅ", "ଓଡ଼ିଶାର ରାଜଧାନୀ କଣ?", "ଜଗନ୍ନାଥ ମନ୍ଦିରର ଇତିହାସ କୁହ",
+        "namaskar", "kemiti achha?", "mote gote galpa kuha", "dhanyabad",
+        "namaste kaise ho", "ek kavita sunao",
+        "hello", "how are you?", "write a poem about Odisha", "explain photosynthesis", "thank you",
+    ],
+}
+
+def _trigrams(text: str) -> Counter:
+    text = f"  {' '.join(text.lower().split())}  "
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+def _normalize(vec: Counter) -> dict:
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {k: v / norm for k, v in vec.items()}
+
+_CENTROIDS = {
+    intent: _normalize(sum((_trigrams(e) for e in examples), Counter()))
+    for intent, examples in SEED_EXAMPLES.items()
+}
+
+def _similarity(query: dict, centroid: dict) -> float:
+    return sum(w * centroid.get(g, 0.0) for g, w in query.items())
+
+# ── Classifier ────────────────────────────────────────────────────
+# Tuned on benchmarks/routing_set.jsonl (python benchmarks/routing.py --tune):
+# TEMPERATURE is the one that minimizes the log-loss there, so a confidence
+# of 0.8 means roughly 80% of such decisions were right. routing_holdout.jsonl
+# is kept out of tuning to check that this carries over.
+RULE_WEIGHT = 2.0
+WEAK_RULE_WEIGHT = 0.75
+NGRAM_WEIGHT = 2.0
+TEMPERATURE = 0.25
+
+def _hits(rules, text: str) -> int:
+    return min(sum(1 for rx in rules if rx.search(text)), 3)
+
+def classify(message: str):
+    """Return (intent, confidence, scores) for a single user message."""
+    text = message.strip()
+    query = _normalize(_trigrams(text))
+
+    scores = {}
+    strong = {}
+    for intent in INTENTS:
+        strong[intent] = _hits(_COMPILED_RULES[intent], text)
+        scores[intent] = (RULE_WEIGHT * strong[intent]
+                          + WEAK_RULE_WEIGHT * _hits(_COMPILED_WEAK_RULES[intent], text)
+                          + NGRAM_WEIGHT * _similarity(query, _CENTROIDS[intent]))
+
+    # Weather wording wins over generic "today/now" research cues (mirrors the router override)
+    if strong["weather"] and not strong["research"] and scores["research"] > scores["weather"]:
+        scores["research"] = scores["weather"] - WEAK_RULE_WEIGHT
+
+    top = max(scores.values())
+    exp = {k: math.exp((v - top) / TEMPERATURE) for k, v in scores.items()}
+    total = sum(exp.values())
+    intent = max(exp, key=exp.get)
+    return intent, exp[intent] / total, scores
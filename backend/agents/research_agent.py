@@ -1,4 +1,4 @@
-import os, textwrap, datetime
+import os, textwrap, datetime, asyncio, time
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
@@ -8,13 +8,61 @@ from tools.search_tools import (
     google_search_snippets,
     tavily_search_snippets,
 )
+from services.translation_service import to_english
 
 GROQ_MODEL_NAME = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
 llm = ChatGroq(model=GROQ_MODEL_NAME, temperature=0)  # Zero temperature for maximum accuracy
 
+# ── Evidence-gathering latency limits (seconds) ───────────────────
+RESEARCH_SOURCE_TIMEOUT = float(os.getenv("RESEARCH_SOURCE_TIMEOUT", "8"))
+RESEARCH_TOTAL_BUDGET   = float(os.getenv("RESEARCH_TOTAL_BUDGET", "10"))
+
+# (state key, log label, tool) – fanned out in parallel for every research turn
+RESEARCH_SOURCES = (
+    ("aio",  "Google AIO",     google_ai_overview_snippets),
+    ("g_sn", "Google Organic", google_search_snippets),
+    ("tv",   "Tavily",         tavily_search_snippets),
+)
+
 def _log(title, body):
     print(f"\n🟢 {title}:\n{textwrap.shorten(body, 1100)}\n{'─'*60}")
 
+async def _fetch_source(label, source, query, timeout):
+    """Run one search source under its own deadline; never raises."""
+    try:
+        return await asyncio.wait_for(source.ainvoke(query), timeout=timeout)
+    except asyncio.TimeoutError:
+        return f"{label}: timed out after {timeout:g}s"
+    except Exception as e:
+        return f"{label} error: {e}"
+
+async def gather_evidence(query, sources=RESEARCH_SOURCES,
+                          source_timeout=None, total_budget=None) -> dict:
+    """
+    Query every source concurrently. Each source gets its own deadline and the
+    whole stage is capped by a total latency budget: whatever has arrived when
+    the budget runs out is returned, the rest is cancelled and marked missing.
+    """
+    source_timeout = RESEARCH_SOURCE_TIMEOUT if source_timeout is None else source_timeout
+    total_budget = RESEARCH_TOTAL_BUDGET if total_budget is None else total_budget
+
+    started = time.perf_counter()
+    tasks = {
+        key: asyncio.create_task(_fetch_source(label, src, query, source_timeout))
+        for key, label, src in sources
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=total_budget)
+    for task in pending:
+        task.cancel()
+
+    evidence = {}
+    for key, label, _ in sources:
+        task = tasks[key]
+        evidence[key] = task.result() if task in done else f"{label}: no result within latency budget"
+    print(f"⏱️ Evidence gathered in {time.perf_counter() - started:.2f}s "
+          f"({len(done)}/{len(tasks)} sources arrived)")
+    return evidence
+
 # Enhanced anti-hallucination synthesis prompt
 synth_prompt = ChatPromptTemplate.from_messages([
     ("system", f"""You are a precise fact-extraction and verification agent. Your ONLY job is to extract and present factual information from the provided sources.
@@ -80,10 +128,12 @@ async def research_agent_node(state):
     print(f"\n🔵 RESEARCH-AGENT processing: {q}")
     print("🔍 Activating enhanced fact-verification protocol...")
 
-    # Gather evidence from multiple sources
-    aio = await google_ai_overview_snippets.ainvoke(q)
-    g_sn = await google_search_snippets.ainvoke(q)
-    tv = await tavily_search_snippets.ainvoke(q)
+    # Translate once per turn; the tools then see Latin text and skip translation
+    q_en = await to_english(q)
+
+    # Gather evidence from multiple sources concurrently
+    evidence = await gather_evidence(q_en)
+    aio, g_sn, tv = evidence["aio"], evidence["g_sn"], evidence["tv"]
 
     _log("Google AIO", aio)
     _log("Google Organic", g_sn) 
@@ -103,7 +153,7 @@ async def research_agent_node(state):
     print(f"📊 FACT VERIFICATION: {fact_checks}")
 
     # Evidence-grounded synthesis with enhanced verification
-    synthesis = (synth_prompt | llm).invoke({
+    synthesis = await (synth_prompt | llm).ainvoke({
         "question": q, 
         "aio": aio, 
         "g_snips": g_sn, 
@@ -3,6 +3,8 @@ from datetime import datetime
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
+from agents.context_manager import format_for_prompt, RESPONSE_CONTEXT_TOKENS
+
 # Model with low temperature for accuracy
 GROQ_MODEL_NAME = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
 llm = ChatGroq(model=GROQ_MODEL_NAME, temperature=0.1)
@@ -101,12 +103,12 @@ def extract_key_facts(history):
     
     return facts
 
-def response_agent_node(state):
+async def response_agent_node(state):
     """Enhanced response agent with strict fact checking."""
     print("--- GENERATING FINAL RESPONSE ---")
 
-    # Build conversation history
-    history = "\n".join(f"{msg.type}: {msg.content}" for msg in state["messages"])
+    # Build conversation history (summary + recent turns, within the responder's budget)
+    history = format_for_prompt(state["messages"], RESPONSE_CONTEXT_TOKENS)
     
     # Check if this involved search data
     has_search_data = detect_search_context(history)
@@ -126,7 +128,7 @@ def response_agent_node(state):
         print("💬 GENERAL QUESTION - using knowledge carefully")
 
     # Generate response with enhanced fact-checking
-    final_msg = (response_prompt | llm).invoke({"history": history})
+    final_msg = await (response_prompt | llm).ainvoke({"history": history})
 
     # Additional safety check for common political errors
     content = final_msg.content
@@ -1,4 +1,6 @@
 import os
+import re
+import json
 from datetime import datetime
 from typing import Literal
 
@@ -6,10 +8,67 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from agents.intent_classifier import classify
+from agents.context_manager import format_for_prompt, ROUTER_CONTEXT_TOKENS
+
 # ── Model setup ───────────────────────────────────────────────────
 GROQ_MODEL_NAME = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
 llm = ChatGroq(model=GROQ_MODEL_NAME, temperature=0)
 
+# Local pre-classifier decisions at or above this confidence skip the LLM call
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.8"))
+route_stats = {"fast_path": 0, "llm": 0}
+
+# ── Safety-override rules (tunable without code changes) ──────────
+ROUTER_RULES_PATH = os.getenv(
+    "ROUTER_RULES_PATH", os.path.join(os.path.dirname(__file__), "router_rules.json")
+)
+
+def _trie_pattern(keywords) -> str:
+    """Prefix-factored alternation, so the regex engine rejects most positions on the first character."""
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = kw.isascii()
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            # Latin-script keywords must end on a word boundary; Odia/Devanagari take suffixes
+            branches.append(r"(?!\w)" if node[""] else "")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie) if trie else r"(?!)"
+
+class KeywordMatcher:
+    """
+    All keywords compiled into one regex at import. Latin-script keywords only
+    match as whole words ("kie" never fires inside "cookie"); others match
+    anywhere since Odia/Devanagari suffixes attach directly.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted({kw.strip().lower() for kw in keywords if kw.strip()})
+        self._regex = re.compile(_trie_pattern(self.keywords))
+
+    def search(self, text: str):
+        text = text.lower()
+        for match in self._regex.finditer(text):
+            start = match.start()
+            if match.group().isascii() and start and (text[start - 1].isalnum() or text[start - 1] == "_"):
+                continue
+            return match
+        return None
+
+def load_rules(path=ROUTER_RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    return KeywordMatcher(rules["factual_keywords"]), KeywordMatcher(rules["weather_terms"])
+
+FACTUAL_MATCHER, WEATHER_MATCHER = load_rules()
+
 # ── Structured output schema ──────────────────────────────────────
 class RouteQuery(BaseModel):
     """Choose the next agent for the user query."""
@@ -109,36 +168,32 @@ Return JSON with next_agent field containing your choice.
 )
 
 # ── Router node function ──────────────────────────────────────────
-def get_route(state):
+async def get_route(state):
     """Return {'next_agent': <str>} based on the latest user message."""
     messages = state["messages"]
     user_message = messages[-1].content.strip()
-    history = "\n".join(f"{m.type}: {m.content}" for m in messages[:-1])
 
-    decision = (router_prompt | structured_router).invoke(
-        {"user_message": user_message, "history": history}
-    )
+    # Tier 1: local keyword + n-gram classifier for obvious intents
+    intent, confidence, _ = classify(user_message)
+    if confidence >= ROUTER_CONFIDENCE_THRESHOLD:
+        decision = RouteQuery(next_agent=intent)
+        route_stats["fast_path"] += 1
+        print(f"--- ROUTER FAST PATH: {intent} (confidence {confidence:.2f}) ---")
+    else:
+        # Tier 2: full LLM routing with conversation context
+        route_stats["llm"] += 1
+        history = format_for_prompt(messages[:-1], ROUTER_CONTEXT_TOKENS)
+        decision = await (router_prompt | structured_router).ainvoke(
+            {"user_message": user_message, "history": history}
+        )
 
     print(f"--- ROUTER DECISION: {decision.next_agent} ---")
     print(f"📝 Query: {user_message[:50]}...")
     
     # Enhanced multi-language safety check for factual questions
-    factual_keywords_multilang = [
-        # English
-        "current", "latest", "now", "today", "who is", "chief minister", 
-        "prime minister", "president", "2024", "2025", "elected", "appointed",
-        # Odia romanized
-        "bartaman", "kie", "mukhyamantri", "aaji", "ekhani",
-        # Hinglish/Hindi
-        "kaun", "kon", "abhi", "aaj", "chief minister", "CM",
-        # Mixed terms
-        "odisha ra", "odisha ka", "odisha re"
-    ]
-    
-    if any(keyword.lower() in user_message.lower() for keyword in factual_keywords_multilang):
+    if FACTUAL_MATCHER.search(user_message):
         # Additional check for weather terms to avoid false positives
-        weather_terms = ["paag", "mausam", "weather", "barsha", "rain", "garmi", "hot", "thanda", "cold"]
-        is_weather = any(weather_term.lower() in user_message.lower() for weather_term in weather_terms)
+        is_weather = WEATHER_MATCHER.search(user_message) is not None
         
         if decision.next_agent != "research" and not is_weather:
             print("🚨 MULTILANG SAFETY OVERRIDE: Factual keywords detected, forcing research")
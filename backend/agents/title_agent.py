@@ -1,4 +1,5 @@
 import os
+import re
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
@@ -27,15 +28,25 @@ Title:
 title_prompt = ChatPromptTemplate.from_template(title_prompt_template)
 title_generation_chain = title_prompt | llm
 
-def generate_chat_title(first_user_message: str) -> str:
+DEFAULT_TITLE = "New Chat"
+
+def heuristic_title(first_user_message: str, max_words: int = 5, max_chars: int = 40) -> str:
+    """Instant placeholder title: the first few words of the message, punctuation stripped."""
+    words = re.findall(r"[\w\u0B00-\u0B7F\u0900-\u097F']+", first_user_message)
+    title = " ".join(words[:max_words])
+    if len(title) > max_chars:
+        title = title[:max_chars].rsplit(" ", 1)[0] or title[:max_chars]
+    return title or DEFAULT_TITLE
+
+async def generate_chat_title(first_user_message: str) -> str:
     """Generates a descriptive title for a new chat in Odia."""
     print("--- CALLING TITLE AGENT ---")
     try:
-        title = title_generation_chain.invoke({"user_message": first_user_message})
+        title = await title_generation_chain.ainvoke({"user_message": first_user_message})
         # The response from the LLM might include extra text or quotes, so we clean it.
         cleaned_title = title.content.strip().replace('"', '')
         print(f"--- GENERATED TITLE: {cleaned_title} ---")
         return cleaned_title
     except Exception as e:
         print(f"Error generating title: {e}")
-        return "New Chat"
\ No newline at end of file
+        return DEFAULT_TITLE
\ No newline at end of file
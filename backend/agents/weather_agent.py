@@ -1,6 +1,9 @@
 import os
+import uuid
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
+from tools.gazetteer import GAZETTEER
 from tools.weather_tool import get_current_weather
 
 # Use the model from the environment variable
@@ -8,6 +11,7 @@ GROQ_MODEL_NAME = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
 llm = ChatGroq(model=GROQ_MODEL_NAME, temperature=0)
 tools = [get_current_weather]
 llm_with_tools = llm.bind_tools(tools)
+weather_stats = {"fast_path": 0, "llm": 0}
 
 weather_agent_prompt = ChatPromptTemplate.from_messages(
     [
@@ -16,13 +20,29 @@ weather_agent_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-def weather_agent_node(state):
-    """The node for the weather agent. It invokes the LLM with the weather tool."""
+async def weather_agent_node(state):
+    """
+    The node for the weather agent. When the gazetteer finds the location in
+    the message the tool runs right here and its result goes straight to the
+    response agent; otherwise the LLM picks the location and emits a tool
+    call for tool_node.
+    """
     print("--- CALLING WEATHER AGENT ---")
     user_message = state["messages"][-1].content
-    
+
+    place = GAZETTEER.find(user_message)
+    if place:
+        weather_stats["fast_path"] += 1
+        print(f"--- WEATHER FAST PATH: {place.name} ---")
+        # Same message pair tool_node would leave behind, so the response agent sees no difference
+        call = {"name": get_current_weather.name, "args": {"location": place.name},
+                "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+        report = await get_current_weather.ainvoke(call)
+        return {"messages": [AIMessage(content="", tool_calls=[call]), report]}
+
+    weather_stats["llm"] += 1
     chain = weather_agent_prompt | llm_with_tools
-    result = chain.invoke({"user_message": user_message})
+    result = await chain.ainvoke({"user_message": user_message})
 
     # Return proper state update format
     return {"messages": [result]}
@@ -1,22 +1,16 @@
 import os
 import uuid
 import json
-import tempfile
 import logging
-import io
 import time
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request, Depends, File, UploadFile
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Depends, File, UploadFile, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from fastapi.responses import StreamingResponse, JSONResponse
-from appwrite.client import Client
-from appwrite.services.databases import Databases
-from appwrite.id import ID
-from appwrite.permission import Permission
-from appwrite.role import Role
-from langchain_core.messages import HumanMessage, AIMessage
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 
 # Configure logger
 logger = logging.getLogger("OdiaLinguaBackend")
@@ -26,13 +20,37 @@ logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
 # Local imports
-from graph import graph
-from services.tts_service import generate_odia_speech
-from services.stt_service import transcribe_audio, is_supported_audio_format
-from agents.title_agent import generate_chat_title
+from graph import graph, node_stats
+from services.tts_service import cached_odia_speech, stream_odia_speech, speech_cache
+from services.stt_service import transcribe_upload, is_supported_audio_format
+from agents.title_agent import generate_chat_title, heuristic_title, DEFAULT_TITLE
+from agents.context_manager import build_context, pending_fold, update_summary, CONTEXT_MAX_MESSAGES
+from services.chat_store import ChatStore, ChatNotFoundError, make_chat_store, tombstone_horizon
+from services.cache import MemoryCache
+from services import http_client
+from services import translation_service
+from services import stt_service
+from tools.search_tools import search_cache
+from tools import weather_tool
+from agents.router import route_stats
+from agents.weather_agent import weather_stats
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One chat store (and Appwrite client) for the lifetime of the process
+    app.state.chat_store = make_chat_store()
+    await app.state.chat_store.start()
+    # Keeps the most-asked cities' weather warm in the cache
+    weather_tool.start_refresh()
+    yield
+    await weather_tool.stop_refresh()
+    # Drains the write-behind queue, if enabled, before the store goes away
+    await app.state.chat_store.close()
+    # Release pooled provider connections on shutdown
+    await http_client.aclose()
 
 # Initialize FastAPI App
-app = FastAPI(title="OdiaLingua Agentic Backend")
+app = FastAPI(title="OdiaLingua Agentic Backend", lifespan=lifespan)
 
 # CORS MIDDLEWARE
 origins_str = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5000")
@@ -46,16 +64,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Appwrite Client Initialization
-def get_appwrite_client():
-    client = Client()
-    client.set_endpoint(os.getenv("APPWRITE_ENDPOINT"))
-    client.set_project(os.getenv("APPWRITE_PROJECT_ID"))
-    client.set_key(os.getenv("APPWRITE_API_KEY"))
-    return client
+# Sidebar page size for /chats/{user_id}?limit=...; pages never exceed MAX_PAGE_SIZE
+CHATS_PAGE_SIZE = int(os.getenv("CHATS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 100
 
-def get_db(client: Client = Depends(get_appwrite_client)):
-    return Databases(client)
+# Chat store (CHAT_STORE=appwrite|sqlite), created once in the lifespan handler
+def get_store(request: Request) -> ChatStore:
+    return request.app.state.chat_store
 
 # Pydantic Models
 class ChatRequest(BaseModel):
@@ -74,14 +89,6 @@ class RenameRequest(BaseModel):
     session_id: str
     name: str
 
-# Helper to format message history for LangGraph
-def format_history(messages_list: list) -> list:
-    return [
-        HumanMessage(content=msg['content']) if msg['role'] == 'user'
-        else AIMessage(content=msg['content'])
-        for msg in messages_list
-    ]
-
 # --- API Endpoints ---
 
 @app.get("/")
@@ -89,152 +96,323 @@ async def root():
     """A simple health check endpoint."""
     return {"status": "ok", "message": "OdiaLingua Agentic Backend is running."}
 
+@app.get("/metrics")
+async def metrics(request: Request):
+    """Cache and provider counters for observing cost savings."""
+    return {
+        "search_cache": search_cache.stats(),
+        "translation": translation_service.stats(),
+        "router": route_stats,
+        "graph_nodes": node_stats,
+        "weather": weather_stats,
+        "weather_cache": weather_tool.stats(),
+        "providers": http_client.stats(),
+        "chat_listing": listing_stats,
+        "chat_store": request.app.state.chat_store.stats(),
+        "tts_cache": speech_cache.stats(),
+        "stt": stt_service.stats(),
+    }
+
+# ── Conditional GETs for chat listings ────────────────────────────
+# ETags are content hashes, so they stay valid across workers and restarts. The
+# last ETag per (user, query) is remembered together with the store's write
+# version for that user: while no write has happened in this process, a matching
+# If-None-Match is answered with 304 without reading the database. Writes made
+# by other workers are picked up once the entry expires (CHATS_ETAG_TTL).
+CHATS_ETAG_TTL = float(os.getenv("CHATS_ETAG_TTL", "30"))
+listing_etags = MemoryCache(maxsize=10000, default_ttl=CHATS_ETAG_TTL)
+listing_stats = {"served": 0, "not_modified": 0, "db_reads_skipped": 0}
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+async def _conditional_listing(request: Request, store: ChatStore, user_id: str, build) -> Response:
+    """Serve `await build()` as JSON with an ETag, or 304 if the client is up to date."""
+    key = f"{user_id}?{request.url.query}"
+    version = store.versions.get(user_id, 0)
+    if_none_match = request.headers.get("if-none-match")
+
+    cached = listing_etags.get_nowait(key)
+    if cached and cached[0] == version and _etag_matches(if_none_match, cached[1]):
+        listing_stats["not_modified"] += 1
+        listing_stats["db_reads_skipped"] += 1
+        return Response(status_code=304, headers={"ETag": cached[1]})
+
+    body = json.dumps(await build(), ensure_ascii=False).encode("utf-8")
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    listing_etags.set_nowait(key, (version, etag))
+    if _etag_matches(if_none_match, etag):
+        listing_stats["not_modified"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    listing_stats["served"] += 1
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 @app.get("/chats/{user_id}")
-async def get_user_chats(user_id: str, db: Databases = Depends(get_db)):
-    """Fetches all chat sessions for a given user, sorted by update time."""
-    try:
-        from appwrite.query import Query
-        
-        db_id = os.getenv("APPWRITE_DATABASE_ID")
-        collection_id = os.getenv("APPWRITE_COLLECTION_ID")
-        
-        # Use Appwrite's built-in ordering by $updatedAt
-        response = db.list_documents(
-            db_id,
-            collection_id,
-            queries=[
-                Query.equal("userId", user_id),
-                Query.order_desc("$updatedAt")  # Sort by Appwrite's built-in update time
-            ]
-        )
+async def get_user_chats(user_id: str, request: Request, limit: int = None, cursor: str = None,
+                         since: int = None, store: ChatStore = Depends(get_store)):
+    """
+    Fetches a user's chat sessions, sorted by update time.
 
-        chats = []
-        for doc in response['documents']:
-            messages = json.loads(doc.get('messages', '[]'))
-            
-            # Convert Appwrite's ISO timestamps to milliseconds for consistency
-            created_at = None
-            last_updated = None
-            
-            if doc.get('$createdAt'):
-                created_at = int(datetime.fromisoformat(doc['$createdAt'].replace('Z', '+00:00')).timestamp() * 1000)
-            
-            if doc.get('$updatedAt'):
-                last_updated = int(datetime.fromisoformat(doc['$updatedAt'].replace('Z', '+00:00')).timestamp() * 1000)
-            
-            chats.append({
-                "id": doc['$id'],
-                "name": doc['name'],
-                "messages": messages,
-                "createdAt": created_at,
-                "lastUpdated": last_updated
-            })
-        
-        return chats
+    - `limit`/`cursor`: one page of sidebar summaries (id, name, timestamps,
+      last-message preview) plus `nextCursor`
+    - `since`: only chats created or updated after that `lastUpdated`
+      watermark, ids of chats deleted after it, and the next `watermark`.
+      Apply `deleted` before `chats`. `reset` means the watermark is older
+      than the tombstone retention and the client should rebuild its list.
+    - neither: every chat with its full messages
+
+    Responses carry an ETag; If-None-Match answers 304 when nothing changed.
+    """
+    async def build():
+        if since is not None:
+            reset = since < tombstone_horizon()
+            changes = await store.list_changes(user_id, 0 if reset else since)
+            return {**changes, "reset": reset}
+
+        if limit is not None or cursor is not None:
+            page_size = max(1, min(limit or CHATS_PAGE_SIZE, MAX_PAGE_SIZE))
+            chats, next_cursor = await store.list_chat_summaries(user_id, page_size, cursor)
+            return {"chats": chats, "nextCursor": next_cursor}
+
+        chats = await store.list_chats(user_id)
+        return [
+            {
+                "id": chat["id"],
+                "name": chat["name"],
+                "messages": chat["messages"],
+                "createdAt": chat["createdAt"],
+                "lastUpdated": chat["lastUpdated"]
+            }
+            for chat in chats
+        ]
+
+    try:
+        return await _conditional_listing(request, store, user_id, build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/chat")
-async def chat(request: ChatRequest, db: Databases = Depends(get_db)):
-    """Main chat endpoint. Handles new chat creation, titling, and conversation."""
-    session_id = request.session_id
-    user_id = request.user_id
-    user_message = request.message
-    
-    db_id = os.getenv("APPWRITE_DATABASE_ID")
-    collection_id = os.getenv("APPWRITE_COLLECTION_ID")
-    
-    messages_history = []
-    new_title = None
-    current_timestamp = int(time.time() * 1000)
-    
+@app.get("/chats/{session_id}/messages")
+async def get_chat_messages(session_id: str, start: int = 0, end: int = None, tail: int = None,
+                            store: ChatStore = Depends(get_store)):
+    """
+    Loads one chat's messages lazily: the sequence range [start, end) or the
+    newest `tail` messages, at most MAX_PAGE_SIZE per call.
+    """
+    start = max(start, 0)
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be less than start")
+    try:
+        if tail is not None:
+            chat = await store.get_chat(session_id, tail=max(0, min(tail, MAX_PAGE_SIZE)))
+            return {"messages": chat["messages"], "start": chat["baseSeq"], "total": chat["messageCount"]}
+        return await store.get_messages(session_id, start, min(end, start + MAX_PAGE_SIZE) if end is not None else None)
+    except ChatNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Chat session not found: {session_id}")
+
+async def _start_turn(request: ChatRequest, store: ChatStore):
+    """
+    Create or load the chat. Returns the history tail with the new user
+    message appended, plus the chat itself (rolling summary, the sequence
+    number of the first loaded message and the stored message count). Only
+    the tail the context window can use is read.
+    """
     if request.is_new_chat:
-        # Create new document - let Appwrite handle timestamps automatically
-        doc_data = {
-            'userId': user_id, 
-            'sessionId': session_id, 
-            'name': 'New Chat', 
-            'messages': '[]'
-            # Don't add createdAt/lastUpdated - Appwrite handles this automatically
-        }
-        permissions = [Permission.read(Role.user(user_id)), Permission.update(Role.user(user_id)), Permission.delete(Role.user(user_id))]
-        db.create_document(db_id, collection_id, session_id, doc_data, permissions)
+        chat = await store.create_chat(request.session_id, request.user_id, heuristic_title(request.message))
     else:
-        # Fetch existing history
         try:
-            doc = db.get_document(db_id, collection_id, session_id)
-            messages_history = json.loads(doc.get('messages', '[]'))
-        except Exception as e:
-            raise HTTPException(status_code=404, detail=f"Chat session not found: {session_id}")
+            chat = await store.get_chat(request.session_id, tail=CONTEXT_MAX_MESSAGES - 1)
+        except ChatNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Chat session not found: {request.session_id}")
 
+    messages_history = chat["messages"]
     # Add user message with timestamp
     messages_history.append({
         "role": "user", 
-        "content": user_message,
-        "timestamp": current_timestamp
+        "content": request.message,
+        "timestamp": int(time.time() * 1000)
     })
+    return messages_history, chat
 
-    formatted_messages = format_history(messages_history)
-    initial_state = {"messages": formatted_messages}
-    final_state = await graph.ainvoke(initial_state)
-    assistant_response = final_state["messages"][-1].content
+async def _fold_summary(store: ChatStore, session_id: str, summary: str, folded: list, summarized_count: int):
+    """Background task: fold older turns into the chat's rolling Odia summary."""
+    try:
+        new_summary = await update_summary(summary, folded)
+        await store.update_summary(session_id, new_summary, summarized_count)
+    except Exception as e:
+        logger.warning(f"Summary update failed for {session_id}: {str(e)}")
+
+async def _apply_title(store: ChatStore, session_id: str, placeholder: str, title_task: asyncio.Task):
+    """
+    Wait for the LLM title and patch it onto the chat, unless the user renamed
+    the chat in the meantime. Returns the final name.
+    """
+    title = await title_task
+    if not title or title == DEFAULT_TITLE:
+        return placeholder
+    try:
+        chat = await store.get_chat(session_id, tail=0)
+        if chat["name"] != placeholder:
+            return chat["name"]
+        await store.rename_chat(session_id, title)
+    except Exception as e:
+        logger.warning(f"Could not apply generated title for {session_id}: {str(e)}")
+        return placeholder
+    return title
+
+async def _finish_turn(request: ChatRequest, store: ChatStore, messages_history: list, assistant_response: str,
+                       chat_state: dict, background_tasks: BackgroundTasks, title_task: asyncio.Task = None):
+    """
+    Append the turn's two messages and schedule a summary update once enough
+    old turns have piled up. For new chats, the LLM title (started concurrently
+    with the graph) is saved with the reply if it is already done; otherwise
+    the heuristic placeholder stays and the title is left pending.
+    Returns (title, title_pending).
+    """
+    new_title = None
+    title_pending = False
 
     # Add assistant response with timestamp
     messages_history.append({
         "role": "assistant", 
         "content": assistant_response,
-        "timestamp": current_timestamp
+        "timestamp": messages_history[-1]["timestamp"]
     })
 
-    # Update only the messages - Appwrite will update $updatedAt automatically
-    update_data = {'messages': json.dumps(messages_history)}
-    
-    # If it was a new chat, generate and set the title
-    if request.is_new_chat:
-        new_title = generate_chat_title(user_message)
-        update_data['name'] = new_title
+    # If it was a new chat, use the generated title if it is ready, else keep the placeholder
+    if title_task is not None:
+        if title_task.done() and title_task.result() != DEFAULT_TITLE:
+            new_title = title_task.result()
+        else:
+            new_title = heuristic_title(request.message)
+            title_pending = not title_task.done()
+
+    await store.append_messages(request.session_id, request.user_id, messages_history[-2:],
+                                start_seq=chat_state["messageCount"],
+                                name=None if title_pending else new_title)
+
+    fold = pending_fold(messages_history, chat_state["summarizedCount"], chat_state["baseSeq"])
+    if fold:
+        folded, summarized_count = fold
+        background_tasks.add_task(
+            _fold_summary, store, request.session_id, chat_state["summary"], folded, summarized_count
+        )
+    return new_title, title_pending
 
-    db.update_document(db_id, collection_id, session_id, update_data)
+@app.post("/chat")
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks, store: ChatStore = Depends(get_store)):
+    """Main chat endpoint. Handles new chat creation, titling, and conversation."""
+    messages_history, chat_state = await _start_turn(request, store)
+    # Title generation runs alongside the graph instead of after it
+    title_task = asyncio.create_task(generate_chat_title(request.message)) if request.is_new_chat else None
+
+    formatted_messages = build_context(messages_history, chat_state["summary"],
+                                       chat_state["summarizedCount"], chat_state["baseSeq"])
+    initial_state = {"messages": formatted_messages}
+    final_state = await graph.ainvoke(initial_state)
+    assistant_response = final_state["messages"][-1].content
+
+    new_title, title_pending = await _finish_turn(request, store, messages_history, assistant_response,
+                                                  chat_state, background_tasks, title_task)
+    if title_pending:
+        background_tasks.add_task(_apply_title, store, request.session_id, new_title, title_task)
     
-    return {"status": "success", "response": assistant_response, "newName": new_title}
+    # titlePending tells the client to pick up the final name from /chats later
+    return {"status": "success", "response": assistant_response, "newName": new_title, "titlePending": title_pending}
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, background_tasks: BackgroundTasks, store: ChatStore = Depends(get_store)):
+    """
+    Streaming variant of /chat. Emits NDJSON events while the graph runs:
+    `route` (router decision), `progress` (agent/tool activity), `token`
+    (response-agent tokens) and `done` carrying the cleaned response. For a
+    new chat whose LLM title was not ready by then, a final `title` event
+    follows. The turn is persisted once, after the graph has finished.
+    """
+    messages_history, chat_state = await _start_turn(request, store)
+    title_task = asyncio.create_task(generate_chat_title(request.message)) if request.is_new_chat else None
+    initial_state = {"messages": build_context(messages_history, chat_state["summary"],
+                                               chat_state["summarizedCount"], chat_state["baseSeq"])}
+
+    async def event_stream():
+        assistant_response = None
+        try:
+            async for event in graph.astream_events(initial_state, version="v2"):
+                kind = event["event"]
+                name = event.get("name")
+                node = event.get("metadata", {}).get("langgraph_node")
+
+                if kind == "on_chat_model_stream" and node == "response":
+                    token = event["data"]["chunk"].content
+                    if token:
+                        yield _ndjson({"type": "token", "content": token})
+                elif kind == "on_chain_end" and name == "router" and node == "router":
+                    output = event["data"].get("output") or {}
+                    yield _ndjson({"type": "route", "agent": output.get("next_agent", "response")})
+                elif kind == "on_chain_start" and name in ("research", "weather") and node == name:
+                    yield _ndjson({"type": "progress", "stage": name, "status": "started"})
+                elif kind == "on_chain_end" and name in ("research", "weather") and node == name:
+                    yield _ndjson({"type": "progress", "stage": name, "status": "finished"})
+                elif kind in ("on_tool_start", "on_tool_end"):
+                    status = "started" if kind == "on_tool_start" else "finished"
+                    yield _ndjson({"type": "progress", "stage": "tool", "name": name, "status": status})
+                elif kind == "on_chain_end" and name == "response" and node == "response":
+                    output = event["data"].get("output") or {}
+                    if output.get("messages"):
+                        assistant_response = output["messages"][-1].content
+
+            if assistant_response is None:
+                raise RuntimeError("Graph finished without a response")
+
+            new_title, title_pending = await _finish_turn(request, store, messages_history, assistant_response,
+                                                          chat_state, background_tasks, title_task)
+            yield _ndjson({"type": "done", "response": assistant_response, "newName": new_title,
+                           "titlePending": title_pending})
+            if title_pending:
+                final_title = await _apply_title(store, request.session_id, new_title, title_task)
+                yield _ndjson({"type": "title", "name": final_title})
+        except Exception as e:
+            logger.error(f"Streaming chat failed: {str(e)}", exc_info=True)
+            yield _ndjson({"type": "error", "detail": str(e)})
+
+    # background_tasks runs after the body is fully sent, so tasks added mid-stream still fire
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks,
+    )
 
 @app.post("/clear-history")
-async def clear_history(request: SessionActionRequest, db: Databases = Depends(get_db)):
+async def clear_history(request: SessionActionRequest, store: ChatStore = Depends(get_store)):
     """Clears the message history for a given session."""
     try:
-        db.update_document(
-            database_id=os.getenv("APPWRITE_DATABASE_ID"),
-            collection_id=os.getenv("APPWRITE_COLLECTION_ID"),
-            document_id=request.session_id,
-            data={'messages': '[]'}
-        )
+        await store.clear_chat(request.session_id)
         return {"status": "success", "message": "Chat history cleared"}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Session not found: {str(e)}")
 
 @app.post("/delete-chat")
-async def delete_chat(request: SessionActionRequest, db: Databases = Depends(get_db)):
-    """Deletes a chat session document."""
+async def delete_chat(request: SessionActionRequest, store: ChatStore = Depends(get_store)):
+    """Deletes a chat session and its messages."""
     try:
-        db.delete_document(
-            database_id=os.getenv("APPWRITE_DATABASE_ID"),
-            collection_id=os.getenv("APPWRITE_COLLECTION_ID"),
-            document_id=request.session_id
-        )
+        await store.delete_chat(request.session_id)
         return {"status": "success", "message": "Chat session deleted"}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Session not found: {str(e)}")
 
 @app.post("/rename-chat")
-async def rename_chat(request: RenameRequest, db: Databases = Depends(get_db)):
+async def rename_chat(request: RenameRequest, store: ChatStore = Depends(get_store)):
     """Renames a chat session."""
     try:
-        db.update_document(
-            database_id=os.getenv("APPWRITE_DATABASE_ID"),
-            collection_id=os.getenv("APPWRITE_COLLECTION_ID"),
-            document_id=request.session_id,
-            data={'name': request.name}
-        )
+        await store.rename_chat(request.session_id, request.name)
         return {"status": "success", "message": "Chat renamed"}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Session not found: {str(e)}")
@@ -245,11 +423,38 @@ async def text_to_speech(request: TTSRequest):
         text = request.text.strip()
         if not text:
             raise HTTPException(status_code=400, detail="Empty text provided")
-        audio_content = await generate_odia_speech(text)
-        return StreamingResponse(iter([audio_content]), media_type="audio/wav")
+        audio_content = await cached_odia_speech(text)
+        return Response(audio_content, media_type="audio/wav")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/text-to-speech/stream")
+async def text_to_speech_stream(request: TTSRequest):
+    """
+    Streaming variant of /text-to-speech: one WAV stream whose audio starts
+    after the first sentence is synthesized, with later sentences appended
+    in order as they complete.
+    """
+    text = request.text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty text provided")
+    audio_stream = stream_odia_speech(text)
+    try:
+        # Wait for the first chunk here so a failing provider still gets a proper 500
+        header = await anext(audio_stream)
+        first = await anext(audio_stream)
+    except Exception as e:
+        await audio_stream.aclose()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        yield header + first
+        async for pcm in audio_stream:
+            yield pcm
+
+    return StreamingResponse(body(), media_type="audio/wav",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/speech-to-text")
 async def speech_to_text(audio: UploadFile = File(...)):
     """
@@ -272,33 +477,41 @@ async def speech_to_text(audio: UploadFile = File(...)):
                 detail="Unsupported audio format. Please use supported formats."
             )
 
-        # Read the uploaded audio file
-        audio_content = await audio.read()
-        logger.info(f"Audio file size: {len(audio_content)} bytes")
+        # The upload is already spooled by the multipart parser; use its size
+        # instead of reading the whole clip into another buffer
+        size = audio.size
+        if size is None:
+            size = audio.file.seek(0, os.SEEK_END)
+            audio.file.seek(0)
+        logger.info(f"Audio file size: {size} bytes")
         
-        if len(audio_content) == 0:
+        if size == 0:
             logger.error("Empty audio file received")
             raise HTTPException(status_code=400, detail="Empty audio file")
 
         # Check file size limit
         max_size = 10 * 1024 * 1024  # 10MB limit for safety
-        if len(audio_content) > max_size:
-            logger.error(f"File too large: {len(audio_content)} bytes")
+        if size > max_size:
+            logger.error(f"File too large: {size} bytes")
             raise HTTPException(status_code=400, detail="Audio file too large. Maximum size is 10MB")
 
-        # Create a temporary file-like object
-        audio_file = io.BytesIO(audio_content)
-        
-        # Transcribe using Sarvam AI
-        result = await transcribe_audio(audio_file, language_code="unknown")
+        # Transcribe using Sarvam AI; uploads are normalized to compact mono 16 kHz audio,
+        # long ones are split at silences and sent in parallel
+        result = await transcribe_upload(audio.file, filename=audio.filename,
+                                         content_type=audio.content_type or "application/octet-stream",
+                                         size=size, language_code="unknown")
         
         logger.info(f"Transcription successful: {result}")
-        return {
+        response = {
             "success": True,
             "transcript": result["transcript"],
             "detected_language": result["detected_language"],
             "message": "Speech transcribed successfully"
         }
+        if "segments" in result:
+            # Long recordings: per-segment timing, transcript and language
+            response["segments"] = result["segments"]
+        return response
 
     except HTTPException:
         raise
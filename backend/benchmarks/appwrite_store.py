@@ -0,0 +1,192 @@
+"""
+Throughput benchmark for /chats and /rename-chat against a local Appwrite stub.
+
+The stub is a threaded HTTP server on 127.0.0.1. It speaks the few
+Appwrite database routes the store uses: list, get and patch documents.
+Each call takes --db-ms. The store talks to it through the Appwrite SDK's
+Client, and the FastAPI app is driven in-process through httpx's ASGI
+transport with --concurrency requests in flight:
+
+  • per request – the old wiring: a new client and store built by the
+    dependency on every request, SDK calls made inline in the async
+    handlers, blocking the event loop
+  • lifespan    – the app-lifetime store from app.state, SDK calls run
+    in its bounded thread pool
+
+The session cache and write-behind queue are left out, so every request
+reaches the stub in both modes.
+
+    cd backend && python benchmarks/appwrite_store.py [--requests 200] [--concurrency 16] [--db-ms 20]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+for key in ("GROQ_API_KEY", "SERPAPI_API_KEY", "OPENWEATHERMAP_API_KEY", "SARVAM_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+import httpx
+from appwrite.client import Client
+
+import app as backend
+from services.chat_store import AppwriteChatStore
+
+DATABASE_ID, COLLECTION_ID, CHATS = "bench-db", "chats", 20
+
+
+class StubAppwrite(BaseHTTPRequestHandler):
+    """List, get and patch documents of one in-memory collection, each after `delay` seconds."""
+    delay = 0.02
+    documents = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _document_id(self):
+        parts = urlparse(self.path).path.rstrip("/").split("/")
+        return parts[-1] if parts[-2] == "documents" else None
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        doc_id = self._document_id()
+        if doc_id is None:
+            docs = sorted(self.documents.values(), key=lambda d: d["$updatedAt"], reverse=True)
+            return self._reply(200, {"total": len(docs), "documents": docs})
+        if doc_id not in self.documents:
+            return self._reply(404, {"message": "Document not found", "code": 404})
+        self._reply(200, self.documents[doc_id])
+
+    def do_PATCH(self):
+        time.sleep(self.delay)
+        doc_id = self._document_id()
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        if doc_id not in self.documents:
+            return self._reply(404, {"message": "Document not found", "code": 404})
+        self.documents[doc_id].update(body.get("data") or {})
+        self._reply(200, self.documents[doc_id])
+
+
+def seed():
+    history = json.dumps([{"role": "user", "content": "ନମସ୍କାର", "timestamp": 1},
+                          {"role": "assistant", "content": "ନମସ୍କାର! କିପରି ସାହାଯ୍ୟ କରିପାରିବି?", "timestamp": 1}])
+    StubAppwrite.documents = {
+        f"s{n}": {"$id": f"s{n}", "userId": "u1", "sessionId": f"s{n}", "name": f"chat {n}", "messages": history,
+                  "$createdAt": "2025-01-01T00:00:00.000+00:00",
+                  "$updatedAt": f"2025-01-01T00:{n:02d}:00.000+00:00"}
+        for n in range(CHATS)
+    }
+
+
+class DictDatabases:
+    """
+    The Databases calls the store makes, sent through the SDK's Client (one
+    blocking requests call each) and returned as plain dicts. Appwrite SDK 24+
+    wraps results in typed models, while the store reads them as dicts.
+    """
+
+    JSON = {"content-type": "application/json"}
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    @staticmethod
+    def _path(database_id, collection_id, document_id=None) -> str:
+        path = f"/databases/{database_id}/collections/{collection_id}/documents"
+        return f"{path}/{document_id}" if document_id else path
+
+    def list_documents(self, database_id, collection_id, queries=None):
+        return self.client.call("get", self._path(database_id, collection_id), self.JSON, {"queries": queries or []})
+
+    def get_document(self, database_id, collection_id, document_id):
+        return self.client.call("get", self._path(database_id, collection_id, document_id), self.JSON)
+
+    def update_document(self, database_id, collection_id, document_id, data):
+        return self.client.call("patch", self._path(database_id, collection_id, document_id), self.JSON, {"data": data})
+
+
+def databases(endpoint: str) -> DictDatabases:
+    client = Client()
+    client.set_endpoint(endpoint)
+    client.set_project("bench")
+    client.set_key("bench")
+    return DictDatabases(client)
+
+
+class InlineAppwriteChatStore(AppwriteChatStore):
+    """The store as it used to run: SDK calls made directly on the event loop."""
+
+    async def _call(self, fn, *args):
+        return fn(*args)
+
+
+async def drive(requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=backend.app)
+    slots, results = asyncio.Semaphore(concurrency), {}
+    calls = {
+        "/chats": lambda client, n: client.get("/chats/u1", params={"limit": CHATS}),
+        "/rename-chat": lambda client, n: client.post("/rename-chat", json={"session_id": f"s{n % CHATS}",
+                                                                            "name": f"renamed {n}"}),
+    }
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for route, call in calls.items():
+            async def one(n):
+                async with slots:
+                    (await call(client, n)).raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(n) for n in range(requests)))
+            results[route] = requests / (time.perf_counter() - started)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-ms", type=float, default=20.0, help="simulated Appwrite latency per call")
+    args = parser.parse_args()
+
+    StubAppwrite.delay = args.db_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAppwrite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    def per_request_store():
+        return InlineAppwriteChatStore(databases(endpoint), DATABASE_ID, COLLECTION_ID, storage_mode="blob")
+
+    lifespan_store = AppwriteChatStore(databases(endpoint), DATABASE_ID, COLLECTION_ID, storage_mode="blob")
+
+    print(f"stub Appwrite: {args.db_ms:.0f} ms per call; {args.requests} requests per route, "
+          f"{args.concurrency} in flight\n")
+    print(f"{'store wiring':<14} {'/chats req/s':>13} {'/rename-chat req/s':>19}")
+    for label, setup in (("per request", lambda: backend.app.dependency_overrides.update(
+                              {backend.get_store: per_request_store})),
+                         ("lifespan", lambda: (backend.app.dependency_overrides.clear(),
+                                               setattr(backend.app.state, "chat_store", lifespan_store)))):
+        seed()
+        setup()
+        results = asyncio.run(drive(args.requests, args.concurrency))
+        print(f"{label:<14} {results['/chats']:>13.0f} {results['/rename-chat']:>19.0f}")
+
+    backend.app.dependency_overrides.clear()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
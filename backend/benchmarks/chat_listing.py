@@ -0,0 +1,112 @@
+"""
+Payload-size and latency benchmark for the chat listing, for one user with
+--chats chats of --messages messages each.
+
+Chats are seeded into a throwaway SQLite store and the FastAPI app is
+driven in-process through httpx's ASGI transport. Compared requests:
+
+  • full listing     – GET /chats/{user}: every chat with all its messages
+    (the old behaviour, still served without limit/cursor)
+  • first page       – GET /chats/{user}?limit=20: sidebar summaries only
+  • all pages        – following nextCursor until the listing is exhausted
+  • open a chat      – GET /chats/{id}/messages?tail=50, the lazy load
+
+    cd backend && python benchmarks/chat_listing.py [--chats 500] [--messages 40] [--runs 20]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+for key in ("GROQ_API_KEY", "SERPAPI_API_KEY", "OPENWEATHERMAP_API_KEY", "SARVAM_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+import httpx
+
+import app as backend
+from services.chat_store import SQLiteChatStore
+
+QUESTION = "ଓଡ଼ିଶାର ଇତିହାସ ବିଷୟରେ ଆଉ ଟିକେ କୁହନ୍ତୁ।"
+ANSWER = " ".join(["କଳିଙ୍ଗ ଯୁଦ୍ଧ ପରେ ସମ୍ରାଟ ଅଶୋକ ବୌଦ୍ଧ ଧର୍ମ ଗ୍ରହଣ କରିଥିଲେ।"] * 4)
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def seed(store, chats: int, messages: int):
+    for n in range(chats):
+        await store.create_chat(f"s{n}", "u1", f"chat {n}")
+        history = [{"role": "user" if i % 2 == 0 else "assistant", "content": QUESTION if i % 2 == 0 else ANSWER,
+                    "timestamp": n * 1000 + i} for i in range(messages)]
+        await store.append_messages(f"s{n}", "u1", history, start_seq=0)
+
+
+async def measure(client, fetch, runs: int) -> tuple:
+    latencies, size = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        size = await fetch(client)
+        latencies.append(1000 * (time.perf_counter() - started))
+    return size, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+async def get(client, url: str, **params) -> httpx.Response:
+    response = await client.get(url, params=params)
+    response.raise_for_status()
+    return response
+
+
+async def full_listing(client) -> int:
+    return len((await get(client, "/chats/u1")).content)
+
+
+async def first_page(client) -> int:
+    return len((await get(client, "/chats/u1", limit=20)).content)
+
+
+async def all_pages(client) -> int:
+    total, cursor = 0, None
+    while True:
+        response = await get(client, "/chats/u1", limit=100, **({"cursor": cursor} if cursor else {}))
+        total += len(response.content)
+        cursor = response.json()["nextCursor"]
+        if not cursor:
+            return total
+
+
+async def open_chat(client) -> int:
+    return len((await get(client, "/chats/s0/messages", tail=50)).content)
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as scratch:
+        store = SQLiteChatStore(os.path.join(scratch, "chats.sqlite3"))
+        await seed(store, args.chats, args.messages)
+        backend.app.state.chat_store = store
+        transport = httpx.ASGITransport(app=backend.app)
+        print(f"{args.chats} chats x {args.messages} messages\n")
+        print(f"{'request':<22} {'bytes':>11} {'p50 ms':>8} {'p99 ms':>8}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, fetch in (("full listing", full_listing), ("first page (20)", first_page),
+                                 ("all pages (100 each)", all_pages), ("open a chat (tail 50)", open_chat)):
+                size, p50, p99 = await measure(client, fetch, args.runs)
+                print(f"{label:<22} {size:>11,} {p50:>8.1f} {p99:>8.1f}")
+        await store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
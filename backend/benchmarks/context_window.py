@@ -0,0 +1,91 @@
+"""
+Context-window benchmark: prompt size and context-assembly latency as one
+conversation grows to --turns turns.
+
+Each turn follows app.py against a throwaway SQLite store. It reads the
+history, builds the graph's context, renders the router and responder
+prompts and appends the turn. Older turns are folded into the rolling
+summary as app.py schedules them; the fold LLM call is stubbed with a
+fixed-size Odia summary. The "full history" columns show the old
+behaviour, where the whole stored conversation was read and joined into
+both prompts.
+
+    cd backend && python benchmarks/context_window.py [--turns 200]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from agents.context_manager import (
+    build_context, format_for_prompt, pending_fold, estimate_tokens,
+    CONTEXT_MAX_MESSAGES, ROUTER_CONTEXT_TOKENS, RESPONSE_CONTEXT_TOKENS,
+)
+from services.chat_store import SQLiteChatStore
+
+QUESTION = "ଓଡ଼ିଶାର ଇତିହାସ ବିଷୟରେ ଆଉ ଟିକେ କୁହନ୍ତୁ, ବିଶେଷ କରି କଳିଙ୍ଗ ଯୁଦ୍ଧ ପରର ସମୟ ବିଷୟରେ।"
+ANSWER = " ".join(["କଳିଙ୍ଗ ଯୁଦ୍ଧ ପରେ ସମ୍ରାଟ ଅଶୋକ ବୌଦ୍ଧ ଧର୍ମ ଗ୍ରହଣ କରିଥିଲେ।"] * 5)
+SUMMARY = " ".join(["ଉପଯୋଗକର୍ତ୍ତା ଓଡ଼ିଶାର ଇତିହାସ ଓ କଳିଙ୍ଗ ଯୁଦ୍ଧ ବିଷୟରେ ପଚାରିଛନ୍ତି।"] * 8)
+CHECKPOINTS = (1, 10, 25, 50, 100, 150, 200)
+
+
+def _full_prompt(messages: list) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+async def run(turns: int) -> list:
+    rows = []
+    with tempfile.TemporaryDirectory() as scratch:
+        store = SQLiteChatStore(os.path.join(scratch, "chats.sqlite3"))
+        await store.create_chat("bench", "u1", "benchmark")
+        for turn in range(1, turns + 1):
+            user = {"role": "user", "content": QUESTION, "timestamp": turn}
+
+            started = time.perf_counter()
+            chat = await store.get_chat("bench", tail=CONTEXT_MAX_MESSAGES - 1)
+            history = chat["messages"] + [user]
+            context = build_context(history, chat["summary"], chat["summarizedCount"], chat["baseSeq"])
+            router_prompt = format_for_prompt(context, ROUTER_CONTEXT_TOKENS)
+            response_prompt = format_for_prompt(context, RESPONSE_CONTEXT_TOKENS)
+            windowed_ms = 1000 * (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            full = await store.get_chat("bench")
+            full_prompt = _full_prompt(full["messages"] + [user])
+            full_ms = 1000 * (time.perf_counter() - started)
+
+            history.append({"role": "assistant", "content": ANSWER, "timestamp": turn})
+            await store.append_messages("bench", "u1", history[-2:], start_seq=chat["messageCount"])
+            fold = pending_fold(history, chat["summarizedCount"], chat["baseSeq"])
+            if fold:
+                await store.update_summary("bench", SUMMARY, fold[1])
+
+            if turn in CHECKPOINTS or turn == turns:
+                rows.append((turn, estimate_tokens(router_prompt), estimate_tokens(response_prompt), windowed_ms,
+                             estimate_tokens(full_prompt), full_ms))
+        await store.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"budgets: router {ROUTER_CONTEXT_TOKENS} tokens, responder {RESPONSE_CONTEXT_TOKENS} tokens; "
+          f"at most {CONTEXT_MAX_MESSAGES} messages read per turn\n")
+    print(f"{'turn':>5} {'router tok':>11} {'responder tok':>14} {'assembly ms':>12}"
+          f" {'full-history tok':>17} {'full ms':>8}")
+    for turn, router_tokens, response_tokens, windowed_ms, full_tokens, full_ms in asyncio.run(run(args.turns)):
+        print(f"{turn:>5} {router_tokens:>11} {response_tokens:>14} {windowed_ms:>12.2f}"
+              f" {full_tokens:>17} {full_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Connection-reuse benchmark for services.http_client against a local stub.
+
+The stub is a minimal keep-alive HTTP/1.1 server on 127.0.0.1. It charges
+--handshake-ms once per new connection, standing in for the TCP + TLS
+handshake a real provider costs, and --service-ms per request. Requests are
+sent two ways:
+
+  • fresh client  – a new httpx client (new connection) per call, which is
+    what the old per-call requests.get / requests.post did
+  • shared pool   – http_client.request through the pooled provider client
+
+Each mode runs --requests calls one after another and then the same number
+with --concurrency in flight, reporting req/s, p50/p99 latency and how many
+connections the stub accepted.
+
+    cd backend && python benchmarks/http_pool.py [--requests 200] [--concurrency 10] [--handshake-ms 30]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+
+class StubProvider:
+    """Keep-alive HTTP/1.1 server answering every GET with a small JSON body."""
+
+    BODY = b'{"weather": [{"description": "clear sky"}], "main": {"temp": 30.0}}'
+
+    def __init__(self, handshake_ms: float, service_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.service = service_ms / 1000
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(self.service)
+                close = b"connection: close" in head.lower()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             + f"Content-Length: {len(self.BODY)}\r\n".encode()
+                             + (b"Connection: close\r\n" if close else b"") + b"\r\n" + self.BODY)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def drive(call, requests: int, concurrency: int) -> tuple:
+    latencies, slots = [], asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            started = time.perf_counter()
+            response = await call()
+            response.raise_for_status()
+            latencies.append(1000 * (time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started), percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+async def run(args):
+    stub = StubProvider(args.handshake_ms, args.service_ms)
+    base_url = await stub.start()
+    # Point the pooled openweathermap client at the stub before the module builds it
+    os.environ["OPENWEATHERMAP_BASE_URL"] = base_url
+    from services import http_client
+
+    async def fresh_client():
+        async with httpx.AsyncClient(base_url=base_url, timeout=10.0) as client:
+            return await client.get("/data/2.5/weather")
+
+    async def shared_pool():
+        return await http_client.request("openweathermap", "GET", "/data/2.5/weather")
+
+    print(f"stub: {args.handshake_ms:.0f} ms per new connection, {args.service_ms:.0f} ms per request\n")
+    print(f"{'mode':<14} {'in flight':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'connections':>12}")
+    for label, call in (("fresh client", fresh_client), ("shared pool", shared_pool)):
+        for concurrency in (1, args.concurrency):
+            before = stub.connections
+            rps, p50, p99 = await drive(call, args.requests, concurrency)
+            print(f"{label:<14} {concurrency:>9} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f} {stub.connections - before:>12}")
+    await http_client.aclose()
+    await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="simulated TCP + TLS setup per connection")
+    parser.add_argument("--service-ms", type=float, default=5.0, help="simulated provider time per request")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark for the router's safety-override keyword matching.
+
+Compares the compiled matchers in agents.router (FACTUAL_MATCHER and
+WEATHER_MATCHER, one regex each, built at import from router_rules.json)
+with the original implementation, which rebuilt both keyword lists on every
+call and ran one lowercased substring scan per keyword. Both sides use the
+same keyword lists, so only the matching strategy differs. Messages of
+increasing length are built from the labeled routing set; the overrides
+are only checked, no LLM is involved.
+
+It also lists labeled messages where the two disagree, which are the
+substring false positives ("cm" inside "academic") the compiled matcher
+avoids.
+
+    cd backend && python benchmarks/override_matcher.py [--lengths 80,1000,10000,50000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from agents.router import FACTUAL_MATCHER, WEATHER_MATCHER, ROUTER_RULES_PATH
+
+SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_set.jsonl")
+
+
+def load_rules() -> tuple:
+    with open(ROUTER_RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+    return rules["factual_keywords"], rules["weather_terms"]
+
+
+FACTUAL_KEYWORDS, WEATHER_TERMS = load_rules()
+
+
+def legacy_override(user_message: str) -> bool:
+    """The pre-compiled check: lists rebuilt per call, one substring scan per keyword."""
+    factual_keywords_multilang = list(FACTUAL_KEYWORDS)
+    if any(keyword.lower() in user_message.lower() for keyword in factual_keywords_multilang):
+        weather_terms = list(WEATHER_TERMS)
+        is_weather = any(weather_term.lower() in user_message.lower() for weather_term in weather_terms)
+        return not is_weather
+    return False
+
+
+def compiled_override(user_message: str) -> bool:
+    if FACTUAL_MATCHER.search(user_message):
+        return WEATHER_MATCHER.search(user_message) is None
+    return False
+
+
+def per_call_us(check, message: str, budget: float = 0.3) -> float:
+    calls, started = 0, time.perf_counter()
+    while True:
+        check(message)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            return 1e6 * elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="80,1000,10000,50000", help="message lengths in characters")
+    args = parser.parse_args()
+
+    with open(SET_PATH, encoding="utf-8") as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    # Messages with no factual keyword at all are the worst case for both: every scan runs to the end
+    filler = " ".join(t for t in texts if not FACTUAL_MATCHER.search(t)
+                      and not any(k.lower() in t.lower() for k in FACTUAL_KEYWORDS)) + " "
+
+    print(f"{len(FACTUAL_KEYWORDS)} factual keywords, {len(WEATHER_TERMS)} weather terms\n")
+    print(f"{'chars':>7} {'legacy µs':>11} {'compiled µs':>12} {'speed-up':>9}")
+    for length in (int(n) for n in args.lengths.split(",")):
+        message = (filler * (length // len(filler) + 1))[:length]
+        legacy, compiled = per_call_us(legacy_override, message), per_call_us(compiled_override, message)
+        print(f"{length:>7} {legacy:>11.1f} {compiled:>12.1f} {legacy / compiled:>8.1f}x")
+
+    disagreements = [(t, legacy_override(t)) for t in texts if legacy_override(t) != compiled_override(t)]
+    print(f"\n{len(disagreements)}/{len(texts)} labeled messages where the two disagree:")
+    for text, legacy in disagreements:
+        print(f"  legacy {'forces' if legacy else 'skips '} research: {text}")
+
+
+if __name__ == "__main__":
+    main()
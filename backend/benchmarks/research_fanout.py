@@ -0,0 +1,84 @@
+"""
+Evidence-gathering benchmark for the research agent.
+
+Three stub sources answer after fixed delays (--delays, milliseconds). The
+same sources are awaited one after another (the old research_agent_node
+behaviour) and through agents.research_agent.gather_evidence, which fans
+them out concurrently. Wall time of the fan-out should track the slowest
+source, not the sum. Two more runs show the per-source deadline and the
+total latency budget cutting a slow source off.
+
+    cd backend && python benchmarks/research_fanout.py [--delays 400,900,1500] [--runs 5]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import io
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from agents.research_agent import gather_evidence
+
+
+class StubSource:
+    """Stands in for a search tool: answers `ainvoke` after a fixed delay."""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+
+    async def ainvoke(self, query):
+        await asyncio.sleep(self.delay)
+        return f"{self.delay * 1000:.0f} ms answer for {query}"
+
+
+async def sequential(query, sources) -> dict:
+    return {key: await source.ainvoke(query) for key, _, source in sources}
+
+
+async def fanout(query, sources, source_timeout=30.0, total_budget=60.0) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await gather_evidence(query, sources, source_timeout=source_timeout, total_budget=total_budget)
+
+
+def timed(coro_factory, runs: int) -> tuple:
+    samples, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = asyncio.run(coro_factory())
+        samples.append(1000 * (time.perf_counter() - started))
+    return min(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delays", default="400,900,1500", help="comma-separated stub latencies in ms (three sources)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    delays = [float(d) for d in args.delays.split(",")]
+    sources = tuple((f"s{i}", f"Source {i}", StubSource(d)) for i, d in enumerate(delays))
+    print(f"stub delays: {', '.join(f'{d:.0f} ms' for d in delays)} "
+          f"(sum {sum(delays):.0f} ms, slowest {max(delays):.0f} ms)\n")
+
+    rows = [
+        ("sequential awaits", lambda: sequential("q", sources)),
+        ("concurrent fan-out", lambda: fanout("q", sources)),
+        (f"per-source deadline {max(delays) * 0.8:.0f} ms",
+         lambda: fanout("q", sources, source_timeout=max(delays) * 0.8 / 1000)),
+        (f"total budget {sorted(delays)[-2] * 1.1:.0f} ms",
+         lambda: fanout("q", sources, total_budget=sorted(delays)[-2] * 1.1 / 1000)),
+    ]
+    print(f"{'strategy':<30} {'wall ms':>8} {'sources answered':>17}")
+    for label, factory in rows:
+        wall, evidence = timed(factory, args.runs)
+        answered = sum(1 for value in evidence.values() if " ms answer for " in value)
+        print(f"{label:<30} {wall:>8.0f} {answered:>13}/{len(sources)}")
+
+
+if __name__ == "__main__":
+    main()
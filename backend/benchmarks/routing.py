@@ -0,0 +1,166 @@
+"""
+Offline routing benchmark over the labeled messages in routing_set.jsonl
+(the tuning set) or, with --holdout, routing_holdout.jsonl: a stratified
+quarter of the labeled messages that tuning never sees.
+
+Runs every message through agents.router.get_route with the LLM tier
+replaced by an oracle that answers the labeled intent after --llm-ms, so
+the numbers isolate what the local classifier decides on its own:
+
+  • fast-path accuracy – share of classifier decisions (after the factual
+    safety override) that match the label; these never reach the LLM
+  • overall accuracy   – with the LLM assumed correct, so only fast-path
+    and override mistakes count
+  • LLM-call rate and p50/p99 routing latency
+
+A threshold sweep shows the trade-off for ROUTER_CONFIDENCE_THRESHOLD.
+--tune grid-searches the classifier weights instead, on the tuning set
+only: for each weighting the temperature is fitted by log-loss, and
+weightings are ranked by log-loss.
+
+    cd backend && python benchmarks/routing.py [--threshold 0.8] [--llm-ms 600] [--holdout | --tune]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import math
+import argparse
+import contextlib
+import io
+import itertools
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from agents import router, intent_classifier
+from agents.intent_classifier import classify
+
+SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_set.jsonl")
+HOLDOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_holdout.jsonl")
+
+
+def load_set(path=SET_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run(examples: list, threshold: float, llm_ms: float) -> dict:
+    gold = {}
+
+    async def oracle(prompt):
+        await asyncio.sleep(llm_ms / 1000)
+        return router.RouteQuery(next_agent=gold["intent"])
+
+    router.structured_router = RunnableLambda(oracle)
+    router.ROUTER_CONFIDENCE_THRESHOLD = threshold
+    fast, fast_correct, correct, latencies, errors = 0, 0, 0, [], []
+    for example in examples:
+        gold["intent"] = example["intent"]
+        calls = router.route_stats["llm"]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            decision = (await router.get_route({"messages": [HumanMessage(example["text"])]}))["next_agent"]
+        latencies.append(time.perf_counter() - started)
+        ok = decision == example["intent"]
+        correct += ok
+        if router.route_stats["llm"] == calls:
+            fast += 1
+            fast_correct += ok
+        if not ok:
+            errors.append((example["text"], example["intent"], decision))
+    return {
+        "fast": fast, "fast_correct": fast_correct, "correct": correct, "errors": errors,
+        "p50_ms": 1000 * percentile(latencies, 0.5), "p99_ms": 1000 * percentile(latencies, 0.99),
+    }
+
+
+def classifier_latency(examples: list, repeat: int = 200) -> tuple:
+    samples = []
+    for example in examples:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            classify(example["text"])
+        samples.append((time.perf_counter() - started) / repeat)
+    return 1e6 * percentile(samples, 0.5), 1e6 * percentile(samples, 0.99)
+
+
+def log_loss(examples: list) -> float:
+    total = 0.0
+    for example in examples:
+        _, _, scores = classify(example["text"])
+        top = max(scores.values())
+        exp = {k: math.exp((v - top) / intent_classifier.TEMPERATURE) for k, v in scores.items()}
+        total -= math.log(max(exp[example["intent"]] / sum(exp.values()), 1e-12))
+    return total / len(examples)
+
+
+def tune(examples: list, threshold: float):
+    """Grid-search rule/n-gram weights; fit the temperature of each by log-loss."""
+    temperatures = [0.15, 0.2, 0.25, 0.3, 0.35, 0.5, 0.7, 1.0, 1.4, 2.0]
+    rows = []
+    for rule, weak, ngram in itertools.product([1.0, 1.5, 2.0, 3.0], [0.25, 0.5, 0.75, 1.0], [1.0, 2.0, 3.0, 4.0, 6.0]):
+        intent_classifier.RULE_WEIGHT, intent_classifier.WEAK_RULE_WEIGHT = rule, weak
+        intent_classifier.NGRAM_WEIGHT = ngram
+        losses = {}
+        for t in temperatures:
+            intent_classifier.TEMPERATURE = t
+            losses[t] = log_loss(examples)
+        intent_classifier.TEMPERATURE = best_t = min(losses, key=losses.get)
+        decided = [(classify(e["text"]), e["intent"]) for e in examples]
+        fast = [(intent, gold) for (intent, confidence, _), gold in decided if confidence >= threshold]
+        rows.append((losses[best_t], rule, weak, ngram, best_t,
+                     sum(intent == gold for (intent, _, _), gold in decided) / len(examples),
+                     len(fast) / len(examples),
+                     sum(intent == gold for intent, gold in fast) / len(fast) if fast else 0.0))
+    print(f"{'log-loss':>8} {'rule':>5} {'weak':>5} {'ngram':>5} {'temp':>5} {'argmax acc':>10}"
+          f" {'fast @' + format(threshold, '.2f'):>9} {'fast acc':>9}")
+    for row in sorted(rows)[:10]:
+        print(f"{row[0]:>8.3f} {row[1]:>5} {row[2]:>5} {row[3]:>5} {row[4]:>5} {row[5]:>10.1%} {row[6]:>9.1%} {row[7]:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=router.ROUTER_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--llm-ms", type=float, default=600.0, help="simulated latency of the LLM router call")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--holdout", action="store_true", help="report on the held-out messages")
+    mode.add_argument("--tune", action="store_true", help="grid-search the classifier weights instead")
+    args = parser.parse_args()
+
+    if args.tune:
+        return tune(load_set(), args.threshold)
+    examples = load_set(HOLDOUT_PATH if args.holdout else SET_PATH)
+    n = len(examples)
+    print(f"{n} labeled messages: {dict(Counter(e['intent'] for e in examples))}")
+    print(f"classifier alone: p50 {classifier_latency(examples)[0]:.0f} µs, p99 {classifier_latency(examples)[1]:.0f} µs\n")
+
+    print(f"{'threshold':>9} {'LLM calls':>10} {'fast-path acc':>14} {'overall acc':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    sweep = sorted({0.5, 0.6, 0.7, 0.8, 0.9, 0.95, args.threshold, 1.01})
+    results = {}
+    for threshold in sweep:
+        r = results[threshold] = asyncio.run(run(examples, threshold, args.llm_ms))
+        fast_acc = f"{r['fast_correct'] / r['fast']:.1%}" if r["fast"] else "–"
+        label = "LLM only" if threshold > 1 else f"{threshold:.2f}"
+        print(f"{label:>9} {(n - r['fast']) / n:>10.1%} {fast_acc:>14} {r['correct'] / n:>12.1%}"
+              f" {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+    chosen = results[args.threshold]
+    print(f"\nMisrouted at threshold {args.threshold:.2f}:")
+    for text, expected, got in chosen["errors"]:
+        print(f"  {expected:>8} → {got:<8} {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Upload-normalization benchmark: bytes sent to the STT provider and
+transcription latency over a small synthetic corpus.
+
+The corpus covers typical recorder outputs: 48 kHz stereo WAV, 44.1 kHz
+and 48 kHz mono WAV, 16 kHz mono WAV and, with ffmpeg, a 48 kHz Opus clip
+like a browser's. Each clip has leading and trailing silence. Every clip
+goes through stt_service.transcribe_upload, the /speech-to-text path, to
+the stub from stt_segments.py. The stub charges --base-ms, --rtf per audio
+second and the upload time at --uplink-mbps. Modes:
+
+  • as-is       – STT_NORMALIZE and STT_LONG_AUDIO off: the bytes are forwarded
+  • normalized  – mono, 16 kHz, silence-trimmed, re-encoded (FLAC with
+    ffmpeg, WAV without); clips over one segment are split
+
+    cd backend && python benchmarks/stt_normalize.py [--uplink-mbps 4] [--base-ms 300] [--rtf 0.05]
+"""
+import os
+import io
+import sys
+import time
+import asyncio
+import argparse
+import logging
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+os.environ.setdefault("SARVAM_API_KEY", "benchmark")
+
+import numpy as np
+
+from services.audio_utils import FFMPEG, encode_speech, encode_wav
+from stt_segments import serve_stub, stub_timing
+
+
+def speech(rng, seconds: float, rate: int, lead: float = 1.5, tail: float = 1.5) -> np.ndarray:
+    """Voiced bursts of 2-6 s with short pauses, wrapped in near-silence."""
+    parts, total = [0.002 * rng.standard_normal(int(lead * rate))], 0
+    while total < seconds * rate:
+        n = int(rng.uniform(2, 6) * rate)
+        t = np.arange(n) / rate
+        f0 = rng.uniform(120, 220)
+        parts.append(0.3 * np.sin(2 * np.pi * f0 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+                     + 0.1 * np.sin(2 * np.pi * 3 * f0 * t) + 0.03 * rng.standard_normal(n))
+        gap = int(rng.uniform(0.3, 0.8) * rate)
+        parts.append(0.002 * rng.standard_normal(gap))
+        total += n + gap
+    parts.append(0.002 * rng.standard_normal(int(tail * rate)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+async def corpus() -> list:
+    """[(name, bytes, content type)]"""
+    rng = np.random.default_rng(7)
+    stereo = speech(rng, 20, 48000)
+    clips = [
+        ("48k_stereo_20s.wav", encode_wav(np.stack([stereo, 0.9 * stereo], axis=1), 48000), "audio/wav"),
+        ("44k_mono_12s.wav", encode_wav(speech(rng, 12, 44100), 44100), "audio/wav"),
+        ("16k_mono_8s.wav", encode_wav(speech(rng, 8, 16000, 0.3, 3), 16000), "audio/wav"),
+        ("48k_mono_50s.wav", encode_wav(speech(rng, 50, 48000), 48000), "audio/wav"),
+    ]
+    if FFMPEG:
+        opus, _, content_type = await encode_speech(speech(rng, 20, 48000)[:, None], 48000, "opus")
+        clips.append(("browser_opus_20s.ogg", opus, content_type))
+    return clips
+
+
+async def run(clips: list) -> tuple:
+    """As-is rows, then normalized rows; one loop, since the Sarvam client is pooled."""
+    from services import stt_service
+    modes = []
+    for normalize in (False, True):
+        stt_service.STT_NORMALIZE = stt_service.STT_LONG_AUDIO = normalize
+        rows = []
+        for name, data, content_type in clips:
+            sent = stt_service.upload_stats["bytes_sent"]
+            started = time.perf_counter()
+            result = await stt_service.transcribe_upload(io.BytesIO(data), name, content_type, len(data))
+            assert result["transcript"]
+            rows.append((name, len(data), stt_service.upload_stats["bytes_sent"] - sent,
+                         time.perf_counter() - started))
+        modes.append(rows)
+    return tuple(modes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uplink-mbps", type=float, default=4.0, help="client uplink, megabits per second")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="stub overhead per request")
+    parser.add_argument("--rtf", type=float, default=0.05, help="stub seconds of work per second of audio")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    stub_timing.update(base=args.base_ms / 1000, rtf=args.rtf, uplink=args.uplink_mbps * 1e6 / 8)
+    server = serve_stub()
+    # Point the pooled Sarvam client at the stub before stt_service builds it
+    os.environ["SARVAM_BASE_URL"] = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+    clips = asyncio.run(corpus())
+    print(f"uplink {args.uplink_mbps:g} Mbit/s; stub: {args.base_ms:.0f} ms + {args.rtf:g} s per audio second; "
+          f"upload codec {'flac' if FFMPEG else 'wav (no ffmpeg)'}\n")
+    print(f"{'clip':<22} {'received':>10} {'sent as-is':>11} {'sent norm.':>11} {'as-is s':>8} {'norm. s':>8}")
+    as_is, normalized = asyncio.run(run(clips))
+    for (name, size, raw_sent, raw_s), (_, _, norm_sent, norm_s) in zip(as_is, normalized):
+        print(f"{name:<22} {size:>10,} {raw_sent:>11,} {norm_sent:>11,} {raw_s:>8.2f} {norm_s:>8.2f}")
+    raw_total, norm_total = sum(row[2] for row in as_is), sum(row[2] for row in normalized)
+    print(f"{'total':<22} {sum(row[1] for row in as_is):>10,} {raw_total:>11,} {norm_total:>11,}"
+          f" {sum(row[3] for row in as_is):>8.2f} {sum(row[3] for row in normalized):>8.2f}")
+    print(f"\nbytes sent reduced by {1 - norm_total / raw_total:.0%}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
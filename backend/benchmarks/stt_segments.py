@@ -0,0 +1,119 @@
+"""
+Long-audio transcription benchmark against a local stub of Sarvam's STT API.
+
+A synthetic --minutes voice note is generated: 16 kHz mono bursts of voiced
+sound of 3-9 s, separated by 0.4-1.2 s pauses. The stub is a FastAPI app
+served by uvicorn on 127.0.0.1. It decodes each upload and answers after
+--base-ms plus --rtf seconds per second of audio, so a provider's
+per-request overhead and real-time factor are both modelled. The note is
+transcribed three ways:
+
+  • one request           – the whole clip in a single call (the old path)
+  • segments, one by one  – transcribe_segments with STT_SEGMENT_CONCURRENCY=1
+  • segments, concurrent  – transcribe_segments with the default pool
+
+End-to-end time for the concurrent run should be close to one segment's,
+not the sum of all segments.
+
+    cd backend && python benchmarks/stt_segments.py [--minutes 5] [--base-ms 300] [--rtf 0.05]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("SARVAM_API_KEY", "benchmark")
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, File, Form, UploadFile
+
+from services.audio_utils import SPEECH_RATE, decode_audio, encode_wav
+
+stub = FastAPI()
+stub_timing = {"base": 0.3, "rtf": 0.05, "uplink": float("inf"), "calls": 0, "seconds": []}
+
+
+@stub.post("/speech-to-text")
+async def stub_transcribe(file: UploadFile = File(...), model: str = Form(...), language_code: str = Form("unknown")):
+    data = await file.read()
+    samples, rate = await decode_audio(data)
+    duration = len(samples) / rate
+    stub_timing["calls"] += 1
+    stub_timing["seconds"].append(duration)
+    # uplink (bytes/s) charges the upload time a slower client link would add
+    await asyncio.sleep(stub_timing["base"] + stub_timing["rtf"] * duration + len(data) / stub_timing["uplink"])
+    return {"transcript": f"[{duration:.1f} s]", "language_code": "od-IN", "request_id": "stub"}
+
+
+def voice_note(minutes: float, rate: int = SPEECH_RATE) -> bytes:
+    rng = np.random.default_rng(1)
+    parts, total = [], 0
+    while total < minutes * 60 * rate:
+        n = int(rng.uniform(3, 9) * rate)
+        t = np.arange(n) / rate
+        parts.append(0.3 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+                     + 0.05 * rng.standard_normal(n))
+        gap = int(rng.uniform(0.4, 1.2) * rate)
+        parts.append(0.003 * rng.standard_normal(gap))
+        total += n + gap
+    return encode_wav(np.concatenate(parts)[:int(minutes * 60 * rate)].astype(np.float32), rate)
+
+
+def serve_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=0, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def run(note: bytes) -> list:
+    from services import stt_service
+    samples, rate = await decode_audio(note)
+    rows = []
+    for label, concurrency in (("one request", None), ("segments, one by one", 1),
+                               ("segments, concurrent", stt_service.STT_SEGMENT_CONCURRENCY)):
+        stub_timing["calls"], stub_timing["seconds"] = 0, []
+        started = time.perf_counter()
+        if concurrency is None:
+            result = await stt_service.transcribe_audio(note, "note.wav", "audio/wav")
+        else:
+            stt_service.STT_SEGMENT_CONCURRENCY = concurrency
+            result = await stt_service.transcribe_segments(samples, rate)
+        wall = time.perf_counter() - started
+        longest = max(stub_timing["seconds"])
+        assert result["transcript"]
+        rows.append((label, wall, stub_timing["calls"], stub_timing["base"] + stub_timing["rtf"] * longest))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--base-ms", type=float, default=300.0, help="stub overhead per request")
+    parser.add_argument("--rtf", type=float, default=0.05, help="stub seconds of work per second of audio")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    stub_timing["base"], stub_timing["rtf"] = args.base_ms / 1000, args.rtf
+    server = serve_stub()
+    # Point the pooled Sarvam client at the stub before stt_service builds it
+    os.environ["SARVAM_BASE_URL"] = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+    note = voice_note(args.minutes)
+    print(f"{args.minutes:g}-minute note, {len(note):,} bytes; stub: {args.base_ms:.0f} ms + "
+          f"{args.rtf:g} s per audio second\n")
+    print(f"{'mode':<22} {'wall s':>7} {'calls':>6} {'slowest call s':>15}")
+    for label, wall, calls, slowest in asyncio.run(run(note)):
+        print(f"{label:<22} {wall:>7.2f} {calls:>6} {slowest:>15.2f}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
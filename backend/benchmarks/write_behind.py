@@ -0,0 +1,141 @@
+"""
+/chat latency with and without the write-behind queue, against a store
+with artificial latency.
+
+The store is an in-memory SQLite store whose reads take --read-ms and whose
+writes take an exponentially distributed time averaging --write-ms, so
+slow writes show up in the tail. The router and responder are stubbed to
+answer at once, so storage dominates the turn. --requests /chat calls go
+through the app in-process, --concurrency at a time, spread over
+--sessions chats. A chat's next turn reads it, and that read flushes the
+chat's queued writes first. In real use a turn's LLM time leaves the write
+ample time to land. With fewer sessions than requests (e.g. --sessions 50)
+turns come back within a few hundred ms, and the tail shows that wait.
+Modes:
+
+  • direct                – every turn waits for its append
+  • write-behind          – the append is queued; no journal
+  • write-behind + fsync  – queued after an fsynced journal record
+
+    cd backend && python benchmarks/write_behind.py [--requests 300] [--write-ms 40] [--read-ms 5]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+import io
+import gc
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+for key in ("GROQ_API_KEY", "SERPAPI_API_KEY", "OPENWEATHERMAP_API_KEY", "SARVAM_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+import httpx
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import app as backend
+from agents import router, response_agent
+from services.chat_store import SQLiteChatStore, WriteBehindChatStore
+
+
+class SlowStore(SQLiteChatStore):
+    """
+    In-memory SQLite with a fixed read latency and a random, heavy-tailed
+    write latency; in memory, so disk syncs add nothing the flags don't set.
+    """
+
+    def __init__(self, read_ms: float, write_ms: float):
+        super().__init__(":memory:")
+        self.read = read_ms / 1000
+        self.write = write_ms / 1000
+        self.rng = random.Random(7)
+
+    async def _write_delay(self):
+        await asyncio.sleep(self.rng.expovariate(1 / self.write) if self.write else 0)
+
+    async def get_chat(self, *args, **kwargs):
+        await asyncio.sleep(self.read)
+        return await super().get_chat(*args, **kwargs)
+
+    async def append_messages(self, *args, **kwargs):
+        await self._write_delay()
+        return await super().append_messages(*args, **kwargs)
+
+    async def update_summary(self, *args, **kwargs):
+        await self._write_delay()
+        return await super().update_summary(*args, **kwargs)
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run(store, args) -> list:
+    await store.start()
+    for n in range(args.sessions):
+        await store.create_chat(f"s{n}", "u1", f"chat {n}")
+    backend.app.state.chat_store = store
+    slots, latencies = asyncio.Semaphore(args.concurrency), []
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def turn(n):
+            async with slots:
+                started = time.perf_counter()
+                response = await client.post("/chat", json={"session_id": f"s{n % args.sessions}", "user_id": "u1",
+                                                            "message": "ନମସ୍କାର", "is_new_chat": False})
+                response.raise_for_status()
+                latencies.append(1000 * (time.perf_counter() - started))
+
+        await asyncio.gather(*(turn(n) for n in range(args.requests)))
+    await store.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--write-ms", type=float, default=40.0, help="mean simulated write latency")
+    parser.add_argument("--read-ms", type=float, default=5.0, help="simulated read latency")
+    args = parser.parse_args()
+
+    async def route(prompt):
+        return router.RouteQuery(next_agent="response")
+
+    router.structured_router = RunnableLambda(route)
+    response_agent.llm = RunnableLambda(lambda prompt: AIMessage(content="ନମସ୍କାର! କିପରି ସାହାଯ୍ୟ କରିପାରିବି?"))
+
+    print(f"store: {args.read_ms:.0f} ms reads, writes averaging {args.write_ms:.0f} ms (exponential); "
+          f"{args.requests} turns, {args.concurrency} in flight\n")
+    print(f"{'mode':<22} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    with tempfile.TemporaryDirectory() as scratch:
+        # The first turns in a process pay one-off setup; keep them out of every mode's tail
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(run(SlowStore(0, 0), argparse.Namespace(**{**vars(args), "requests": 2 * args.concurrency})))
+        # A full collection over the imported LangChain object graph pauses the loop ~100 ms,
+        # landing in whichever mode happens to be running; move those objects out of its reach
+        gc.collect()
+        gc.freeze()
+        modes = (
+            ("direct", lambda inner: inner),
+            ("write-behind", lambda inner: WriteBehindChatStore(inner)),
+            ("write-behind + fsync", lambda inner: WriteBehindChatStore(
+                inner, journal_path=os.path.join(scratch, "journal.jsonl"), fsync=True)),
+        )
+        for label, wrap in modes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies = asyncio.run(run(wrap(SlowStore(args.read_ms, args.write_ms)), args))
+            print(f"{label:<22} {percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.99):>8.1f}"
+                  f" {max(latencies):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
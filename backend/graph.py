@@ -1,5 +1,7 @@
-from typing import TypedDict, Annotated, List
+import time
+from typing import TypedDict, Annotated, List, Tuple
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
@@ -21,6 +23,7 @@ from tools.weather_tool import get_current_weather
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], lambda x, y: x + y]
     next_agent: str            # set by router
+    trace: Annotated[List[Tuple[str, float]], lambda x, y: x + y]   # (node, ms) in execution order
 
 # ── Tool node (only weather uses tools via LLM) ──────────────────
 tools = [
@@ -31,14 +34,33 @@ tools = [
 ]
 tool_node = ToolNode(tools)
 
+# ── Per-node timing ──────────────────────────────────────────────
+node_stats = {}   # node -> {"runs": n, "total_ms": t}
+
+def _timed(name: str, node):
+    """Wrap a node so each run appends (name, ms) to the state's trace."""
+    async def run(state: AgentState, config: RunnableConfig):
+        started = time.perf_counter()
+        if hasattr(node, "ainvoke"):
+            update = await node.ainvoke(state, config)
+        else:
+            update = await node(state)
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+        stats = node_stats.setdefault(name, {"runs": 0, "total_ms": 0.0})
+        stats["runs"] += 1
+        stats["total_ms"] = round(stats["total_ms"] + elapsed, 1)
+        print(f"--- NODE {name}: {elapsed} ms ---")
+        return {**update, "trace": [(name, elapsed)]}
+    return run
+
 # ── Build the LangGraph workflow ─────────────────────────────────
 workflow = StateGraph(AgentState)
 
-workflow.add_node("router",   get_route)
-workflow.add_node("research", research_agent_node)
-workflow.add_node("weather",  weather_agent_node)
-workflow.add_node("tool_node", tool_node)
-workflow.add_node("response", response_agent_node)
+workflow.add_node("router",   _timed("router", get_route))
+workflow.add_node("research", _timed("research", research_agent_node))
+workflow.add_node("weather",  _timed("weather", weather_agent_node))
+workflow.add_node("tool_node", _timed("tool_node", tool_node))
+workflow.add_node("response", _timed("response", response_agent_node))
 
 workflow.set_entry_point("router")
 
@@ -55,8 +77,21 @@ workflow.add_conditional_edges(
     },
 )
 
-workflow.add_edge("research",  "tool_node")
-workflow.add_edge("weather",   "tool_node")
+def _needs_tools(state: AgentState) -> str:
+    # research runs its searches itself and the weather fast path runs its
+    # tool, so tool_node is only worth a superstep for an LLM-emitted call
+    return "tool_node" if getattr(state["messages"][-1], "tool_calls", None) else "response"
+
+for agent in ("research", "weather"):
+    workflow.add_conditional_edges(
+        agent,
+        _needs_tools,
+        {
+            "tool_node": "tool_node",
+            "response":  "response",
+        },
+    )
+
 workflow.add_edge("tool_node", "response")
 workflow.add_edge("response",  END)
 
@@ -0,0 +1,326 @@
+"""
+Audio helpers shared by the speech services.
+
+Audio moves between the providers and the client as 16-bit PCM WAV; these
+helpers split a WAV file into its format and samples and build headers for
+WAV streams whose length is not known up front.
+
+For speech-to-text, uploads are decoded to float32 NumPy arrays of shape
+(frames, channels): WAV natively, every other container through ffmpeg when
+it is installed, which can also downmix and resample in the same pass so a
+long stereo 48 kHz clip never exists as full-rate floats. normalize_speech()
+reduces them to what the ASR model actually uses (mono, at most 16 kHz,
+without leading/trailing silence) and a frame-energy VAD finds silence to
+cut long recordings at.
+"""
+import struct
+import shutil
+import asyncio
+import numpy as np
+
+STREAM_SIZE = 0xFFFFFFFF    # RIFF/data size used by streaming writers
+FFMPEG = shutil.which("ffmpeg")
+
+# WAVE format tags
+_PCM, _FLOAT, _EXTENSIBLE = 0x0001, 0x0003, 0xFFFE
+
+def _wav_chunks(data: bytes):
+    """Return (fmt chunk body, data chunk view) of a WAV file. Raises ValueError."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = data[body:body + size]
+            if len(fmt) < 16:
+                raise ValueError("Truncated WAV fmt chunk")
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk")
+            end = len(data) if size in (0, STREAM_SIZE) else min(body + size, len(data))
+            return fmt, memoryview(data)[body:end]
+        pos = body + size + (size & 1)
+    raise ValueError("WAV has no data chunk")
+
+def parse_wav(data: bytes):
+    """
+    Return ((channels, sample_rate, bits_per_sample), pcm) for a PCM WAV
+    file, where pcm is a memoryview over the data chunk. Raises ValueError.
+    """
+    fmt, pcm = _wav_chunks(data)
+    _, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", fmt)
+    return (channels, sample_rate, bits), pcm
+
+def wav_header(channels: int, sample_rate: int, bits: int, data_size: int = STREAM_SIZE) -> bytes:
+    """44-byte PCM WAV header; the default sizes mark a stream of unknown length."""
+    block_align = channels * bits // 8
+    riff_size = STREAM_SIZE if data_size == STREAM_SIZE else 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits,
+        b"data", data_size,
+    )
+
+# ── Decoding / encoding ───────────────────────────────────────────
+def decode_wav(data: bytes):
+    """
+    Decode integer PCM (8/16/24/32-bit) or float WAV to (samples, sample_rate),
+    samples being float32 in [-1, 1] with shape (frames, channels).
+    """
+    fmt, pcm = _wav_chunks(data)
+    tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", fmt)
+    if tag == _EXTENSIBLE and len(fmt) >= 26:
+        tag = struct.unpack_from("<H", fmt, 24)[0]
+    width = bits // 8
+    if channels < 1 or width < 1:
+        raise ValueError("Invalid WAV format")
+    frames = len(pcm) // (width * channels)
+    pcm = pcm[:frames * width * channels]
+    if tag == _PCM and width == 1:
+        samples = (np.frombuffer(pcm, np.uint8).astype(np.float32) - 128) / 128
+    elif tag == _PCM and width == 2:
+        samples = np.frombuffer(pcm, "<i2").astype(np.float32) / 32768
+    elif tag == _PCM and width == 3:
+        raw = np.frombuffer(pcm, np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] << 8 | raw[:, 1] << 16 | raw[:, 2] << 24) >> 8).astype(np.float32) / 8388608
+    elif tag == _PCM and width == 4:
+        samples = (np.frombuffer(pcm, "<i4") / 2147483648).astype(np.float32)
+    elif tag == _FLOAT and width in (4, 8):
+        samples = np.frombuffer(pcm, "<f4" if width == 4 else "<f8").astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {tag:#x}, {bits}-bit)")
+    return samples.reshape(frames, channels), sample_rate
+
+async def decode_audio(data: bytes, channels: int = None, sample_rate: int = None, max_bytes: int = None):
+    """
+    Decode an uploaded clip to (samples, sample_rate) like decode_wav. Other
+    containers (WebM, Ogg, MP3, M4A...) need ffmpeg on PATH and raise
+    ValueError without it. With ffmpeg, `channels` and `sample_rate` are
+    applied while decoding (WAV then goes through ffmpeg too); without it
+    WAV is decoded in-process as recorded. Raises ValueError once the
+    decoded samples would exceed `max_bytes`.
+    """
+    convert = FFMPEG and (channels or sample_rate)
+    if data[:4] == b"RIFF" and not convert:
+        try:
+            samples, rate = decode_wav(data)
+        except ValueError:
+            if not FFMPEG:
+                raise
+        else:
+            if max_bytes and samples.nbytes > max_bytes:
+                raise ValueError(f"Decoded audio exceeds {max_bytes} bytes")
+            return samples, rate
+    if not FFMPEG:
+        raise ValueError("Decoding this audio format requires ffmpeg")
+    args = []
+    if channels:
+        args += ["-ac", str(channels)]
+    if sample_rate:
+        args += ["-ar", str(sample_rate)]
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG, "-nostdin", "-v", "error", "-i", "pipe:0", *args, "-f", "wav", "-acodec", "pcm_f32le", "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await _communicate(proc, data, max_bytes and max_bytes + 4096)   # room for the WAV header
+    if out is None:
+        raise ValueError(f"Decoded audio exceeds {max_bytes} bytes")
+    if proc.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode the audio: {err.decode(errors='replace').strip()[:200]}")
+    return decode_wav(out)
+
+async def _communicate(proc, data: bytes, max_bytes: int = None):
+    """
+    Like proc.communicate(data), but stops reading stdout (and kills the
+    process) once it passes `max_bytes`, returning (None, stderr) then.
+    """
+    async def feed():
+        try:
+            proc.stdin.write(data)
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # ffmpeg exited early; its stderr says why
+
+    feeder = asyncio.create_task(feed())
+    errors = asyncio.create_task(proc.stderr.read())
+    out = bytearray()
+    try:
+        while True:
+            chunk = await proc.stdout.read(1 << 16)
+            if not chunk:
+                break
+            out += chunk
+            if max_bytes and len(out) > max_bytes:
+                proc.kill()
+                out = None
+                break
+        await proc.wait()
+        return (None if out is None else bytes(out)), await errors
+    finally:
+        feeder.cancel()
+        errors.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+def _pcm16(samples: np.ndarray) -> np.ndarray:
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """16-bit PCM WAV of float samples shaped (frames, channels) or (frames,)."""
+    pcm = _pcm16(samples)
+    return wav_header(pcm.shape[1], sample_rate, 16, pcm.nbytes) + pcm.tobytes()
+
+# codec -> (ffmpeg output arguments, file extension, content type)
+SPEECH_CODECS = {
+    "wav":  (None, ".wav", "audio/wav"),
+    "flac": (["-c:a", "flac", "-f", "flac"], ".flac", "audio/flac"),
+    "opus": (["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"], ".ogg", "audio/ogg"),
+}
+
+async def encode_speech(samples: np.ndarray, sample_rate: int, codec: str = "wav"):
+    """
+    Encode samples for upload. Returns (data, extension, content_type);
+    FLAC and Opus need ffmpeg and fall back to WAV without it.
+    """
+    args, extension, content_type = SPEECH_CODECS.get(codec, SPEECH_CODECS["wav"])
+    if args is None or not FFMPEG:
+        return encode_wav(samples, sample_rate), ".wav", "audio/wav"
+    pcm = _pcm16(samples)
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG, "-nostdin", "-v", "error", "-f", "s16le", "-ar", str(sample_rate), "-ac", str(pcm.shape[1]),
+        "-i", "pipe:0", *args, "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate(pcm.tobytes())
+    if proc.returncode != 0:
+        raise ValueError(f"ffmpeg could not encode {codec}: {err.decode(errors='replace').strip()[:200]}")
+    return out, extension, content_type
+
+# ── Normalization ─────────────────────────────────────────────────
+SPEECH_RATE = 16000         # what the ASR models work at
+TRIM_PAD_MS = 200           # silence kept around the speech when trimming
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    if samples.ndim == 1:
+        return samples
+    # A matrix-vector product is several times faster than mean(axis=1) here
+    return samples @ np.full(samples.shape[1], 1 / samples.shape[1], dtype=np.float32)
+
+def _lowpass(cutoff: float, num_taps: int) -> np.ndarray:
+    """Hamming-windowed sinc low-pass; `cutoff` in cycles per sample."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+def resample(mono: np.ndarray, sample_rate: int, target_rate: int = SPEECH_RATE):
+    """
+    Downsample to `target_rate` (never upsample): anti-alias FIR plus integer
+    decimation in polyphase form (the padded signal viewed as rows of
+    `factor` samples, one small matrix-vector product per row offset), then
+    linear interpolation for any remaining non-integer ratio (e.g. 44.1 kHz).
+    Returns (samples, rate).
+    """
+    if sample_rate <= target_rate:
+        return mono, sample_rate
+    factor = sample_rate // target_rate
+    taps = _lowpass(0.45 * target_rate / sample_rate, 16 * factor + 1)
+    half = len(taps) // 2
+    count = (len(mono) + factor - 1) // factor
+    phases = -(-len(taps) // factor)
+    taps = np.pad(taps, (0, phases * factor - len(taps))).reshape(phases, factor)
+    rows = np.pad(mono, (half, (count + phases) * factor - len(mono) - half)).reshape(-1, factor)
+    out = np.zeros(count, dtype=np.float32)
+    for q in range(phases):
+        out += rows[q:q + count] @ taps[q]
+    rate = sample_rate / factor
+    if rate != target_rate:
+        n_out = int(len(out) * target_rate / rate)
+        out = np.interp(np.arange(n_out) * (rate / target_rate), np.arange(len(out)), out).astype(np.float32)
+    return out, target_rate
+
+def trim_silence(mono: np.ndarray, sample_rate: int, pad_ms: int = TRIM_PAD_MS):
+    """
+    Drop leading and trailing silence, keeping `pad_ms` around the speech.
+    Returns (samples, index of the first kept sample).
+    """
+    db, frame = frame_energy_db(mono, sample_rate)
+    voiced = voiced_frames(db)
+    if not voiced.any():
+        return mono, 0
+    pad = sample_rate * pad_ms // 1000
+    start = max(int(np.argmax(voiced)) * frame - pad, 0)
+    end = min((len(voiced) - int(np.argmax(voiced[::-1]))) * frame + pad, len(mono))
+    return mono[start:end], start
+
+def normalize_speech(samples: np.ndarray, sample_rate: int):
+    """
+    Mono, at most SPEECH_RATE, silence trimmed. Returns (samples, rate,
+    seconds trimmed from the start).
+    """
+    mono, rate = resample(to_mono(samples), sample_rate)
+    mono, start = trim_silence(mono, rate)
+    return mono, rate, start / rate
+
+# ── Voice activity ────────────────────────────────────────────────
+VAD_FRAME_MS = 20
+VAD_SMOOTH_MS = 300
+VAD_FLOOR_DB = -50.0       # anything quieter is silence regardless of the recording
+VAD_MARGIN_DB = 10.0       # speech sits this far above the recording's noise floor...
+VAD_RANGE_DB = 30.0        # ...but never more than this far below its loudest frame
+VAD_MIN_SPEECH_MS = 200    # segments with less voiced audio are skipped
+
+def frame_energy_db(mono: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS):
+    """
+    RMS level of consecutive `frame_ms` frames in dBFS, and the frame length
+    in samples; a trailing partial frame is left out.
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(mono) // frame
+    frames = mono[:count * frame].reshape(count, frame)
+    return 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10), frame
+
+def voiced_frames(db: np.ndarray) -> np.ndarray:
+    """Boolean mask of frames loud enough to be speech."""
+    if not len(db):
+        return np.zeros(0, dtype=bool)
+    noise_floor = float(np.percentile(db, 10))
+    threshold = max(VAD_FLOOR_DB, min(noise_floor + VAD_MARGIN_DB, float(db.max()) - VAD_RANGE_DB))
+    return db > threshold
+
+def split_on_silence(mono: np.ndarray, sample_rate: int, min_seconds: float, max_seconds: float) -> list:
+    """
+    Cut a recording into [(start, end)] sample ranges no longer than
+    `max_seconds`, each cut placed at the quietest (smoothed) moment between
+    `min_seconds` and `max_seconds` after the previous one. Ranges with
+    almost no voiced audio are dropped.
+    """
+    db, frame = frame_energy_db(mono, sample_rate)
+    if not len(db):
+        return []
+    window = max(1, VAD_SMOOTH_MS // VAD_FRAME_MS)
+    smoothed = np.convolve(db, np.ones(window) / window, mode="same")
+    voiced = voiced_frames(db)
+    min_frames = int(min_seconds * 1000 / VAD_FRAME_MS)
+    max_frames = int(max_seconds * 1000 / VAD_FRAME_MS)
+    min_voiced = VAD_MIN_SPEECH_MS // VAD_FRAME_MS
+
+    segments, start = [], 0
+    while start < len(db):
+        if len(db) - start <= max_frames:
+            end = len(db)
+        else:
+            lo, hi = start + min_frames, start + max_frames
+            end = lo + int(np.argmin(smoothed[lo:hi]))
+        if voiced[start:end].sum() >= min_voiced:
+            segments.append((start * frame, len(mono) if end == len(db) else end * frame))
+        start = end
+    return segments
@@ -0,0 +1,242 @@
+"""
+Small async cache toolkit shared by the tools and services.
+
+Backends (same async get/set/delete/clear interface):
+  • MemoryCache – in-process LRU with per-entry TTL
+  • SQLiteCache – shared across worker processes on one host
+  • RedisCache  – shared across hosts (optional `redis` dependency)
+
+CoalescingCache sits in front of a backend, merges concurrent loads of the
+same key into one upstream call and keeps hit/miss counters.
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+_MISSING = object()
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: float = 300):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    async def get(self, key, default=None):
+        return self.get_nowait(key, default)
+
+    async def set(self, key, value, ttl=None):
+        self.set_nowait(key, value, ttl)
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def clear(self):
+        self._data.clear()
+
+    def get_nowait(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set_nowait(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """JSON values in a local SQLite table; LRU-trimmed by last access time."""
+
+    def __init__(self, path: str, maxsize: int = 10000, default_ttl: float = 300):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+        self._conn.commit()
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return _MISSING
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._conn.commit()
+
+    def _delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    async def get(self, key, default=None):
+        value = await asyncio.to_thread(self._get, key)
+        return default if value is _MISSING else value
+
+    async def set(self, key, value, ttl=None):
+        await asyncio.to_thread(self._set, key, value, self.default_ttl if ttl is None else ttl)
+
+    async def delete(self, key):
+        await asyncio.to_thread(self._delete, key)
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+
+class RedisCache:
+    """Redis-compatible shared backend; eviction is left to the server's maxmemory-policy."""
+
+    def __init__(self, url: str, prefix: str = "odialingua:", default_ttl: float = 300):
+        if aioredis is None:
+            raise RuntimeError("RedisCache requires the 'redis' package (pip install redis)")
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key, default=None):
+        raw = await self._redis.get(self.prefix + key)
+        return default if raw is None else json.loads(raw)
+
+    async def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        await self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl)))
+
+    async def delete(self, key):
+        await self._redis.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+
+def make_backend(kind: str, *, maxsize: int = 1024, default_ttl: float = 300,
+                 path: str = None, url: str = None, prefix: str = "odialingua:"):
+    """Build a cache backend by name: 'memory', 'sqlite' or 'redis'."""
+    kind = (kind or "memory").lower()
+    if kind == "sqlite":
+        return SQLiteCache(path or "cache.sqlite3", maxsize=maxsize, default_ttl=default_ttl)
+    if kind == "redis":
+        if aioredis is None:
+            print("WARNING: redis package not installed, falling back to in-memory cache.")
+        else:
+            return RedisCache(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                              prefix=prefix, default_ttl=default_ttl)
+    return MemoryCache(maxsize=maxsize, default_ttl=default_ttl)
+
+
+class CoalescingCache:
+    """
+    Read-through cache: concurrent misses for one key share a single loader
+    call. Only successful loads are stored; loader exceptions propagate to
+    every waiter and nothing is cached.
+
+    The load runs in its own task and every caller, the first one included,
+    waits on it through asyncio.shield: a caller that is cancelled (deadline,
+    client disconnect) stops waiting without cancelling the load the others
+    share, and the finished result is still cached.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def get_or_load(self, key: str, loader, ttl=None):
+        value = await self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, loader, ttl))
+            # Mark retrieved so a load nobody waits for anymore doesn't log a warning
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader, ttl):
+        try:
+            value = await loader()
+            await self.backend.set(key, value, ttl)
+            return value
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, key: str):
+        await self.backend.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
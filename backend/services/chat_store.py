@@ -0,0 +1,1277 @@
+"""
+Chat persistence behind one interface.
+
+  • AppwriteChatStore – the production store (legacy blob or append-only
+    records, see services/message_store.py)
+  • SQLiteChatStore   – local single-file store in WAL mode, for offline
+    benchmarks and single-node deployments
+  • CachedChatStore   – write-through LRU of hot sessions in front of either
+    of the above
+  • WriteBehindChatStore – optional queue that persists turns after the
+    reply has been sent (WRITE_BEHIND=true)
+
+Selected with CHAT_STORE=appwrite|sqlite and built once per process by
+make_chat_store() (see the FastAPI lifespan in app.py). Every store returns chats as
+plain dicts:
+
+    {"id", "userId", "name", "summary", "summarizedCount", "messageCount",
+     "createdAt", "lastUpdated", "messages", "baseSeq"}
+
+where timestamps are epoch milliseconds, `messages` is the requested slice
+of the history and `baseSeq` is the sequence number of its first message.
+Sidebar listings use the lighter summary shape
+
+    {"id", "name", "createdAt", "lastUpdated", "preview", "messageCount"}
+
+paged with an opaque cursor, or as a delta since a `lastUpdated` watermark.
+Deletions leave tombstones so deltas can report them; tombstones older than
+TOMBSTONE_RETENTION_DAYS are pruned and clients that far behind resync.
+"""
+import os
+import json
+import time
+import weakref
+import logging
+import base64
+import asyncio
+import itertools
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from appwrite.client import Client
+from appwrite.services.databases import Databases
+from appwrite.query import Query
+from appwrite.id import ID
+from appwrite.exception import AppwriteException
+from appwrite.permission import Permission
+from appwrite.role import Role
+
+from services.message_store import (
+    AppwriteMessageStore, CHAT_STORAGE_MODE, APPWRITE_MESSAGES_COLLECTION_ID, PAGE_SIZE, SequenceTakenError,
+    preview, same_message,
+)
+
+CHAT_STORE = os.getenv("CHAT_STORE", "appwrite").lower()
+CHAT_DB_PATH = os.getenv("CHAT_DB_PATH", "chats.sqlite3")
+# Upper bound on concurrent blocking Appwrite SDK calls
+APPWRITE_MAX_WORKERS = int(os.getenv("APPWRITE_MAX_WORKERS", "16"))
+APPWRITE_TOMBSTONES_COLLECTION_ID = os.getenv("APPWRITE_TOMBSTONES_COLLECTION_ID")
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+# Hot-session cache; SESSION_CACHE_SIZE=0 disables it
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "1800"))
+SESSION_CACHE_TAIL = int(os.getenv("SESSION_CACHE_TAIL", "64"))     # messages kept per session
+# Write-behind persistence; without a journal, queued writes die with the process
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_JOURNAL = os.getenv("WRITE_BEHIND_JOURNAL", "")          # JSONL path, replayed on startup
+WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() == "true"
+# The journal is compacted to the queue's contents once it grows past this
+WRITE_BEHIND_JOURNAL_MAX_BYTES = int(os.getenv("WRITE_BEHIND_JOURNAL_MAX_BYTES", str(16 * 1024 * 1024)))
+WRITE_BEHIND_LINGER = float(os.getenv("WRITE_BEHIND_LINGER_MS", "50")) / 1000
+WRITE_BEHIND_CONCURRENCY = int(os.getenv("WRITE_BEHIND_CONCURRENCY", "8"))
+WRITE_BEHIND_RETRY_DELAY = 0.5
+WRITE_BEHIND_MAX_DELAY = 30.0
+WRITE_BEHIND_FLUSH_TIMEOUT = float(os.getenv("WRITE_BEHIND_FLUSH_TIMEOUT", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+class ChatNotFoundError(Exception):
+    """Raised when a chat session does not exist."""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+def tombstone_horizon() -> int:
+    """Oldest `since` watermark a delta can still be answered for."""
+    return _now_ms() - TOMBSTONE_RETENTION_DAYS * 86400 * 1000
+
+# Monotonic stamps for ChatStore.versions; next() on a count is atomic in CPython
+_write_clock = itertools.count(1)
+
+def _encode_cursor(*parts) -> str:
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _slice_tail(messages: list, count: int, tail):
+    """Apply get_chat's tail window to a fully loaded history."""
+    start = 0 if tail is None else min(max(count - tail, 0), count)
+    return messages[start:], start
+
+def _append_position(session_id: str, messages: list, start_seq: int, count: int, stored: list):
+    """
+    Where an append the caller expected at `start_seq` really belongs, given
+    the chat's current `count` and the `stored` messages from start_seq on.
+    None means they already are these messages (a retried or replayed
+    write); otherwise another writer appended first and ours go at the end,
+    instead of overwriting theirs.
+    """
+    if count == start_seq:
+        return start_seq
+    if len(stored) >= len(messages) and all(map(same_message, stored, messages)):
+        return None
+    logger.warning(f"Chat {session_id} has {count} messages, not {start_seq}; appending after them")
+    return count
+
+
+class ChatStore:
+    """Interface shared by all chat stores."""
+
+    def __init__(self):
+        # user_id -> stamp of the last write this process made to the user's chats,
+        # so listings can be revalidated without touching the database
+        self.versions = {}
+
+    def _changed(self, user_id: str):
+        if user_id:
+            self.versions[user_id] = next(_write_clock)
+
+    async def create_chat(self, session_id: str, user_id: str, name: str) -> dict:
+        raise NotImplementedError
+
+    async def get_chat(self, session_id: str, tail: int = None) -> dict:
+        """
+        Load a chat with its newest `tail` messages (all when None).
+        Raises ChatNotFoundError.
+        """
+        raise NotImplementedError
+
+    async def append_messages(self, session_id: str, user_id: str, messages: list, start_seq: int,
+                              name: str = None) -> int:
+        """
+        Append `messages` at `start_seq`, optionally renaming the chat in the
+        same write. Returns the message count afterwards: when another
+        writer appended first the messages go after theirs and the count is
+        not start_seq + len(messages).
+        """
+        raise NotImplementedError
+
+    async def list_chats(self, user_id: str) -> list:
+        """All chats of a user with full messages, most recently updated first."""
+        raise NotImplementedError
+
+    async def list_chat_summaries(self, user_id: str, limit: int, cursor: str = None):
+        """One page of chat summaries, most recently updated first. Returns (chats, next_cursor)."""
+        raise NotImplementedError
+
+    async def list_changes(self, user_id: str, since: int) -> dict:
+        """
+        Summaries of chats updated after `since` (epoch ms) and ids of chats
+        deleted after it: {"chats", "deleted", "watermark"}, where watermark
+        is the `since` to send next time.
+        """
+        raise NotImplementedError
+
+    async def get_messages(self, session_id: str, start: int = 0, end: int = None) -> dict:
+        """
+        Messages with start <= seq < end (at most PAGE_SIZE of them) as
+        {"messages", "start", "total"}. Raises ChatNotFoundError.
+        """
+        raise NotImplementedError
+
+    async def rename_chat(self, session_id: str, name: str):
+        raise NotImplementedError
+
+    async def update_summary(self, session_id: str, summary: str, summarized_count: int):
+        raise NotImplementedError
+
+    async def clear_chat(self, session_id: str):
+        raise NotImplementedError
+
+    async def delete_chat(self, session_id: str):
+        raise NotImplementedError
+
+    async def start(self):
+        """Called once from the FastAPI lifespan, inside the running event loop."""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"store": type(self).__name__}
+
+
+# ── Appwrite ──────────────────────────────────────────────────────
+def _iso_to_ms(value):
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+
+def _ms_to_iso(value: int) -> str:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat(timespec="milliseconds")
+
+
+def make_appwrite_databases() -> Databases:
+    """The process-wide Appwrite client, configured from the environment."""
+    client = Client()
+    client.set_endpoint(os.getenv("APPWRITE_ENDPOINT"))
+    client.set_project(os.getenv("APPWRITE_PROJECT_ID"))
+    client.set_key(os.getenv("APPWRITE_API_KEY"))
+    return Databases(client)
+
+
+_SUMMARY_ATTRIBUTES = ('summary', 'summarizedCount')
+
+def _unknown_summary_attribute(e: AppwriteException) -> bool:
+    """Appwrite's 400 for a write naming an attribute the collection lacks."""
+    return e.code == 400 and "unknown attribute" in str(e.message).lower() and \
+        any(f'"{name}"' in str(e.message) for name in _SUMMARY_ATTRIBUTES)
+
+
+class AppwriteChatStore(ChatStore):
+    """
+    Chats collection in Appwrite; messages as a JSON blob or as records
+    (CHAT_STORAGE_MODE). The SDK is synchronous, so every operation runs in
+    a bounded thread pool instead of blocking the event loop.
+    """
+
+    def __init__(self, db, database_id: str = None, collection_id: str = None,
+                 storage_mode: str = CHAT_STORAGE_MODE, max_workers: int = APPWRITE_MAX_WORKERS):
+        super().__init__()
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="appwrite")
+        self.database_id = database_id or os.getenv("APPWRITE_DATABASE_ID")
+        self.collection_id = collection_id or os.getenv("APPWRITE_COLLECTION_ID")
+        self.records = storage_mode == "records"
+        self.messages = AppwriteMessageStore(db, self.database_id, APPWRITE_MESSAGES_COLLECTION_ID)
+        # Cleared on the first write Appwrite rejects for lacking summary/summarizedCount
+        self.summary_fields = True
+
+    def _get_document(self, session_id: str) -> dict:
+        try:
+            return self.db.get_document(self.database_id, self.collection_id, session_id)
+        except AppwriteException as e:
+            if e.code == 404:
+                raise ChatNotFoundError(session_id) from e
+            raise
+
+    def _update(self, session_id: str, data: dict):
+        try:
+            doc = self.db.update_document(self.database_id, self.collection_id, session_id, data)
+        except AppwriteException as e:
+            if e.code == 404:
+                raise ChatNotFoundError(session_id) from e
+            raise
+        self._changed(doc.get('userId'))
+
+    def _to_chat(self, doc: dict, messages: list, count: int, base_seq: int) -> dict:
+        return {
+            "id": doc['$id'],
+            "userId": doc.get('userId'),
+            "name": doc.get('name'),
+            "summary": doc.get('summary') or "",
+            "summarizedCount": doc.get('summarizedCount') or 0,
+            "messageCount": count,
+            "createdAt": _iso_to_ms(doc.get('$createdAt')),
+            "lastUpdated": _iso_to_ms(doc.get('$updatedAt')),
+            "messages": messages,
+            "baseSeq": base_seq,
+        }
+
+    def _load(self, doc: dict, tail=None) -> dict:
+        if not self.records:
+            history = json.loads(doc.get('messages') or '[]')
+            messages, base_seq = _slice_tail(history, len(history), tail)
+            return self._to_chat(doc, messages, len(history), base_seq)
+
+        count = self.messages.migrate_legacy(doc, self.collection_id)
+        if tail is None:
+            messages = self.messages.all(doc['$id'])
+        else:
+            messages = self.messages.tail(doc['$id'], tail)
+        if messages:
+            count = max(count, messages[-1]["seq"] + 1)
+        return self._to_chat(doc, messages, count, count - len(messages))
+
+    def _create(self, session_id, user_id, name):
+        # Appwrite fills in $createdAt/$updatedAt
+        data = {'userId': user_id, 'sessionId': session_id, 'name': name, 'messages': '[]'}
+        if self.records:
+            data['messageCount'] = 0
+        permissions = [Permission.read(Role.user(user_id)), Permission.update(Role.user(user_id)),
+                       Permission.delete(Role.user(user_id))]
+        doc = self.db.create_document(self.database_id, self.collection_id, session_id, data, permissions)
+        self._changed(user_id)
+        return self._to_chat(doc, [], 0, 0)
+
+    def _append(self, session_id, user_id, messages, start_seq, name):
+        if self.records:
+            count = self._append_records(session_id, user_id, messages, start_seq)
+            data = {'messageCount': count, 'preview': preview(messages)}
+        else:
+            # Blob documents have no conditional update; re-reading right before
+            # the write keeps the window for a concurrent append to one round-trip
+            history = json.loads(self._get_document(session_id).get('messages') or '[]')
+            start_seq = _append_position(session_id, messages, start_seq, len(history), history[start_seq:])
+            if start_seq is None:
+                return len(history)
+            count = start_seq + len(messages)
+            data = {'messages': json.dumps(history + messages)}
+        if name:
+            data['name'] = name
+        self._update(session_id, data)
+        return count
+
+    def _append_records(self, session_id, user_id, messages, start_seq):
+        while True:
+            try:
+                self.messages.append(session_id, user_id, messages, start_seq)
+                return start_seq + len(messages)
+            except SequenceTakenError as e:
+                # Ours up to e.seq are written; the rest go after the other writer's
+                messages = messages[e.seq - start_seq:]
+                newest = self.messages.tail(session_id, 1)
+                start_seq = _append_position(session_id, messages, e.seq, newest[-1]["seq"] + 1, [])
+
+    def _list_page(self, user_id, limit, cursor=None, select=None, since=None):
+        # Use Appwrite's built-in ordering by $updatedAt
+        queries = [Query.equal("userId", user_id), Query.order_desc("$updatedAt"), Query.limit(limit)]
+        if since:
+            queries.append(Query.greater_than("$updatedAt", _ms_to_iso(since)))
+        if cursor:
+            queries.append(Query.cursor_after(cursor))
+        if select:
+            queries.append(Query.select(select))
+        return self.db.list_documents(self.database_id, self.collection_id, queries=queries)['documents']
+
+    def _list(self, user_id):
+        # Walk every page; a single list call stops at Appwrite's default limit
+        chats, cursor = [], None
+        while True:
+            documents = self._list_page(user_id, PAGE_SIZE, cursor)
+            chats.extend(self._load(doc) for doc in documents)
+            if len(documents) < PAGE_SIZE:
+                return chats
+            cursor = documents[-1]['$id']
+
+    def _summary_select(self):
+        # In records mode preview and count live on the chat document and the blob is
+        # empty once migrated; in blob mode both are derived from the blob itself
+        select = ["$id", "$createdAt", "$updatedAt", "name", "messages"]
+        if self.records:
+            select += ["preview", "messageCount"]
+        return select
+
+    @staticmethod
+    def _to_summary(doc: dict) -> dict:
+        legacy = json.loads(doc.get('messages') or '[]')
+        return {
+            "id": doc['$id'],
+            "name": doc.get('name'),
+            "createdAt": _iso_to_ms(doc.get('$createdAt')),
+            "lastUpdated": _iso_to_ms(doc.get('$updatedAt')),
+            # Chats not yet migrated to records still carry their history in the blob
+            "preview": preview(legacy) if legacy else doc.get('preview') or "",
+            "messageCount": (doc.get('messageCount') or 0) + len(legacy),
+        }
+
+    def _summaries(self, user_id, limit, cursor):
+        documents = self._list_page(user_id, limit + 1, cursor, self._summary_select())
+        next_cursor = documents[limit - 1]['$id'] if len(documents) > limit else None
+        return [self._to_summary(doc) for doc in documents[:limit]], next_cursor
+
+    def _changes(self, user_id, since):
+        if not APPWRITE_TOMBSTONES_COLLECTION_ID:
+            raise ValueError("Delta listing needs APPWRITE_TOMBSTONES_COLLECTION_ID")
+        chats, cursor = [], None
+        while True:
+            documents = self._list_page(user_id, PAGE_SIZE, cursor, self._summary_select(), since)
+            chats.extend(self._to_summary(doc) for doc in documents)
+            if len(documents) < PAGE_SIZE:
+                break
+            cursor = documents[-1]['$id']
+        # Tombstones are compared on Appwrite's own $createdAt, the same clock as
+        # the chats' $updatedAt, so one watermark covers both
+        tombstones = self.db.list_documents(self.database_id, APPWRITE_TOMBSTONES_COLLECTION_ID, queries=[
+            Query.equal("userId", user_id),
+            Query.greater_than("$createdAt", _ms_to_iso(since)),
+            Query.limit(5000),
+        ])['documents']
+        watermark = max([since] + [c["lastUpdated"] for c in chats] + [_iso_to_ms(t["$createdAt"]) for t in tombstones])
+        return {"chats": chats, "deleted": [t["sessionId"] for t in tombstones], "watermark": watermark}
+
+    def _messages(self, session_id, start, end):
+        doc = self._get_document(session_id)
+        if not self.records or json.loads(doc.get('messages') or '[]'):
+            history = self._load(doc)["messages"]
+            total = len(history)
+            end = min(total if end is None else end, start + PAGE_SIZE)
+            return {"messages": history[start:end], "start": start, "total": total}
+        total = doc.get('messageCount') or 0
+        end = min(total if end is None else end, start + PAGE_SIZE)
+        return {"messages": self.messages.range(session_id, start, end), "start": start, "total": total}
+
+    def _summarize(self, session_id, summary, summarized_count):
+        try:
+            self._update(session_id, {'summary': summary, 'summarizedCount': summarized_count})
+        except AppwriteException as e:
+            if not _unknown_summary_attribute(e):
+                raise
+            logger.warning("Chats collection has no summary attributes; rolling summaries are off")
+            self.summary_fields = False
+
+    def _clear(self, session_id):
+        data = {'messages': '[]'}
+        if self.summary_fields:
+            data.update({'summary': '', 'summarizedCount': 0})
+        if self.records:
+            self.messages.delete_all(session_id)
+            data['messageCount'] = 0
+            data['preview'] = ''
+        try:
+            self._update(session_id, data)
+        except AppwriteException as e:
+            if not self.summary_fields or not _unknown_summary_attribute(e):
+                raise
+            # Collection not migrated yet: keep clearing without the summary
+            logger.warning("Chats collection has no summary attributes; rolling summaries are off")
+            self.summary_fields = False
+            self._update(session_id, {k: v for k, v in data.items() if k not in _SUMMARY_ATTRIBUTES})
+
+    def _delete(self, session_id):
+        user_id = self._get_document(session_id).get('userId')
+        try:
+            self.db.delete_document(self.database_id, self.collection_id, session_id)
+        except AppwriteException as e:
+            if e.code == 404:
+                raise ChatNotFoundError(session_id) from e
+            raise
+        self._changed(user_id)
+        if APPWRITE_TOMBSTONES_COLLECTION_ID:
+            self.db.create_document(self.database_id, APPWRITE_TOMBSTONES_COLLECTION_ID, ID.unique(),
+                                    {'userId': user_id, 'sessionId': session_id, 'deletedAt': _now_ms()},
+                                    [Permission.read(Role.user(user_id))])
+            expired = self.db.list_documents(self.database_id, APPWRITE_TOMBSTONES_COLLECTION_ID, queries=[
+                Query.equal("userId", user_id),
+                Query.less_than("$createdAt", _ms_to_iso(tombstone_horizon())),
+                Query.limit(PAGE_SIZE),
+            ])['documents']
+            for tombstone in expired:
+                self.db.delete_document(self.database_id, APPWRITE_TOMBSTONES_COLLECTION_ID, tombstone['$id'])
+        if self.records:
+            self.messages.delete_all(session_id)
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    async def create_chat(self, session_id, user_id, name):
+        return await self._call(self._create, session_id, user_id, name)
+
+    async def get_chat(self, session_id, tail=None):
+        return await self._call(lambda: self._load(self._get_document(session_id), tail))
+
+    async def append_messages(self, session_id, user_id, messages, start_seq, name=None):
+        return await self._call(self._append, session_id, user_id, messages, start_seq, name)
+
+    async def list_chats(self, user_id):
+        return await self._call(self._list, user_id)
+
+    async def list_chat_summaries(self, user_id, limit, cursor=None):
+        return await self._call(self._summaries, user_id, limit, cursor)
+
+    async def list_changes(self, user_id, since):
+        return await self._call(self._changes, user_id, since)
+
+    async def get_messages(self, session_id, start=0, end=None):
+        return await self._call(self._messages, session_id, start, end)
+
+    async def rename_chat(self, session_id, name):
+        await self._call(self._update, session_id, {'name': name})
+
+    async def update_summary(self, session_id, summary, summarized_count):
+        if self.summary_fields:
+            await self._call(self._summarize, session_id, summary, summarized_count)
+
+    async def clear_chat(self, session_id):
+        await self._call(self._clear, session_id)
+
+    async def delete_chat(self, session_id):
+        await self._call(self._delete, session_id)
+
+    async def close(self):
+        # Let in-flight writes finish before the process exits
+        await asyncio.to_thread(self._executor.shutdown, True)
+
+
+# ── SQLite ────────────────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_count INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    preview TEXT NOT NULL DEFAULT '',
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chats_user_updated ON chats(user_id, updated_at DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp INTEGER,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tombstones (
+    session_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    deleted_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted ON tombstones(user_id, deleted_at);
+"""
+
+_CHAT_COLUMNS = "id, user_id, name, summary, summarized_count, message_count, created_at, updated_at"
+_SUMMARY_COLUMNS = "id, name, created_at, updated_at, preview, message_count"
+
+
+class SQLiteChatStore(ChatStore):
+    """Single-file store; one connection guarded by a lock, queries run in worker threads."""
+
+    def __init__(self, path: str = CHAT_DB_PATH):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chats)")}
+        if "preview" not in columns:   # databases created before previews existed
+            self._conn.execute("ALTER TABLE chats ADD COLUMN preview TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn, *args):
+        with self._lock:
+            try:
+                result = fn(*args)
+                self._conn.commit()
+                return result
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    @staticmethod
+    def _to_chat(row, messages: list, base_seq: int) -> dict:
+        return {
+            "id": row[0], "userId": row[1], "name": row[2], "summary": row[3],
+            "summarizedCount": row[4], "messageCount": row[5],
+            "createdAt": row[6], "lastUpdated": row[7],
+            "messages": messages, "baseSeq": base_seq,
+        }
+
+    @staticmethod
+    def _to_message(row) -> dict:
+        return {"role": row[0], "content": row[1], "timestamp": row[2], "seq": row[3]}
+
+    def _touch(self, session_id: str, sql: str, args: tuple):
+        row = self._conn.execute(
+            f"UPDATE chats SET {sql}, updated_at = ? WHERE id = ? RETURNING user_id", (*args, _now_ms(), session_id)
+        ).fetchone()
+        if row is None:
+            raise ChatNotFoundError(session_id)
+        self._changed(row[0])
+
+    def _create(self, session_id, user_id, name):
+        now = _now_ms()
+        self._conn.execute(
+            f"INSERT INTO chats ({_CHAT_COLUMNS}) VALUES (?, ?, ?, '', 0, 0, ?, ?)",
+            (session_id, user_id, name, now, now),
+        )
+        self._changed(user_id)
+        return self._to_chat((session_id, user_id, name, "", 0, 0, now, now), [], 0)
+
+    def _get(self, session_id, tail):
+        row = self._conn.execute(f"SELECT {_CHAT_COLUMNS} FROM chats WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise ChatNotFoundError(session_id)
+        count = row[5]
+        start = 0 if tail is None else max(count - tail, 0)
+        rows = self._conn.execute(
+            "SELECT role, content, timestamp, seq FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq",
+            (session_id, start),
+        ).fetchall()
+        return self._to_chat(row, [self._to_message(r) for r in rows], min(start, count))
+
+    def _append(self, session_id, messages, start_seq, name):
+        # A no-op UPDATE takes the write lock before the count is read, so a
+        # worker in another process cannot append in between
+        row = self._conn.execute(
+            "UPDATE chats SET message_count = message_count WHERE id = ? RETURNING message_count", (session_id,)
+        ).fetchone()
+        if row is None:
+            raise ChatNotFoundError(session_id)
+        stored = [self._to_message(r) for r in self._conn.execute(
+            "SELECT role, content, timestamp, seq FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (session_id, start_seq, len(messages)),
+        )] if row[0] != start_seq else []
+        start_seq = _append_position(session_id, messages, start_seq, row[0], stored)
+        if start_seq is None:
+            return row[0]
+        self._conn.executemany(
+            "INSERT INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(session_id, start_seq + i, m["role"], m["content"], m.get("timestamp")) for i, m in enumerate(messages)],
+        )
+        count = start_seq + len(messages)
+        if name:
+            self._touch(session_id, "message_count = ?, preview = ?, name = ?", (count, preview(messages), name))
+        else:
+            self._touch(session_id, "message_count = ?, preview = ?", (count, preview(messages)))
+        return count
+
+    def _list(self, user_id):
+        rows = self._conn.execute(
+            f"SELECT {_CHAT_COLUMNS} FROM chats WHERE user_id = ? ORDER BY updated_at DESC", (user_id,)
+        ).fetchall()
+        messages = {row[0]: [] for row in rows}
+        for session_id, *msg in self._conn.execute(
+            "SELECT m.session_id, m.role, m.content, m.timestamp, m.seq FROM messages m"
+            " JOIN chats c ON c.id = m.session_id WHERE c.user_id = ? ORDER BY m.session_id, m.seq",
+            (user_id,),
+        ):
+            messages[session_id].append(self._to_message(msg))
+        return [self._to_chat(row, messages[row[0]], 0) for row in rows]
+
+    @staticmethod
+    def _to_summary(row) -> dict:
+        return {"id": row[0], "name": row[1], "createdAt": row[2], "lastUpdated": row[3],
+                "preview": row[4], "messageCount": row[5]}
+
+    def _summaries(self, user_id, limit, cursor):
+        # Keyset pagination over the (user_id, updated_at) index
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM chats WHERE user_id = ?"
+        args = [user_id]
+        if cursor:
+            updated_at, last_id = _decode_cursor(cursor)
+            sql += " AND (updated_at < ? OR (updated_at = ? AND id < ?))"
+            args += [updated_at, updated_at, last_id]
+        sql += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        rows = self._conn.execute(sql, (*args, limit + 1)).fetchall()
+        next_cursor = _encode_cursor(rows[limit - 1][3], rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._to_summary(r) for r in rows[:limit]], next_cursor
+
+    def _changes(self, user_id, since):
+        chats = [self._to_summary(r) for r in self._conn.execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM chats WHERE user_id = ? AND updated_at > ? ORDER BY updated_at DESC",
+            (user_id, since),
+        )]
+        tombstones = self._conn.execute(
+            "SELECT session_id, deleted_at FROM tombstones WHERE user_id = ? AND deleted_at > ?", (user_id, since)
+        ).fetchall()
+        watermark = max([since] + [c["lastUpdated"] for c in chats] + [t[1] for t in tombstones])
+        return {"chats": chats, "deleted": [t[0] for t in tombstones], "watermark": watermark}
+
+    def _messages(self, session_id, start, end):
+        row = self._conn.execute("SELECT message_count FROM chats WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise ChatNotFoundError(session_id)
+        total = row[0]
+        end = min(total if end is None else end, start + PAGE_SIZE)
+        rows = self._conn.execute(
+            "SELECT role, content, timestamp, seq FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, start, end),
+        ).fetchall()
+        return {"messages": [self._to_message(r) for r in rows], "start": start, "total": total}
+
+    def _clear(self, session_id):
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._touch(session_id, "message_count = 0, preview = '', summary = '', summarized_count = 0", ())
+
+    def _delete(self, session_id):
+        row = self._conn.execute("DELETE FROM chats WHERE id = ? RETURNING user_id", (session_id,)).fetchone()
+        if row is None:
+            raise ChatNotFoundError(session_id)
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._conn.execute("INSERT INTO tombstones (session_id, user_id, deleted_at) VALUES (?, ?, ?)",
+                           (session_id, row[0], _now_ms()))
+        self._conn.execute("DELETE FROM tombstones WHERE deleted_at < ?", (tombstone_horizon(),))
+        self._changed(row[0])
+
+    async def create_chat(self, session_id, user_id, name):
+        return await self._run(self._create, session_id, user_id, name)
+
+    async def get_chat(self, session_id, tail=None):
+        return await self._run(self._get, session_id, tail)
+
+    async def append_messages(self, session_id, user_id, messages, start_seq, name=None):
+        return await self._run(self._append, session_id, messages, start_seq, name)
+
+    async def list_chats(self, user_id):
+        return await self._run(self._list, user_id)
+
+    async def list_chat_summaries(self, user_id, limit, cursor=None):
+        return await self._run(self._summaries, user_id, limit, cursor)
+
+    async def list_changes(self, user_id, since):
+        return await self._run(self._changes, user_id, since)
+
+    async def get_messages(self, session_id, start=0, end=None):
+        return await self._run(self._messages, session_id, start, end)
+
+    async def rename_chat(self, session_id, name):
+        await self._run(self._touch, session_id, "name = ?", (name,))
+
+    async def update_summary(self, session_id, summary, summarized_count):
+        await self._run(self._touch, session_id, "summary = ?, summarized_count = ?", (summary, summarized_count))
+
+    async def clear_chat(self, session_id):
+        await self._run(self._clear, session_id)
+
+    async def delete_chat(self, session_id):
+        await self._run(self._delete, session_id)
+
+    async def close(self):
+        await asyncio.to_thread(self._conn.close)
+
+
+# ── Hot-session cache ─────────────────────────────────────────────
+def _chat_size(chat: dict) -> int:
+    """Approximate resident size of a cached chat in bytes."""
+    return 256 + len(chat["summary"]) + sum(len(m["content"]) + 64 for m in chat["messages"])
+
+
+class CachedChatStore(ChatStore):
+    """
+    Write-through LRU of recently active sessions in front of another store.
+    Each entry holds the chat with its newest messages – as many as the
+    largest tail read for it, and at least SESSION_CACHE_TAIL – so the next
+    turn in the same session starts without a DB read.
+    Every write goes to the inner store first and is then applied to the
+    entry; a failed write evicts it. Bounded by entry count, approximate
+    bytes and TTL.
+    With several workers an entry can miss turns another worker appended.
+    Appends stay correct anyway: the inner store appends after whatever is
+    really stored and reports the resulting count, and on a mismatch the
+    entry is evicted so the next read reloads the chat.
+    """
+
+    def __init__(self, inner: ChatStore, maxsize: int = SESSION_CACHE_SIZE,
+                 max_bytes: int = SESSION_CACHE_MAX_BYTES, ttl: float = SESSION_CACHE_TTL,
+                 tail: int = SESSION_CACHE_TAIL):
+        super().__init__()
+        self.inner = inner
+        self.versions = inner.versions
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.tail = tail
+        self._entries = OrderedDict()   # session_id -> (expires_at, chat, size, window)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── entry bookkeeping ──
+    def _lookup(self, session_id: str):
+        item = self._entries.get(session_id)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            self._evict(session_id)
+            return None
+        self._entries.move_to_end(session_id)
+        return item[1]
+
+    def _put(self, chat: dict, window: int = 0):
+        window = max(window, self._window_of(chat["id"]), self.tail)
+        self._evict(chat["id"])
+        size = _chat_size(chat)
+        self._entries[chat["id"]] = (time.monotonic() + self.ttl, chat, size, window)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.maxsize or self._bytes > self.max_bytes):
+            session_id, (_, _, old_size, _) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+
+    def _evict(self, session_id: str):
+        item = self._entries.pop(session_id, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def _window_of(self, session_id: str) -> int:
+        item = self._entries.get(session_id)
+        return item[3] if item else 0
+
+    @staticmethod
+    def _window(chat: dict, tail) -> dict:
+        messages = chat["messages"]
+        if tail is not None:
+            messages = messages[max(len(messages) - tail, 0):]
+        return {**chat, "messages": list(messages), "baseSeq": chat["messageCount"] - len(messages)}
+
+    async def _write(self, session_id: str, call, update=None):
+        """Write through to the inner store, then patch (or drop) the cached entry."""
+        try:
+            result = await call
+        except Exception:
+            self._evict(session_id)
+            raise
+        chat = self._lookup(session_id)
+        if chat is not None and update is not None:
+            update(chat)
+            self._put(chat)
+        return result
+
+    # ── reads ──
+    async def get_chat(self, session_id, tail=None):
+        chat = self._lookup(session_id)
+        if chat is not None and (chat["baseSeq"] == 0 or (tail is not None and tail <= len(chat["messages"]))):
+            self.hits += 1
+            return self._window(chat, tail)
+        self.misses += 1
+        chat = await self.inner.get_chat(session_id, tail)
+        self._put(self._window(chat, None), tail or 0)
+        return chat
+
+    async def list_chats(self, user_id):
+        return await self.inner.list_chats(user_id)
+
+    async def list_chat_summaries(self, user_id, limit, cursor=None):
+        return await self.inner.list_chat_summaries(user_id, limit, cursor)
+
+    async def list_changes(self, user_id, since):
+        return await self.inner.list_changes(user_id, since)
+
+    async def get_messages(self, session_id, start=0, end=None):
+        return await self.inner.get_messages(session_id, start, end)
+
+    # ── writes ──
+    async def create_chat(self, session_id, user_id, name):
+        chat = await self.inner.create_chat(session_id, user_id, name)
+        self._put(self._window(chat, None))
+        return chat
+
+    async def append_messages(self, session_id, user_id, messages, start_seq, name=None):
+        def update(chat):
+            window = max(len(chat["messages"]), self._window_of(session_id))
+            kept = chat["messages"][:max(start_seq - chat["baseSeq"], 0)] + [dict(m) for m in messages]
+            chat["messages"] = kept[-window:]
+            chat["messageCount"] = start_seq + len(messages)
+            chat["baseSeq"] = chat["messageCount"] - len(chat["messages"])
+            chat["lastUpdated"] = _now_ms()
+            if name:
+                chat["name"] = name
+        if start_seq < self._cached_base(session_id):
+            self._evict(session_id)
+        count = await self._write(session_id, self.inner.append_messages(session_id, user_id, messages, start_seq, name))
+        chat = self._lookup(session_id)
+        if count != start_seq + len(messages):
+            self._evict(session_id)   # another worker appended: reload on the next read
+        elif chat is not None:
+            update(chat)
+            self._put(chat)
+        return count
+
+    def _cached_base(self, session_id: str) -> int:
+        item = self._entries.get(session_id)
+        return item[1]["baseSeq"] if item else 0
+
+    async def rename_chat(self, session_id, name):
+        await self._write(session_id, self.inner.rename_chat(session_id, name),
+                          lambda chat: chat.update(name=name, lastUpdated=_now_ms()))
+
+    async def update_summary(self, session_id, summary, summarized_count):
+        await self._write(session_id, self.inner.update_summary(session_id, summary, summarized_count),
+                          lambda chat: chat.update(summary=summary, summarizedCount=summarized_count))
+
+    async def clear_chat(self, session_id):
+        await self._write(session_id, self.inner.clear_chat(session_id))
+        self._evict(session_id)
+
+    async def delete_chat(self, session_id):
+        await self._write(session_id, self.inner.delete_chat(session_id))
+        self._evict(session_id)
+
+    async def start(self):
+        await self.inner.start()
+
+    async def close(self):
+        await self.inner.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            **self.inner.stats(),
+            "session_cache": {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            },
+        }
+
+
+# ── Write-behind queue ────────────────────────────────────────────
+def _new_op(user_id=None) -> dict:
+    return {"user_id": user_id, "start_seq": 0, "messages": [], "name": None, "summary": None}
+
+def _op_records(session_id: str, op: dict):
+    """Journal records that replay to `op`."""
+    if op["messages"]:
+        yield {"op": "append", "session_id": session_id, "user_id": op["user_id"],
+               "messages": op["messages"], "start_seq": op["start_seq"], "name": op["name"]}
+    if op["summary"]:
+        yield {"op": "summary", "session_id": session_id,
+               "summary": op["summary"][0], "summarized_count": op["summary"][1]}
+
+
+class WriteBehindChatStore(ChatStore):
+    """
+    Queues message appends and summary updates for a background worker so a
+    turn can return as soon as the reply is ready. Pending writes of one
+    session are coalesced: contiguous appends become a single append (with
+    the latest name) and only the newest summary is written. Reads and
+    direct writes of a session flush its queue first, and listings flush
+    the user's sessions, so callers always see their own writes. Failed
+    writes are retried with exponential backoff; close() drains the queue.
+
+    With a journal every queued write is appended to a JSONL file before it
+    is acknowledged, and start() replays the file. Appends are keyed by
+    sequence number, so replaying a write that already landed is harmless;
+    clear/delete/rename leave barrier records so a replay never resurrects
+    cleared messages or an old name. Journal I/O runs on one dedicated
+    thread, which keeps records in submission order without blocking the
+    event loop. The journal is truncated whenever the queue is fully
+    drained, and rewritten as just the queued and in-flight writes once it
+    grows past journal_max_bytes, so it stays bounded under steady load.
+    """
+
+    def __init__(self, inner: ChatStore, journal_path: str = WRITE_BEHIND_JOURNAL,
+                 fsync: bool = WRITE_BEHIND_FSYNC, linger: float = WRITE_BEHIND_LINGER,
+                 concurrency: int = WRITE_BEHIND_CONCURRENCY,
+                 journal_max_bytes: int = WRITE_BEHIND_JOURNAL_MAX_BYTES):
+        super().__init__()
+        self.inner = inner
+        self.versions = inner.versions
+        self.journal_path = journal_path
+        self.fsync = fsync
+        self.linger = linger
+        self.concurrency = concurrency
+        self.journal_max_bytes = journal_max_bytes
+        self._pending = {}                          # session_id -> [op, ...] in write order
+        self._flushing = {}                         # session_id -> ops being written right now
+        self._locks = weakref.WeakValueDictionary()  # session_id -> asyncio.Lock held while flushing
+        self._inflight = 0
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._journal = None
+        self._journal_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-behind-journal")
+        self._journal_bytes = 0
+        self._compacted_bytes = 0
+        self._compacting = False
+        self.compactions = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.dropped = 0
+        self.replayed = 0
+
+    # ── queue ──
+    def _enqueue(self, record: dict):
+        """Fold one journal record into the session's pending ops."""
+        session_id, kind = record["session_id"], record["op"]
+        ops = self._pending.setdefault(session_id, [])
+        last = ops[-1] if ops else None
+        if kind in ("clear", "delete"):
+            ops.clear()
+        elif kind == "rename":
+            for op in ops:
+                op["name"] = None
+        elif kind == "summary":
+            if last is None:
+                last = _new_op()
+                ops.append(last)
+            last["summary"] = (record["summary"], record["summarized_count"])
+        else:
+            start_seq, messages = record["start_seq"], record["messages"]
+            if last is not None and not last["messages"]:
+                last.update(user_id=record["user_id"], start_seq=start_seq, messages=list(messages))
+            elif last is not None and last["start_seq"] <= start_seq <= last["start_seq"] + len(last["messages"]):
+                last["messages"] = last["messages"][:start_seq - last["start_seq"]] + messages
+                self.coalesced += 1
+            else:
+                last = {**_new_op(record["user_id"]), "start_seq": start_seq, "messages": list(messages)}
+                ops.append(last)
+            if record.get("name"):
+                last["name"] = record["name"]
+        if not ops:
+            del self._pending[session_id]
+
+    async def _submit(self, record: dict):
+        # Queued before it is logged, so a compaction in between keeps it
+        self._enqueue(record)
+        await self._log(record)
+        self._wakeup.set()
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def _apply(self, session_id: str, op: dict):
+        if op["messages"]:
+            await self.inner.append_messages(session_id, op["user_id"], op["messages"], op["start_seq"], op["name"])
+        if op["summary"]:
+            await self.inner.update_summary(session_id, *op["summary"])
+        self.writes += 1
+
+    async def _flush(self, session_id: str):
+        """Write the session's pending ops in order; on failure the rest go back on the queue."""
+        async with self._lock(session_id):
+            ops = self._pending.pop(session_id, None)
+            if not ops:
+                return
+            self._inflight += 1
+            self._flushing[session_id] = ops
+            try:
+                while ops:
+                    await self._apply(session_id, ops[0])
+                    ops.pop(0)
+            except ChatNotFoundError:
+                logger.warning(f"Dropping {len(ops)} queued writes for missing chat {session_id}")
+                self.dropped += len(ops)
+            except BaseException:
+                self._pending[session_id] = ops + self._pending.get(session_id, [])
+                raise
+            finally:
+                self._inflight -= 1
+                del self._flushing[session_id]
+
+    async def _flush_user(self, user_id: str):
+        sessions = [sid for sid, ops in self._pending.items() if any(op["user_id"] == user_id for op in ops)]
+        await asyncio.gather(*(self._flush(sid) for sid in sessions))
+
+    async def _flush_all(self) -> bool:
+        """One pass over the queue. Returns False if any session failed."""
+        ok = True
+        sessions = list(self._pending)
+        for i in range(0, len(sessions), self.concurrency):
+            batch = sessions[i:i + self.concurrency]
+            results = await asyncio.gather(*(self._flush(sid) for sid in batch), return_exceptions=True)
+            for session_id, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    ok = False
+                    logger.warning(f"Write-behind flush failed for {session_id}: {str(result)}")
+        if ok and not self._pending and not self._inflight and self._journal is not None:
+            self._journal_bytes = self._compacted_bytes = await self._journal_call(self._truncate_journal)
+        return ok
+
+    async def _work(self):
+        delay = WRITE_BEHIND_RETRY_DELAY
+        while True:
+            await self._wakeup.wait()
+            # Let a burst of writes accumulate so they coalesce
+            await asyncio.sleep(self.linger)
+            self._wakeup.clear()
+            if await self._flush_all():
+                delay = WRITE_BEHIND_RETRY_DELAY
+            else:
+                self.retries += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WRITE_BEHIND_MAX_DELAY)
+                self._wakeup.set()
+
+    # ── journal ──
+    async def _journal_call(self, fn, *args):
+        # Calls are queued to the journal thread synchronously, so they run in
+        # the order the event loop issued them
+        return await asyncio.get_running_loop().run_in_executor(self._journal_io, fn, *args)
+
+    async def _log(self, record: dict):
+        if self._journal is None:
+            return
+        self._journal_bytes = await self._journal_call(self._write_journal, json.dumps(record, ensure_ascii=False) + "\n")
+        if self._journal_bytes > max(self.journal_max_bytes, 2 * self._compacted_bytes) and not self._compacting:
+            await self._compact_journal()
+
+    async def _compact_journal(self):
+        """Rewrite the journal as the writes still queued or in flight."""
+        self._compacting = True
+        try:
+            lines = [json.dumps(record, ensure_ascii=False) + "\n"
+                     for queue in (self._flushing, self._pending)
+                     for session_id, ops in list(queue.items())
+                     for op in ops
+                     for record in _op_records(session_id, op)]
+            self._journal_bytes = self._compacted_bytes = await self._journal_call(self._rewrite_journal, lines)
+            self.compactions += 1
+        finally:
+            self._compacting = False
+
+    def _write_journal(self, line: str) -> int:
+        self._journal.write(line)
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        return self._journal.tell()
+
+    def _rewrite_journal(self, lines: list) -> int:
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal.tell()
+
+    def _truncate_journal(self) -> int:
+        if self._journal.tell():
+            self._journal.truncate(0)
+        return 0
+
+    def _close_journal(self):
+        self._journal.close()
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._enqueue(json.loads(line))
+                except (ValueError, KeyError):
+                    # A torn last line from a crash mid-write
+                    logger.warning(f"Skipping unreadable journal line in {self.journal_path}")
+                    continue
+                self.replayed += 1
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} queued sessions from {self.journal_path}")
+
+    # ── lifecycle ──
+    async def start(self):
+        await self.inner.start()
+        if self.journal_path:
+            self._replay()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal_bytes = self._journal.tell()
+        self._worker = asyncio.create_task(self._work())
+        if self._pending:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.wait_for(self._drain(), WRITE_BEHIND_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"{len(self._pending)} sessions still queued at shutdown"
+                         + (f"; they stay in {self.journal_path}" if self._journal else " and are lost"))
+        if self._journal is not None:
+            await self._journal_call(self._close_journal)
+        self._journal_io.shutdown()
+        await self.inner.close()
+
+    async def _drain(self):
+        delay = WRITE_BEHIND_RETRY_DELAY
+        while not await self._flush_all():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WRITE_BEHIND_MAX_DELAY)
+
+    # ── reads (flush first, so they see queued writes) ──
+    async def get_chat(self, session_id, tail=None):
+        await self._flush(session_id)
+        return await self.inner.get_chat(session_id, tail)
+
+    async def get_messages(self, session_id, start=0, end=None):
+        await self._flush(session_id)
+        return await self.inner.get_messages(session_id, start, end)
+
+    async def list_chats(self, user_id):
+        await self._flush_user(user_id)
+        return await self.inner.list_chats(user_id)
+
+    async def list_chat_summaries(self, user_id, limit, cursor=None):
+        await self._flush_user(user_id)
+        return await self.inner.list_chat_summaries(user_id, limit, cursor)
+
+    async def list_changes(self, user_id, since):
+        await self._flush_user(user_id)
+        return await self.inner.list_changes(user_id, since)
+
+    # ── writes ──
+    async def create_chat(self, session_id, user_id, name):
+        # Synchronous: the chat must exist before anything is queued for it
+        return await self.inner.create_chat(session_id, user_id, name)
+
+    async def append_messages(self, session_id, user_id, messages, start_seq, name=None):
+        await self._submit({"op": "append", "session_id": session_id, "user_id": user_id,
+                            "messages": messages, "start_seq": start_seq, "name": name})
+        self._changed(user_id)
+        return start_seq + len(messages)
+
+    async def update_summary(self, session_id, summary, summarized_count):
+        await self._submit({"op": "summary", "session_id": session_id,
+                            "summary": summary, "summarized_count": summarized_count})
+
+    async def rename_chat(self, session_id, name):
+        await self._flush(session_id)
+        await self._log({"op": "rename", "session_id": session_id})
+        await self.inner.rename_chat(session_id, name)
+
+    async def clear_chat(self, session_id):
+        await self._drop(session_id, "clear")
+        await self.inner.clear_chat(session_id)
+
+    async def delete_chat(self, session_id):
+        await self._drop(session_id, "delete")
+        await self.inner.delete_chat(session_id)
+
+    async def _drop(self, session_id: str, kind: str):
+        """Queued writes of a chat about to be cleared or deleted are moot."""
+        async with self._lock(session_id):
+            self.dropped += len(self._pending.pop(session_id, []))
+            await self._log({"op": kind, "session_id": session_id})
+
+    def stats(self) -> dict:
+        return {
+            **self.inner.stats(),
+            "write_behind": {
+                "queued_sessions": len(self._pending),
+                "queued_messages": sum(len(op["messages"]) for ops in self._pending.values() for op in ops),
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "replayed": self.replayed,
+                "journal": self.journal_path or None,
+                "journal_bytes": self._journal_bytes,
+                "journal_compactions": self.compactions,
+            },
+        }
+
+
+def make_chat_store(kind: str = CHAT_STORE, db=None) -> ChatStore:
+    """
+    Build a chat store by name: 'appwrite' or 'sqlite', behind the optional
+    write-behind queue and the session cache unless disabled.
+    """
+    if kind == "sqlite":
+        store = SQLiteChatStore(CHAT_DB_PATH)
+    else:
+        store = AppwriteChatStore(db or make_appwrite_databases())
+    if WRITE_BEHIND:
+        store = WriteBehindChatStore(store)
+    return CachedChatStore(store) if SESSION_CACHE_SIZE > 0 else store
@@ -0,0 +1,188 @@
+"""
+Shared async HTTP layer for every outbound provider (SerpAPI, Tavily,
+OpenWeatherMap, Sarvam). One pooled keep-alive client per provider host,
+uniform timeouts, jittered retries and a per-provider circuit breaker.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Base URL and read timeout per provider
+PROVIDERS = {
+    "serpapi":        {"base_url": os.getenv("SERPAPI_BASE_URL", "https://serpapi.com"), "timeout": HTTP_TIMEOUT},
+    "tavily":         {"base_url": os.getenv("TAVILY_BASE_URL", "https://api.tavily.com"), "timeout": HTTP_TIMEOUT},
+    "openweathermap": {"base_url": os.getenv("OPENWEATHERMAP_BASE_URL", "https://api.openweathermap.org"), "timeout": 10.0},
+    "sarvam":         {"base_url": os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai"), "timeout": 60.0},
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is open and calls are short-circuited."""
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures, lets one probe through after a cool-down.
+    While the probe is in flight every other call is still short-circuited;
+    its outcome closes the breaker or re-opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            if self.probing:
+                return False
+            self.probing = True
+        return state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def abandon(self):
+        """A call ended without an outcome (cancelled); let the next call probe."""
+        self.probing = False
+
+
+_clients = {}
+_breakers = {name: CircuitBreaker() for name in PROVIDERS}
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """Return the pooled client for a provider, creating it on first use."""
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        cfg = PROVIDERS[provider]
+        client = httpx.AsyncClient(
+            base_url=cfg["base_url"],
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(cfg["timeout"], connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+        _clients[provider] = client
+    return client
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, HTTP_BACKOFF_BASE * (2 ** attempt))
+
+
+async def request(provider: str, method: str, url: str, *, max_retries=None, **kwargs) -> httpx.Response:
+    """
+    Send a request through the provider's pooled client. Transport errors and
+    retryable status codes are retried with jittered backoff; exhausting the
+    retries (a 5xx or a 429 that never cleared) counts as one failure for the
+    provider's circuit breaker.
+    """
+    breaker = _breakers[provider]
+    if not breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit is open; skipping call")
+
+    retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+    client = get_client(provider)
+
+    try:
+        for attempt in range(retries + 1):
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt < retries:
+                    logger.warning(f"{provider}: {type(e).__name__} on attempt {attempt + 1}, retrying")
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                breaker.record_failure()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                logger.warning(f"{provider}: HTTP {response.status_code} on attempt {attempt + 1}, retrying")
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
+    except asyncio.CancelledError:
+        breaker.abandon()
+        raise
+
+
+async def get_json(provider: str, url: str, **kwargs) -> dict:
+    """GET a JSON document, raising httpx.HTTPStatusError on non-2xx responses."""
+    response = await request(provider, "GET", url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def post_json(provider: str, url: str, **kwargs) -> dict:
+    """POST and decode a JSON response, raising httpx.HTTPStatusError on non-2xx responses."""
+    response = await request(provider, "POST", url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+def stats() -> dict:
+    """Breaker state per provider, for diagnostics."""
+    return {
+        name: {"state": breaker.state, "consecutive_failures": breaker.failures}
+        for name, breaker in _breakers.items()
+    }
+
+
+async def aclose():
+    """Close all pooled clients (called on application shutdown)."""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
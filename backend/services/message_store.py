@@ -0,0 +1,158 @@
+"""
+Append-only message records for Appwrite.
+
+With CHAT_STORAGE_MODE=records every message is its own document in the
+messages collection, keyed by (sessionId, seq). A turn appends two small
+documents instead of re-uploading the whole conversation, and the chat
+document only carries a `messageCount`. Legacy chats that still hold a
+`messages` JSON blob are migrated the first time they are touched.
+
+Record ids are derived from (sessionId, seq), so re-running an interrupted
+append or migration never creates duplicates, and two workers can never
+both write the same sequence number: the second gets SequenceTakenError.
+The records themselves are the source of truth for the next sequence
+number; `messageCount` on the chat document may lag behind if a turn
+failed half-way.
+"""
+import os
+import json
+import hashlib
+import logging
+from appwrite.query import Query
+from appwrite.exception import AppwriteException
+from appwrite.permission import Permission
+from appwrite.role import Role
+
+logger = logging.getLogger(__name__)
+
+CHAT_STORAGE_MODE = os.getenv("CHAT_STORAGE_MODE", "blob").lower()   # "blob" (legacy) or "records"
+APPWRITE_MESSAGES_COLLECTION_ID = os.getenv("APPWRITE_MESSAGES_COLLECTION_ID")
+PAGE_SIZE = 100
+PREVIEW_CHARS = 120
+
+def preview(messages: list) -> str:
+    """Sidebar preview: the start of the last message."""
+    return messages[-1]["content"][:PREVIEW_CHARS] if messages else ""
+
+def record_id(session_id: str, seq: int) -> str:
+    """Deterministic document id (Appwrite ids are limited to 36 chars)."""
+    return f"m{hashlib.sha1(session_id.encode()).hexdigest()[:24]}_{seq}"
+
+def _to_message(doc: dict) -> dict:
+    return {"role": doc["role"], "content": doc["content"], "timestamp": doc.get("timestamp"), "seq": doc["seq"]}
+
+def same_message(stored: dict, msg: dict) -> bool:
+    """Whether a stored message is `msg` (so re-writing it is a retry, not a new message)."""
+    return all(stored.get(k) == msg.get(k) for k in ("role", "content", "timestamp"))
+
+
+class SequenceTakenError(Exception):
+    """The record at `seq` already holds a different message (another writer got there first)."""
+
+    def __init__(self, session_id: str, seq: int):
+        super().__init__(f"Sequence {seq} of {session_id} is already taken")
+        self.seq = seq
+
+
+class AppwriteMessageStore:
+    """One document per message; appends and tail reads cost O(1) round-trips."""
+
+    def __init__(self, db, database_id: str, collection_id: str):
+        self.db = db
+        self.database_id = database_id
+        self.collection_id = collection_id
+
+    def append(self, session_id: str, user_id: str, messages: list, start_seq: int):
+        """
+        Write `messages` as records start_seq, start_seq+1, ... Raises
+        SequenceTakenError at the first sequence number that already holds
+        a different message; records identical to ours are skipped.
+        """
+        permissions = [Permission.read(Role.user(user_id))]
+        for offset, msg in enumerate(messages):
+            seq = start_seq + offset
+            data = {
+                "sessionId": session_id,
+                "seq": seq,
+                "role": msg["role"],
+                "content": msg["content"],
+                "timestamp": msg.get("timestamp"),
+            }
+            try:
+                self.db.create_document(self.database_id, self.collection_id,
+                                        record_id(session_id, seq), data, permissions)
+            except AppwriteException as e:
+                if e.code != 409:
+                    raise
+                existing = self.db.get_document(self.database_id, self.collection_id, record_id(session_id, seq))
+                if not same_message(existing, msg):   # else already written by an earlier attempt
+                    raise SequenceTakenError(session_id, seq) from e
+
+    def tail(self, session_id: str, limit: int) -> list:
+        """The newest `limit` messages, oldest first."""
+        if limit <= 0:
+            return []
+        response = self.db.list_documents(self.database_id, self.collection_id, queries=[
+            Query.equal("sessionId", session_id),
+            Query.order_desc("seq"),
+            Query.limit(limit),
+        ])
+        return [_to_message(doc) for doc in reversed(response["documents"])]
+
+    def range(self, session_id: str, start: int, end: int) -> list:
+        """Messages with start <= seq < end, oldest first (at most PAGE_SIZE)."""
+        if end <= start:
+            return []
+        response = self.db.list_documents(self.database_id, self.collection_id, queries=[
+            Query.equal("sessionId", session_id),
+            Query.greater_than_equal("seq", start),
+            Query.less_than("seq", end),
+            Query.order_asc("seq"),
+            Query.limit(min(end - start, PAGE_SIZE)),
+        ])
+        return [_to_message(doc) for doc in response["documents"]]
+
+    def _pages(self, session_id: str):
+        cursor = None
+        while True:
+            queries = [Query.equal("sessionId", session_id), Query.order_asc("seq"), Query.limit(PAGE_SIZE)]
+            if cursor:
+                queries.append(Query.cursor_after(cursor))
+            documents = self.db.list_documents(self.database_id, self.collection_id, queries=queries)["documents"]
+            if not documents:
+                return
+            yield documents
+            if len(documents) < PAGE_SIZE:
+                return
+            cursor = documents[-1]["$id"]
+
+    def all(self, session_id: str) -> list:
+        """Every message of the session in order."""
+        return [_to_message(doc) for page in self._pages(session_id) for doc in page]
+
+    def delete_all(self, session_id: str):
+        """Remove every record of the session."""
+        while True:
+            documents = self.db.list_documents(self.database_id, self.collection_id, queries=[
+                Query.equal("sessionId", session_id), Query.limit(PAGE_SIZE),
+            ])["documents"]
+            for doc in documents:
+                self.db.delete_document(self.database_id, self.collection_id, doc["$id"])
+            if len(documents) < PAGE_SIZE:
+                return
+
+    def migrate_legacy(self, doc: dict, chats_collection_id: str) -> int:
+        """
+        Move a chat's legacy `messages` blob into records and empty the blob.
+        Returns the chat's message count after migration.
+        """
+        legacy = json.loads(doc.get("messages") or "[]")
+        count = doc.get("messageCount") or 0
+        if not legacy:
+            return count
+        logger.info(f"Migrating {len(legacy)} messages of {doc['$id']} to records")
+        self.append(doc["$id"], doc["userId"], legacy, start_seq=count)
+        count += len(legacy)
+        self.db.update_document(self.database_id, chats_collection_id, doc["$id"],
+                                {"messages": "[]", "messageCount": count, "preview": preview(legacy)})
+        return count
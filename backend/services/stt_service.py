@@ -1,69 +1,86 @@
 import os
-import requests
-import tempfile
-import logging
 import time
-import gc
+import httpx
+import asyncio
+import logging
+from collections import Counter
 from fastapi import HTTPException
 
+from services import http_client
+from services.audio_utils import (
+    FFMPEG, SPEECH_RATE, decode_audio, encode_speech, normalize_speech, split_on_silence, to_mono,
+)
+
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
-SARVAM_STT_ENDPOINT = "https://api.sarvam.ai/speech-to-text"
+SARVAM_STT_PATH = "/speech-to-text"
+
+# Long recordings are cut at silences and transcribed segment by segment, concurrently
+STT_LONG_AUDIO = os.getenv("STT_LONG_AUDIO", "true").lower() == "true"
+STT_MIN_SEGMENT_SECONDS = float(os.getenv("STT_MIN_SEGMENT_SECONDS", "10"))
+STT_MAX_SEGMENT_SECONDS = float(os.getenv("STT_MAX_SEGMENT_SECONDS", "29"))   # Saarika's synchronous limit is 30 s
+STT_SEGMENT_CONCURRENCY = int(os.getenv("STT_SEGMENT_CONCURRENCY", "16"))
+# Uploads are reduced to mono, <=16 kHz, silence-trimmed audio before they are sent.
+# FLAC keeps it lossless; "opus" is far smaller but lossy. Both need ffmpeg.
+STT_NORMALIZE = os.getenv("STT_NORMALIZE", "true").lower() == "true"
+STT_UPLOAD_CODEC = os.getenv("STT_UPLOAD_CODEC", "flac").lower()
+# Uploads that decode to more audio than this are sent as-is rather than held as floats
+STT_MAX_DECODED_SECONDS = float(os.getenv("STT_MAX_DECODED_SECONDS", "1200"))
+
+upload_stats = {"uploads": 0, "normalized": 0, "bytes_received": 0, "bytes_sent": 0,
+                "seconds_trimmed": 0.0, "provider_calls": 0, "provider_seconds": 0.0}
 
-async def transcribe_audio(audio_file, language_code="unknown") -> dict:
+async def transcribe_audio(audio_file, filename: str = "audio.wav", content_type: str = "audio/wav",
+                           language_code="unknown") -> dict:
     """
     Transcribe audio using Sarvam AI's Saarika v2.5 model.
     Uses automatic language detection by default for Odia/English/Hindi speakers.
+    `audio_file` is a binary file object (e.g. the upload's spooled file) or
+    bytes; file objects are streamed to Sarvam in chunks, never copied whole.
     """
     if not SARVAM_API_KEY:
         logger.error("Sarvam API key not configured")
         raise HTTPException(status_code=500, detail="Sarvam API key not configured")
 
-    temp_file_path = None
-    
     try:
         logger.debug(f"Starting transcription with language_code: {language_code}")
-        
-        # Create temporary file with better handling
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            audio_content = audio_file.read()
-            temp_file.write(audio_content)
-            temp_file.flush()
-            temp_file_path = temp_file.name
-            
-        logger.debug(f"Created temporary file: {temp_file_path}")
-        
+
         # Prepare the request headers
         headers = {
             "api-subscription-key": SARVAM_API_KEY
         }
-        
-        # Create form data
-        with open(temp_file_path, 'rb') as f:
-            files = {
-                'file': ('audio.wav', f, 'audio/wav')
-            }
 
-            data = {
-                'model': 'saarika:v2.5',
-                'language_code': language_code
-            }
-            
-            logger.debug(f"Request headers: {headers}")
-            logger.debug(f"Request data: {data}")
-            logger.debug(f"API endpoint: {SARVAM_STT_ENDPOINT}")
-
-            # Make the API request
-            response = requests.post(
-                SARVAM_STT_ENDPOINT,
-                headers=headers,
-                files=files,
-                data=data,
-                timeout=60
-            )
+        # httpx rewinds file objects before each attempt, so retries resend the whole clip
+        files = {
+            'file': (filename, audio_file, content_type)
+        }
+
+        data = {
+            'model': 'saarika:v2.5',
+            'language_code': language_code
+        }
+
+        logger.debug(f"Request data: {data}")
+        logger.debug(f"API endpoint: {SARVAM_STT_PATH}")
+
+        if isinstance(audio_file, (bytes, bytearray)):
+            upload_stats["bytes_sent"] += len(audio_file)
+        else:
+            upload_stats["bytes_sent"] += audio_file.seek(0, os.SEEK_END)
+
+        # Make the API request through the shared pooled client
+        started = time.perf_counter()
+        response = await http_client.request(
+            "sarvam", "POST", SARVAM_STT_PATH,
+            headers=headers,
+            files=files,
+            data=data
+        )
+        upload_stats["provider_calls"] += 1
+        upload_stats["provider_seconds"] += time.perf_counter() - started
         
         logger.debug(f"Response status code: {response.status_code}")
         
@@ -91,33 +108,122 @@ async def transcribe_audio(audio_file, language_code="unknown") -> dict:
                 detail=f"Sarvam API error: Status {response.status_code}, Response: {response.text}"
             )
 
-    except requests.exceptions.Timeout:
+    except HTTPException:
+        raise
+    except http_client.CircuitOpenError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=503, detail="Speech recognition temporarily unavailable")
+    except httpx.TimeoutException:
         logger.error("Request timeout occurred")
         raise HTTPException(status_code=408, detail="Speech recognition timeout")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Network error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Network error: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"STT error: {str(e)}")
-    finally:
-        # Enhanced cleanup for Windows
-        if temp_file_path and os.path.exists(temp_file_path):
+
+def _read_all(audio_file) -> bytes:
+    audio_file.seek(0)
+    return audio_file.read()
+
+async def transcribe_upload(audio_file, filename: str, content_type: str, size: int,
+                            language_code="unknown") -> dict:
+    """
+    Entry point for /speech-to-text. Decodable uploads are normalized
+    (mono, <=16 kHz, trimmed) and re-encoded with STT_UPLOAD_CODEC unless the
+    original is already smaller; recordings longer than one segment go to
+    transcribe_segments. With ffmpeg the downmix and resampling happen while
+    decoding. Anything that cannot be decoded (or re-encoded) here, or would
+    decode to more than STT_MAX_DECODED_SECONDS, is sent to Sarvam unchanged.
+    """
+    upload_stats["uploads"] += 1
+    upload_stats["bytes_received"] += size
+    if not (STT_NORMALIZE or STT_LONG_AUDIO) or not (FFMPEG or filename.lower().endswith(".wav")):
+        return await transcribe_audio(audio_file, filename, content_type, language_code)
+
+    data = await asyncio.to_thread(_read_all, audio_file)
+    try:
+        samples, sample_rate = await decode_audio(data, channels=1, sample_rate=SPEECH_RATE,
+                                                  max_bytes=int(STT_MAX_DECODED_SECONDS * SPEECH_RATE * 4))
+    except ValueError as e:
+        logger.info(f"Could not decode {filename}, sending it as-is: {str(e)}")
+        return await transcribe_audio(data, filename, content_type, language_code)
+
+    offset, trimmed = 0.0, 0.0
+    if STT_NORMALIZE:
+        duration = len(samples) / sample_rate
+        samples, sample_rate, offset = await asyncio.to_thread(normalize_speech, samples, sample_rate)
+        trimmed = duration - len(samples) / sample_rate
+
+    if STT_LONG_AUDIO and len(samples) > STT_MAX_SEGMENT_SECONDS * sample_rate:
+        _count_normalized(trimmed)
+        return await transcribe_segments(samples, sample_rate, language_code, offset)
+    if not STT_NORMALIZE:
+        return await transcribe_audio(data, filename, content_type, language_code)
+
+    try:
+        audio, extension, audio_type = await encode_speech(samples, sample_rate, STT_UPLOAD_CODEC)
+    except ValueError as e:
+        logger.warning(f"Could not encode {filename} as {STT_UPLOAD_CODEC}, sending it as-is: {str(e)}")
+        return await transcribe_audio(data, filename, content_type, language_code)
+    if len(audio) >= len(data):
+        # e.g. a short Opus/WebM note: the browser's encoding is already the compact one
+        return await transcribe_audio(data, filename, content_type, language_code)
+    _count_normalized(trimmed)
+    return await transcribe_audio(audio, "audio" + extension, audio_type, language_code)
+
+def _count_normalized(trimmed: float):
+    if STT_NORMALIZE:
+        upload_stats["normalized"] += 1
+        upload_stats["seconds_trimmed"] += trimmed
+
+async def transcribe_segments(samples, sample_rate: int, language_code="unknown", offset: float = 0.0) -> dict:
+    """
+    Transcribe a long recording (float samples, mono or shaped (frames,
+    channels)) as silence-delimited segments, at most STT_SEGMENT_CONCURRENCY
+    at a time, and stitch the transcripts back in order. Each segment
+    reports its own detected language and its position in the upload
+    (`offset` being the seconds trimmed from its start); the overall
+    language is the one covering the most audio.
+    """
+    ranges = split_on_silence(to_mono(samples), sample_rate,
+                              STT_MIN_SEGMENT_SECONDS, STT_MAX_SEGMENT_SECONDS)
+    logger.info(f"Transcribing {len(samples) / sample_rate:.1f}s of audio as {len(ranges)} segments")
+    semaphore = asyncio.Semaphore(STT_SEGMENT_CONCURRENCY)
+
+    async def transcribe_range(index: int, start: int, end: int) -> dict:
+        async with semaphore:
             try:
-                # Force garbage collection to release file handles
-                gc.collect()
-                time.sleep(0.1)  # Brief pause
-                os.unlink(temp_file_path)
-                logger.debug(f"Successfully cleaned up temporary file: {temp_file_path}")
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to cleanup temp file: {cleanup_error}")
-                # Try again after a longer pause
-                try:
-                    time.sleep(0.5)
-                    os.unlink(temp_file_path)
-                    logger.debug(f"Successfully cleaned up temporary file on retry: {temp_file_path}")
-                except Exception as final_cleanup_error:
-                    logger.warning(f"Final cleanup attempt failed: {final_cleanup_error}")
+                audio, extension, audio_type = await encode_speech(samples[start:end], sample_rate, STT_UPLOAD_CODEC)
+            except ValueError as e:
+                logger.warning(f"Could not encode segment {index} as {STT_UPLOAD_CODEC}, sending WAV: {str(e)}")
+                audio, extension, audio_type = await encode_speech(samples[start:end], sample_rate, "wav")
+            result = await transcribe_audio(audio, f"segment-{index}{extension}", audio_type, language_code)
+        return {
+            "start": round(offset + start / sample_rate, 2),
+            "end": round(offset + end / sample_rate, 2),
+            "transcript": result["transcript"].strip(),
+            "language": result["detected_language"],
+        }
+
+    segments = await asyncio.gather(*(transcribe_range(i, start, end) for i, (start, end) in enumerate(ranges)))
+
+    spoken = Counter()
+    for segment in segments:
+        spoken[segment["language"]] += segment["end"] - segment["start"]
+    return {
+        "success": True,
+        "transcript": " ".join(segment["transcript"] for segment in segments if segment["transcript"]),
+        "detected_language": spoken.most_common(1)[0][0] if spoken else "unknown",
+        "request_id": "",
+        "segments": segments,
+    }
+
+def stats() -> dict:
+    """Upload size and provider time counters; bytes_saved is what normalization kept off the wire."""
+    return {**upload_stats, "bytes_saved": upload_stats["bytes_received"] - upload_stats["bytes_sent"],
+            "codec": STT_UPLOAD_CODEC if FFMPEG else "wav"}
 
 def is_supported_audio_format(filename: str) -> bool:
     """Check if the audio format is supported"""
@@ -0,0 +1,71 @@
+"""
+Query translation for the search tools.
+
+Script detection is done offline from a precomputed code-point table, so
+Latin-script queries (English, romanized Odia, Hinglish) never leave the
+process. Odia/Devanagari/other-script queries are translated once and
+memoized in a bounded LRU; concurrent requests for the same text share a
+single googletrans round-trip.
+"""
+import os
+from googletrans import Translator           # pip install googletrans==4.0.0-rc1
+
+from services.cache import CoalescingCache, MemoryCache
+
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(24 * 3600)))
+
+translator = Translator()
+translation_cache = CoalescingCache(MemoryCache(maxsize=TRANSLATION_CACHE_SIZE,
+                                                default_ttl=TRANSLATION_CACHE_TTL))
+
+# ── Script table ──────────────────────────────────────────────────
+NEUTRAL, LATIN, DEVANAGARI, ODIA, OTHER = range(5)
+
+def _build_script_table() -> bytearray:
+    table = bytearray(0x0B80)          # NEUTRAL for digits, punctuation, spaces
+    for lo, hi in ((0x41, 0x5A), (0x61, 0x7A), (0xC0, 0x24F)):
+        table[lo:hi + 1] = bytes([LATIN]) * (hi - lo + 1)
+    for x in (0xD7, 0xF7):             # × ÷ sit inside the Latin-1 letter block
+        table[x] = NEUTRAL
+    table[0x0900:0x0980] = bytes([DEVANAGARI]) * 0x80
+    table[0x0964] = table[0x0965] = NEUTRAL   # danda / double danda are shared punctuation
+    table[0x0B00:0x0B80] = bytes([ODIA]) * 0x80
+    for cp in range(0x250, 0x0B80):
+        if table[cp] == NEUTRAL and chr(cp).isalpha():
+            table[cp] = OTHER
+    return table
+
+_SCRIPT_TABLE = _build_script_table()
+_TABLE_SIZE = len(_SCRIPT_TABLE)
+
+def needs_translation(text: str) -> bool:
+    """True when the text contains any non-Latin letters."""
+    for ch in text:
+        cp = ord(ch)
+        cls = _SCRIPT_TABLE[cp] if cp < _TABLE_SIZE else (OTHER if ch.isalpha() else NEUTRAL)
+        if cls > LATIN:
+            return True
+    return False
+
+# ── Translation ───────────────────────────────────────────────────
+skipped = 0
+upstream_calls = 0
+
+async def _translate(text: str) -> str:
+    global upstream_calls
+    upstream_calls += 1
+    result = await translator.translate(text, dest="en")
+    return result.text
+
+async def to_english(text: str) -> str:
+    """Translate to English unless the text is already Latin script."""
+    global skipped
+    text = text.strip()
+    if not needs_translation(text):
+        skipped += 1
+        return text
+    return await translation_cache.get_or_load(text, lambda: _translate(text))
+
+def stats() -> dict:
+    return {"skipped": skipped, "upstream_calls": upstream_calls, **translation_cache.stats()}
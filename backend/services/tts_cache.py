@@ -0,0 +1,188 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Audio is keyed by a hash of everything that determines the waveform
+(normalized text, model, language, sample rate, speaker), so a replayed
+message or a stock greeting is synthesized once for all users.
+
+  • memory tier – LRU of small clips, bounded by total bytes
+  • disk tier   – one WAV file per key under TTS_CACHE_DIR, LRU-evicted by
+                  total size; recency survives restarts via file mtimes
+
+Disk hits are read back before they are returned (and small ones promoted
+to the memory tier), so evicting a file never breaks a response that is
+still being sent. Concurrent misses for the same key share one synthesis
+call (via CoalescingCache, so a caller that disconnects never cancels the
+synthesis others are waiting on).
+"""
+import os
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+from services.cache import CoalescingCache, MemoryCache
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))   # 0 disables the disk tier
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_MEMORY_ITEM_BYTES = int(os.getenv("TTS_CACHE_MEMORY_ITEM_BYTES", str(512 * 1024)))  # larger clips stay on disk
+
+SUFFIX = ".wav"
+
+def cache_key(*parts) -> str:
+    """Hex digest of the synthesis parameters; callers normalize the text first."""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """Two-tier (memory + disk) LRU of audio clips keyed by content hash."""
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_disk_bytes: int = TTS_CACHE_DISK_BYTES,
+                 max_memory_bytes: int = TTS_CACHE_MEMORY_BYTES, max_memory_item: int = TTS_CACHE_MEMORY_ITEM_BYTES):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_memory_item = max_memory_item
+        self._memory = OrderedDict()   # key -> audio bytes
+        self._memory_bytes = 0
+        self._disk = OrderedDict()     # key -> file size, oldest first
+        self._disk_bytes = 0
+        # Nothing is stored behind it: it only merges concurrent syntheses of a key,
+        # the two tiers here do the caching
+        self._loads = CoalescingCache(MemoryCache(maxsize=0))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.bytes_from_cache = 0
+        self.bytes_synthesized = 0
+        if self.max_disk_bytes > 0:
+            self._load_index()
+
+    def _load_index(self):
+        """Rebuild the disk LRU from the files left by earlier runs."""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-len(SUFFIX)], stat.st_size))
+                elif entry.name.endswith(".tmp"):
+                    os.remove(entry.path)   # torn write from a crash
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    # ── memory tier ──
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_item or key in self._memory:
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    # ── disk tier ──
+    def _write(self, key: str, audio: bytes):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, self._path(key))
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _forget(self, key: str):
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)
+
+    def _trim_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    async def _store(self, key: str, audio: bytes):
+        if self.max_disk_bytes <= 0 or len(audio) > self.max_disk_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, audio)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry {key}: {str(e)}")
+            return
+        self._disk[key] = len(audio)
+        self._disk_bytes += len(audio)
+        self._trim_disk()
+
+    def _touch(self, key: str):
+        self._disk.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Removed behind our back; forget it
+            self._forget(key)
+            return False
+        return True
+
+    # ── lookup ──
+    async def get_or_synthesize(self, key: str, synthesize) -> bytes:
+        """
+        The audio for `key`, from memory, from disk or from one synthesis
+        call shared by concurrent misses. A disk entry evicted before it
+        could be read is synthesized again.
+        """
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.bytes_from_cache += len(audio)
+            return audio
+        if key in self._disk and self._touch(key):
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self.disk_hits += 1
+                self.bytes_from_cache += len(audio)
+                self._remember(key, audio)
+                return audio
+            self._forget(key)
+
+        return await self._loads.get_or_load(key, lambda: self._synthesize(key, synthesize))
+
+    async def _synthesize(self, key: str, synthesize) -> bytes:
+        audio = await synthesize()
+        self.bytes_synthesized += len(audio)
+        self._remember(key, audio)
+        await self._store(key, audio)
+        return audio
+
+    def stats(self) -> dict:
+        misses = self._loads.misses
+        lookups = self.memory_hits + self.disk_hits + misses + self._loads.coalesced
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": misses,
+            "coalesced": self._loads.coalesced,
+            "errors": self._loads.errors,
+            "hit_rate": round((lookups - misses) / lookups, 4) if lookups else 0.0,
+            "bytes_from_cache": self.bytes_from_cache,
+            "bytes_synthesized": self.bytes_synthesized,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
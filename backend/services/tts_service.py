@@ -1,7 +1,13 @@
 import os
+import re
 import base64
+import asyncio
+import unicodedata
 from sarvamai import SarvamAI
 
+from services.tts_cache import SpeechCache, cache_key
+from services.audio_utils import parse_wav, wav_header
+
 # --- Corrected Code ---
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
@@ -14,6 +20,22 @@ else:
     # The correct parameter name is 'api_subscription_key', not 'api_key'
     client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
 
+# Everything that changes the waveform is part of the cache key
+TTS_MODEL = "bulbul:v2"
+TTS_LANGUAGE = os.getenv("SARVAM_TTS_LANG_CODE", "od-IN")
+TTS_SAMPLE_RATE = 24000
+TTS_SPEAKER = os.getenv("SARVAM_TTS_SPEAKER")   # None = provider default
+
+# Streaming synthesis: text is cut at sentence ends and chunks are synthesized concurrently
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "300"))
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "4"))
+
+speech_cache = SpeechCache()
+
+def normalize_text(text: str) -> str:
+    """NFC with collapsed whitespace, so trivially different copies share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
 async def generate_odia_speech(text: str) -> bytes:
     """
     Generates Odia speech from text using Sarvam AI's Bulbul TTS model.
@@ -24,12 +46,16 @@ async def generate_odia_speech(text: str) -> bytes:
 
     try:
         # The API call now includes the required 'model' and correct language code 'or-IN'
-        response = client.text_to_speech.convert(
-            model="bulbul:v2",
+        options = {"speaker": TTS_SPEAKER} if TTS_SPEAKER else {}
+        # The SDK client is synchronous; keep it off the event loop
+        response = await asyncio.to_thread(
+            client.text_to_speech.convert,
+            model=TTS_MODEL,
             text=text,
-            target_language_code="od-IN", # Corrected language code for Odia
+            target_language_code=TTS_LANGUAGE, # Corrected language code for Odia
             enable_preprocessing=True,
-            speech_sample_rate=24000
+            speech_sample_rate=TTS_SAMPLE_RATE,
+            **options
         )
         
         # The response.audios is a list of base64 encoded strings.
@@ -43,4 +69,71 @@ async def generate_odia_speech(text: str) -> bytes:
 
     except Exception as e:
         print(f"Error generating Sarvam TTS: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+async def cached_odia_speech(text: str):
+    """
+    Speech for `text` (WAV bytes) through the content-addressed cache.
+    """
+    text = normalize_text(text)
+    key = cache_key(text, TTS_MODEL, TTS_LANGUAGE, TTS_SAMPLE_RATE, TTS_SPEAKER or "default")
+    return await speech_cache.get_or_synthesize(key, lambda: generate_odia_speech(text))
+
+# ── Streaming ─────────────────────────────────────────────────────
+# Danda/double danda end a sentence even without a following space;
+# Latin punctuation only before whitespace, so "3.5" stays intact.
+_SENTENCE_END = re.compile(r"(?<=[।॥])\s*|(?<=[.!?])\s+|\n+")
+
+def split_for_speech(text: str, max_chars: int = TTS_CHUNK_CHARS) -> list:
+    """
+    Cut text into synthesis chunks at sentence boundaries. The first
+    sentence is always a chunk of its own so audio can start early; later
+    sentences are packed up to `max_chars`, and overlong sentences are cut
+    at the last space or comma before the limit.
+    """
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = normalize_text(sentence)
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(" ", 0, max_chars), sentence.rfind(",", 0, max_chars) + 1)
+            cut = cut if cut > 0 else max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+async def _chunk_pcm(chunk: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        audio = await cached_odia_speech(chunk)
+    return parse_wav(audio)
+
+async def stream_odia_speech(text: str):
+    """
+    Yield one WAV stream for `text`: a header with open-ended sizes, then the
+    PCM of each chunk in order as soon as it and all earlier chunks are
+    ready. Up to TTS_STREAM_CONCURRENCY chunks are synthesized at once (each
+    through the speech cache), so time to first audio depends on the first
+    sentence rather than the whole answer.
+    """
+    semaphore = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
+    tasks = [asyncio.create_task(_chunk_pcm(chunk, semaphore)) for chunk in split_for_speech(text)]
+    try:
+        stream_fmt = None
+        for task in tasks:
+            fmt, pcm = await task
+            if stream_fmt is None:
+                stream_fmt = fmt
+                yield wav_header(*fmt)
+            elif fmt != stream_fmt:
+                raise ValueError(f"TTS chunk format {fmt} differs from the stream's {stream_fmt}")
+            yield pcm
+    finally:
+        # Client went away or a chunk failed: stop the remaining synthesis
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,16 @@
+"""Shared test setup: import the backend the way app.py does, with placeholder keys."""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Agents build their LLM clients at import time; no test talks to a real provider
+for key in ("GROQ_API_KEY", "SERPAPI_API_KEY", "OPENWEATHERMAP_API_KEY", "SARVAM_API_KEY"):
+    os.environ.setdefault(key, "test")
+
+_scratch = tempfile.mkdtemp(prefix="odialingua-tests-")
+os.environ.setdefault("CHAT_STORE", "sqlite")
+os.environ.setdefault("CHAT_DB_PATH", os.path.join(_scratch, "chats.sqlite3"))
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_scratch, "tts_cache"))
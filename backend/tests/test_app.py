@@ -0,0 +1,168 @@
+import json
+import time
+import asyncio
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+import app as backend
+from agents import router, response_agent
+from services import http_client
+from services.chat_store import SQLiteChatStore
+from services.http_client import CircuitBreaker
+from tools import weather_tool
+
+
+class _SlowChatModel(BaseChatModel):
+    """Fake responder: emits `reply` word by word, `delay` seconds apart, and records when it finished."""
+    reply: str = "ନମସ୍କାର, ମୁଁ ଭଲ ଅଛି। ଆପଣ କିପରି ଅଛନ୍ତି?"
+    delay: float = 0.1
+    finished: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay * len(self.reply.split()))
+        self.finished.append(time.perf_counter())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay * len(self.reply.split()))
+        self.finished.append(time.perf_counter())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        self.finished.append(time.perf_counter())
+
+
+async def _post(path: str, body: dict) -> list:
+    """
+    Drive the ASGI app directly and return every response body chunk with the
+    time it was sent; test clients buffer the whole body, which would hide streaming.
+    """
+    chunks, request = [], {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+
+    async def receive():
+        nonlocal request
+        if request is None:
+            await asyncio.Event().wait()
+        message, request = request, None
+        return message
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter(), message["body"]))
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 1234), "server": ("test", 80)}
+    await backend.app(scope, receive, send)
+    return chunks
+
+
+def _stub_llms(monkeypatch, model, agent="response", router_delay=0.0):
+    async def route(prompt):
+        await asyncio.sleep(router_delay)
+        return router.RouteQuery(next_agent=agent)
+
+    monkeypatch.setattr(router, "structured_router", RunnableLambda(route))
+    monkeypatch.setattr(response_agent, "llm", model)
+
+
+def test_stream_sends_first_token_before_generation_finishes(monkeypatch, tmp_path):
+    async def scenario():
+        model = _SlowChatModel(finished=[])
+        _stub_llms(monkeypatch, model)
+        backend.app.state.chat_store = store = SQLiteChatStore(str(tmp_path / "chats.sqlite3"))
+        await store.create_chat("s1", "u1", "chat")
+
+        started = time.perf_counter()
+        chunks = await _post("/chat/stream", {"session_id": "s1", "message": "ନମସ୍କାର, କେମିତି ଅଛ?",
+                                              "user_id": "u1", "is_new_chat": False})
+        events = [(sent, json.loads(line)) for sent, body in chunks for line in body.decode().splitlines()]
+        tokens = [(sent, event["content"]) for sent, event in events if event["type"] == "token"]
+
+        assert [event["type"] for _, event in events][0] == "route"
+        assert "".join(content for _, content in tokens) == model.reply
+        assert len(tokens) == len(model.reply.split(" "))
+        # The first token left the server while the model still had most of the answer to generate
+        assert tokens[0][0] < model.finished[0] - model.delay * (len(tokens) - 2)
+        assert tokens[0][0] - started < 0.5 * (model.finished[0] - started)
+        assert events[-1][1]["type"] == "done" and events[-1][1]["response"] == model.reply
+
+        # Persisted once, after the stream ended
+        chat = await store.get_chat("s1")
+        assert [m["role"] for m in chat["messages"]] == ["user", "assistant"]
+        assert chat["messages"][-1]["content"] == model.reply
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_chats_overlap_instead_of_queueing(monkeypatch, tmp_path):
+    """Every stubbed backend awaits its latency, so N chats at once should take about as long as one."""
+    async def weather_api(request):
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json={"weather": [{"description": "clear sky"}],
+                                         "main": {"temp": 31.0, "feels_like": 35.0, "humidity": 60}})
+
+    async def scenario():
+        _stub_llms(monkeypatch, _SlowChatModel(delay=0.03), agent="weather", router_delay=0.1)
+        monkeypatch.setitem(http_client._clients, "openweathermap", httpx.AsyncClient(
+            base_url="https://api.openweathermap.org", transport=httpx.MockTransport(weather_api)))
+        monkeypatch.setitem(http_client._breakers, "openweathermap", CircuitBreaker())
+        backend.app.state.chat_store = store = SQLiteChatStore(str(tmp_path / "chats.sqlite3"))
+        # Distinct cities, so no request is served from another's weather cache entry
+        cities = ["Puri", "Cuttack", "Rourkela", "Sambalpur", "Berhampur", "Balasore", "Bhadrak", "Baripada", "Koraput"]
+        for n in range(len(cities)):
+            await store.create_chat(f"s{n}", "u1", "chat")
+        await weather_tool.weather_cache.backend.clear()
+
+        async def chat(n):
+            chunks = await _post("/chat", {"session_id": f"s{n}", "message": f"What is the weather in {cities[n]}?",
+                                           "user_id": "u1", "is_new_chat": False})
+            return json.loads(b"".join(body for _, body in chunks))
+
+        started = time.perf_counter()
+        await chat(0)
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        replies = await asyncio.gather(*(chat(n) for n in range(1, len(cities))))
+        together = time.perf_counter() - started
+
+        assert all(reply["status"] == "success" for reply in replies)
+        assert weather_tool.provider_stats["provider_calls"] >= len(cities)
+        # Sequential handling would take about 8x as long as one chat
+        assert together < 2.5 * single, (single, together)
+
+    asyncio.run(scenario())
+
+
+def test_message_range_rejects_end_before_start_and_clamps_page(tmp_path):
+    async def scenario():
+        backend.app.state.chat_store = store = SQLiteChatStore(str(tmp_path / "chats.sqlite3"))
+        await store.create_chat("s1", "u1", "chat")
+        history = [{"role": "user", "content": f"m{i}", "timestamp": i} for i in range(150)]
+        await store.append_messages("s1", "u1", history, start_seq=0)
+        transport = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for params in ({"start": 5, "end": 2}, {"start": 0, "end": -3}):
+                assert (await client.get("/chats/s1/messages", params=params)).status_code == 400
+            page = (await client.get("/chats/s1/messages", params={"start": 10, "end": 150})).json()
+        assert page["start"] == 10 and len(page["messages"]) == backend.MAX_PAGE_SIZE
+        assert page["messages"][0]["content"] == "m10"
+
+    asyncio.run(scenario())
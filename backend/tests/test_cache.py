@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services.cache import CoalescingCache, MemoryCache
+
+
+def _loader(release: asyncio.Event, calls: list, value="evidence"):
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return value
+    return load
+
+
+def test_follower_survives_leader_timeout():
+    """Two research turns share a search; the first one's deadline must not fail the second."""
+    async def scenario():
+        cache, release, calls = CoalescingCache(MemoryCache()), asyncio.Event(), []
+        load = _loader(release, calls)
+        leader = asyncio.create_task(asyncio.wait_for(cache.get_or_load("q", load), timeout=0.01))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("q", load))
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        release.set()
+        assert await follower == "evidence"
+        assert await cache.get_or_load("q", load) == "evidence"
+        assert len(calls) == 1
+        assert (cache.misses, cache.coalesced, cache.hits) == (1, 1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_load_finishes_and_is_cached_when_every_caller_is_cancelled():
+    async def scenario():
+        cache, release, calls = CoalescingCache(MemoryCache()), asyncio.Event(), []
+        load = _loader(release, calls)
+        callers = [asyncio.create_task(cache.get_or_load("q", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert await cache.backend.get("q") == "evidence"
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        cache, attempts = CoalescingCache(MemoryCache()), []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(*(cache.get_or_load("q", failing) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(attempts) == 1 and cache.errors == 1
+        assert await cache.backend.get("q") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import os
+import asyncio
+
+from appwrite.exception import AppwriteException
+
+from services.chat_store import AppwriteChatStore, CachedChatStore, SQLiteChatStore, WriteBehindChatStore
+
+
+def _turn(n):
+    return [{"role": "user", "content": f"question {n}", "timestamp": n},
+            {"role": "assistant", "content": f"answer {n}", "timestamp": n}]
+
+
+def test_two_workers_with_session_caches_lose_no_messages(tmp_path):
+    """Each worker caches the session; appending from a stale cached messageCount must not overwrite the other's turn."""
+    async def scenario():
+        path = str(tmp_path / "chats.sqlite3")
+        worker_a, worker_b = CachedChatStore(SQLiteChatStore(path)), CachedChatStore(SQLiteChatStore(path))
+        await worker_a.create_chat("s1", "u1", "chat")
+
+        for turn, worker in enumerate([worker_a, worker_b, worker_a, worker_b]):
+            chat = await worker.get_chat("s1", tail=20)
+            await worker.append_messages("s1", "u1", _turn(turn), start_seq=chat["messageCount"])
+
+        chat = await SQLiteChatStore(path).get_chat("s1")
+        assert chat["messageCount"] == 8
+        assert [m["content"] for m in chat["messages"]][::2] == [f"question {n}" for n in range(4)]
+        assert [m["seq"] for m in chat["messages"]] == list(range(8))
+        # The stale entry was dropped, so the next read sees the other worker's turns
+        assert (await worker_a.get_chat("s1", tail=20))["messageCount"] == 8
+
+    asyncio.run(scenario())
+
+
+def test_replayed_append_is_not_duplicated(tmp_path):
+    """A write-behind journal replay re-sends an append that already landed."""
+    async def scenario():
+        store = SQLiteChatStore(str(tmp_path / "chats.sqlite3"))
+        await store.create_chat("s1", "u1", "chat")
+        assert await store.append_messages("s1", "u1", _turn(0), start_seq=0) == 2
+        assert await store.append_messages("s1", "u1", _turn(1), start_seq=2) == 4
+        assert await store.append_messages("s1", "u1", _turn(0), start_seq=0) == 4
+        assert (await store.get_chat("s1"))["messageCount"] == 4
+
+    asyncio.run(scenario())
+
+
+class _UnavailableStore(SQLiteChatStore):
+    """Creates chats but fails every queued write, so the write-behind queue only grows."""
+
+    async def append_messages(self, *args, **kwargs):
+        raise ConnectionError("store unavailable")
+
+    async def update_summary(self, *args, **kwargs):
+        raise ConnectionError("store unavailable")
+
+
+def test_write_behind_journal_is_compacted_and_replays(tmp_path):
+    async def scenario():
+        path, journal = str(tmp_path / "chats.sqlite3"), str(tmp_path / "journal.jsonl")
+        store = WriteBehindChatStore(_UnavailableStore(path), journal_path=journal, journal_max_bytes=4096, linger=0)
+        await store.start()
+        await store.create_chat("s1", "u1", "chat")
+        await store.append_messages("s1", "u1", _turn(0), start_seq=0)
+        for n in range(200):
+            await store.update_summary("s1", f"summary {n} " + "x" * 1000, 2)
+        # 200 KB of records, but only one append and the newest summary are still queued
+        assert store.compactions > 0
+        assert os.path.getsize(journal) < 8192
+        # Crash: the worker stops without draining
+        store._worker.cancel()
+        store._journal.close()
+
+        recovered = WriteBehindChatStore(SQLiteChatStore(path), journal_path=journal)
+        await recovered.start()
+        chat = await recovered.get_chat("s1")
+        await recovered.close()
+        assert [m["content"] for m in chat["messages"]] == ["question 0", "answer 0"]
+        assert chat["summary"].startswith("summary 199 ")
+        assert os.path.getsize(journal) == 0
+
+    asyncio.run(scenario())
+
+
+class _PreSummaryAppwrite:
+    """A chats collection created before the summary attributes: Appwrite rejects writes naming them."""
+
+    def __init__(self):
+        self.documents = {"s1": {"$id": "s1", "userId": "u1", "name": "chat", "messages": '[{"role": "user"}]'}}
+        self.writes = []
+
+    def update_document(self, database_id, collection_id, document_id, data):
+        self.writes.append(dict(data))
+        for name in ("summary", "summarizedCount"):
+            if name in data:
+                raise AppwriteException(f'Invalid document structure: Unknown attribute: "{name}"', 400,
+                                        "document_invalid_structure")
+        self.documents[document_id].update(data)
+        return self.documents[document_id]
+
+
+def test_appwrite_clear_works_without_summary_attributes():
+    async def scenario():
+        db = _PreSummaryAppwrite()
+        store = AppwriteChatStore(db, "db", "chats", storage_mode="blob")
+        await store.clear_chat("s1")
+        assert db.documents["s1"]["messages"] == "[]"
+        await store.update_summary("s1", "ସାରାଂଶ", 4)
+        await store.clear_chat("s1")
+        # One rejected write, then the store stops sending the summary fields
+        assert [sorted(w) for w in db.writes] == [["messages", "summarizedCount", "summary"], ["messages"], ["messages"]]
+        await store.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from services import http_client
+from services.http_client import CircuitBreaker, CircuitOpenError
+
+
+def _mock_provider(monkeypatch, handler, **breaker):
+    client = httpx.AsyncClient(base_url="https://provider.test", transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(http_client._clients, "openweathermap", client)
+    monkeypatch.setitem(http_client._breakers, "openweathermap", CircuitBreaker(**breaker))
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt: 0)
+    return http_client._breakers["openweathermap"]
+
+
+def test_half_open_breaker_lets_exactly_one_probe_through(monkeypatch):
+    async def scenario():
+        release, calls = asyncio.Event(), []
+
+        async def handler(request):
+            calls.append(request)
+            await release.wait()
+            return httpx.Response(200)
+
+        breaker = _mock_provider(monkeypatch, handler, failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == "half-open"
+
+        probe = asyncio.create_task(http_client.request("openweathermap", "GET", "/"))
+        await asyncio.sleep(0)
+        others = await asyncio.wait_for(asyncio.gather(
+            *(http_client.request("openweathermap", "GET", "/") for _ in range(5)), return_exceptions=True), 1)
+        assert all(isinstance(result, CircuitOpenError) for result in others)
+        release.set()
+        assert (await probe).status_code == 200
+        assert len(calls) == 1
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_frees_the_half_open_slot(monkeypatch):
+    async def scenario():
+        async def handler(request):
+            await asyncio.sleep(10)
+
+        breaker = _mock_provider(monkeypatch, handler, failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        probe = asyncio.create_task(http_client.request("openweathermap", "GET", "/"))
+        await asyncio.sleep(0)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        assert breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_exhausted_429_counts_as_failure(monkeypatch):
+    async def scenario():
+        breaker = _mock_provider(monkeypatch, lambda request: httpx.Response(429), failure_threshold=2)
+        for _ in range(2):
+            response = await http_client.request("openweathermap", "GET", "/", max_retries=1)
+            assert response.status_code == 429
+        assert breaker.state == "open"
+
+    asyncio.run(scenario())
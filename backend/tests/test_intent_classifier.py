@@ -0,0 +1,34 @@
+import os
+import json
+
+import pytest
+
+from agents.intent_classifier import classify
+from agents.router import ROUTER_CONFIDENCE_THRESHOLD
+
+# Held out of `benchmarks/routing.py --tune`, so overfitting the weights to the tuning set shows up here
+ROUTING_HOLDOUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                               "routing_holdout.jsonl")
+
+
+def _held_out():
+    with open(ROUTING_HOLDOUT, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("text", [
+    "what is the rate of photosynthesis",
+    "what does mp mean in physics",
+    "temperature formula kana",
+])
+def test_ambiguous_cues_are_not_fast_pathed_to_the_wrong_intent(text):
+    intent, confidence, _ = classify(text)
+    assert intent == "response" or confidence < ROUTER_CONFIDENCE_THRESHOLD
+
+
+def test_confidence_is_calibrated_on_held_out_messages():
+    """Confident decisions are almost always right, and most messages skip the LLM."""
+    decisions = [(classify(e["text"]), e["intent"]) for e in _held_out()]
+    fast = [intent == gold for (intent, confidence, _), gold in decisions if confidence >= ROUTER_CONFIDENCE_THRESHOLD]
+    assert sum(fast) / len(fast) >= 0.95
+    assert len(fast) / len(decisions) >= 0.75
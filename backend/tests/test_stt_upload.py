@@ -0,0 +1,58 @@
+import io
+import asyncio
+
+import numpy as np
+import pytest
+
+from services import stt_service
+from services.audio_utils import FFMPEG, decode_audio, encode_wav, split_on_silence, trim_silence
+
+
+def _tone(seconds, sample_rate, channels):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    mono = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    return encode_wav(np.repeat(mono[:, None], channels, axis=1), sample_rate)
+
+
+@pytest.mark.skipif(not FFMPEG, reason="needs ffmpeg")
+def test_ffmpeg_downmixes_and_resamples_while_decoding():
+    samples, rate = asyncio.run(decode_audio(_tone(2, 48000, 2), channels=1, sample_rate=16000))
+    assert rate == 16000
+    assert samples.shape == (32000, 1)
+
+
+def test_decoding_stops_at_max_bytes():
+    clip = _tone(2, 48000, 2)
+    with pytest.raises(ValueError, match="exceeds"):
+        asyncio.run(decode_audio(clip, max_bytes=100_000))
+    if FFMPEG:
+        with pytest.raises(ValueError, match="exceeds"):
+            asyncio.run(decode_audio(clip, channels=1, sample_rate=16000, max_bytes=100_000))
+
+
+def test_upload_is_sent_as_is_when_reencoding_fails(monkeypatch):
+    sent = []
+
+    async def transcribe_audio(audio, filename, content_type, language_code):
+        sent.append((audio, filename, content_type))
+        return {"transcript": "ok", "detected_language": "od-IN"}
+
+    async def encode_speech(*args, **kwargs):
+        raise ValueError("ffmpeg could not encode flac")
+
+    monkeypatch.setattr(stt_service, "transcribe_audio", transcribe_audio)
+    monkeypatch.setattr(stt_service, "encode_speech", encode_speech)
+    clip = _tone(2, 16000, 1)
+    result = asyncio.run(stt_service.transcribe_upload(io.BytesIO(clip), "note.wav", "audio/wav", len(clip)))
+    assert result["transcript"] == "ok"
+    assert sent == [(clip, "note.wav", "audio/wav")]
+
+
+def test_trim_and_split_offsets_follow_the_vad_frames():
+    """A trailing partial frame must not stretch the frame length used to map frames back to samples."""
+    rate, onset = 16000, 25600                      # speech starts exactly at frame 80 of 20 ms
+    mono = np.zeros(onset + 6400 + 300, dtype=np.float32)
+    mono[onset:onset + 6400] = 0.3 * np.sin(2 * np.pi * 200 * np.arange(6400) / rate)
+    trimmed, start = trim_silence(mono, rate, pad_ms=0)
+    assert start == onset and len(trimmed) == 6400
+    assert split_on_silence(mono, rate, 0.5, 1.0)[-1][0] % 320 == 0
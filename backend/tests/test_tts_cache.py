@@ -0,0 +1,72 @@
+import os
+import asyncio
+
+from services.tts_cache import SpeechCache, cache_key
+
+
+def _cache(tmp_path, **kwargs):
+    return SpeechCache(str(tmp_path), **{"max_disk_bytes": 1 << 20, "max_memory_bytes": 1 << 20,
+                                         "max_memory_item": 1 << 16, **kwargs})
+
+
+def test_disconnected_stream_does_not_fail_a_waiting_request(tmp_path):
+    """stream_odia_speech cancels its chunk tasks on disconnect; /text-to-speech waiting on the same chunk must still get audio."""
+    async def scenario():
+        cache, release, calls = _cache(tmp_path), asyncio.Event(), []
+
+        async def synthesize():
+            calls.append(1)
+            await release.wait()
+            return b"RIFF-audio"
+
+        key = cache_key("ନମସ୍କାର", "bulbul:v2")
+        stream_chunk = asyncio.create_task(cache.get_or_synthesize(key, synthesize))
+        await asyncio.sleep(0)
+        endpoint = asyncio.create_task(cache.get_or_synthesize(key, synthesize))
+        await asyncio.sleep(0)
+        stream_chunk.cancel()
+        release.set()
+        assert await endpoint == b"RIFF-audio"
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_tiers_serve_repeats_without_synthesis(tmp_path):
+    async def scenario():
+        calls = []
+
+        async def synthesize():
+            calls.append(1)
+            return b"x" * 100
+
+        cache = _cache(tmp_path)
+        assert await cache.get_or_synthesize("k", synthesize) == b"x" * 100
+        assert await cache.get_or_synthesize("k", synthesize) == b"x" * 100
+        # A fresh process only has the disk tier
+        restarted = _cache(tmp_path)
+        assert await restarted.get_or_synthesize("k", synthesize) == b"x" * 100
+        assert len(calls) == 1
+        assert restarted.stats()["disk_hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_disk_entry_evicted_before_it_is_read_is_synthesized_again(tmp_path):
+    async def scenario():
+        calls = []
+
+        async def synthesize():
+            calls.append(1)
+            return b"x" * 100
+
+        await _cache(tmp_path).get_or_synthesize("k", synthesize)
+        restarted = _cache(tmp_path)
+        # Another request evicts the file between the index lookup and the read
+        restarted._read = lambda key: os.remove(restarted._path(key))
+        assert await restarted.get_or_synthesize("k", synthesize) == b"x" * 100
+        assert len(calls) == 2
+        assert restarted.stats()["disk_hits"] == 0
+
+    asyncio.run(scenario())
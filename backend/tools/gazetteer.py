@@ -0,0 +1,63 @@
+"""
+Built-in gazetteer for deterministic location extraction.
+
+Maps the ways users write Odisha and major Indian place names (Odia script,
+romanized Odia, English, Devanagari) to one canonical place with its
+coordinates, so a weather question can go straight to the provider without
+an LLM picking the location, and every spelling shares one cache entry. Latin-script aliases match whole words, optionally with an
+attached romanized case suffix ("Cuttackre"); Odia/Devanagari aliases match
+anywhere since suffixes attach directly (ଭୁବନେଶ୍ୱରରେ, ପୁରୀର).
+"""
+import os
+import re
+import json
+import unicodedata
+from typing import NamedTuple, Optional
+
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH", os.path.join(os.path.dirname(__file__), "gazetteer.json")
+)
+_LATIN_SUFFIX = r"(?:re|ra|ru|ku)?"
+
+class Place(NamedTuple):
+    name: str    # canonical display name, also the weather cache key
+    lat: float
+    lon: float
+
+def _fold(text: str) -> str:
+    # NFC splits precomposed ଡ଼/ଢ଼ into letter + nukta; dropping the nukta also
+    # matches the common spelling without it (ଝାରସୁଗୁଡା)
+    text = unicodedata.normalize("NFC", text).replace("\u0b3c", "")
+    return " ".join(text.lower().split())
+
+class Gazetteer:
+    """Alias table compiled into one regex; the leftmost (then longest) alias wins."""
+
+    def __init__(self, places):
+        self.aliases = {}
+        for entry in places:
+            place = Place(entry["name"], entry["lat"], entry["lon"])
+            for alias in (entry["name"], *entry.get("aliases", [])):
+                if alias.strip():
+                    self.aliases[_fold(alias)] = place
+        latin = sorted((a for a in self.aliases if a.isascii()), key=len, reverse=True)
+        native = sorted((a for a in self.aliases if not a.isascii()), key=len, reverse=True)
+        branches = []
+        if latin:
+            branches.append(rf"(?<!\w)({'|'.join(map(re.escape, latin))}){_LATIN_SUFFIX}(?!\w)")
+        if native:
+            branches.append(f"({'|'.join(map(re.escape, native))})")
+        self._regex = re.compile("|".join(branches) or r"(?!)")
+
+    def find(self, text: str) -> Optional[Place]:
+        """The first known place mentioned in `text`, or None."""
+        match = self._regex.search(_fold(text))
+        if not match:
+            return None
+        return self.aliases[match.group(match.lastindex)]
+
+def load_gazetteer(path=GAZETTEER_PATH) -> Gazetteer:
+    with open(path, encoding="utf-8") as f:
+        return Gazetteer(json.load(f)["places"])
+
+GAZETTEER = load_gazetteer()
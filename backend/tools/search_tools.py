@@ -1,15 +1,30 @@
-import os, json, re, requests, datetime
+import os, json, re, datetime
 from typing import List
 from langchain_core.tools import tool
-from googletrans import Translator           # pip install googletrans==4.0.0-rc1
-import serpapi  # New import style
-import asyncio
+
+from services import http_client
+from services import translation_service
+from services.cache import CoalescingCache, make_backend
 
 # ── API keys ──────────────────────────────────────────────────────
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 TAVILY_API_KEY  = os.getenv("TAVILY_API_KEY")
 
-translator = Translator()
+# ── Result cache (keyed on the normalized English query) ─────────
+SEARCH_CACHE_TTLS = {
+    "aio":    int(os.getenv("SEARCH_CACHE_TTL_AIO", "1800")),
+    "google": int(os.getenv("SEARCH_CACHE_TTL_GOOGLE", "1800")),
+    "tavily": int(os.getenv("SEARCH_CACHE_TTL_TAVILY", "600")),   # news goes stale faster
+}
+search_cache = CoalescingCache(make_backend(
+    os.getenv("SEARCH_CACHE_BACKEND", "memory"),
+    maxsize=int(os.getenv("SEARCH_CACHE_MAXSIZE", "2048")),
+    path=os.getenv("SEARCH_CACHE_PATH", "search_cache.sqlite3"),
+    url=os.getenv("SEARCH_CACHE_URL"),
+    prefix="search:",
+))
+
+_FILLER_WORDS = {"the", "a", "an", "please", "tell", "me"}
 
 # ── Helpers ───────────────────────────────────────────────────────
 def _dbg(tag, obj):
@@ -20,13 +35,17 @@ def _dbg(tag, obj):
     print(f"\n🟡 DEBUG {tag}:\n{txt}\n{'─'*60}")
 
 async def _ensure_english_async(q: str) -> str:
-    """Async translate to English if the query is not mostly Latin characters."""
-    if re.fullmatch(r"[A-Za-z0-9 ,.'\"?%:-]+", q):
-        return q
-    
-    # Use await instead of asyncio.run()
-    result = await translator.translate(q, dest="en")
-    return result.text
+    """Async translate to English unless the query is already Latin script (memoized)."""
+    return await translation_service.to_english(q)
+
+def _normalize_query(q: str) -> str:
+    """Lowercase, drop punctuation and filler words, collapse whitespace."""
+    words = re.findall(r"\w+", q.lower())
+    return " ".join(w for w in words if w not in _FILLER_WORDS)
+
+async def _cached_search(source: str, q_en: str, fetch) -> str:
+    key = f"{source}:{_normalize_query(q_en)}"
+    return await search_cache.get_or_load(key, lambda: fetch(q_en), ttl=SEARCH_CACHE_TTLS[source])
 
 def _filter_recent(snips: List[str], yr_cutoff=2023) -> List[str]:
     out=[]
@@ -53,6 +72,54 @@ def _extract_ai_overview(ai_block: dict) -> str:
     return "\\n".join(out)
 
 # ── Google AI-Overview primary tool ───────────────────────────────
+async def _fetch_ai_overview(q_en: str) -> str:
+    # 1️⃣ initial Google Search (no_cache for fresh page_token)
+    base_params = {
+        "engine": "google",
+        "q": q_en,
+        "hl": "en",
+        "gl": "in",
+        "no_cache": "true",
+        "api_key": SERPAPI_API_KEY,
+    }
+    res: dict = await http_client.get_json("serpapi", "/search.json", params=base_params)
+    _dbg("google_ai_overview → first_response.ai_overview", res.get("ai_overview"))
+
+    ai = res.get("ai_overview")
+    # direct AI text
+    if ai and ai.get("text_blocks"):
+        return "AIO: " + _extract_ai_overview(ai)[:900]
+
+    # 2️⃣ fetch via page_token if required
+    page_token = ai.get("page_token") if ai else None
+    if page_token:
+        token_params = {
+            "engine": "google_ai_overview",
+            "page_token": page_token,
+            "api_key": SERPAPI_API_KEY,
+            "no_cache": "true",
+        }
+        res2: dict = await http_client.get_json("serpapi", "/search.json", params=token_params)
+        _dbg("google_ai_overview → token_response.ai_overview", res2.get("ai_overview"))
+        ai2 = res2.get("ai_overview")
+        if ai2 and ai2.get("text_blocks"):
+            return "AIO: " + _extract_ai_overview(ai2)[:900]
+
+    # 3️⃣ fallback paths
+    if res.get("answer_box", {}).get("snippet"):
+        return "Direct Answer: " + res["answer_box"]["snippet"]
+
+    kg = res.get("knowledge_graph")
+    if kg and kg.get("title"):
+        return f"KG: {kg['title']} – {kg.get('type','')}"
+
+    # last resort: organic snippet
+    org = res.get("organic_results", [])
+    if org and org[0].get("snippet"):
+        return org[0]["title"] + ": " + org[0]["snippet"]
+
+    return "Google search produced no useful snippet"
+
 @tool
 async def google_ai_overview_snippets(query: str) -> str:
     """
@@ -66,58 +133,23 @@ async def google_ai_overview_snippets(query: str) -> str:
         return "AIO: API key missing"
 
     try:
-        # 1️⃣ initial Google Search (no_cache for fresh page_token)
-        base_params = {
-            "engine": "google",
-            "q": q_en,
-            "hl": "en",
-            "gl": "in",
-            "no_cache": "true",
-            "api_key": SERPAPI_API_KEY,
-        }
-        # Updated usage for new serpapi package
-        res: dict = serpapi.search(base_params)
-        _dbg("google_ai_overview → first_response.ai_overview", res.get("ai_overview"))
-
-        ai = res.get("ai_overview")
-        # direct AI text
-        if ai and ai.get("text_blocks"):
-            return "AIO: " + _extract_ai_overview(ai)[:900]
-
-        # 2️⃣ fetch via page_token if required
-        page_token = ai.get("page_token") if ai else None
-        if page_token:
-            token_params = {
-                "engine": "google_ai_overview",
-                "page_token": page_token,
-                "api_key": SERPAPI_API_KEY,
-                "no_cache": "true",
-            }
-            # Updated usage for new serpapi package
-            res2: dict = serpapi.search(token_params)
-            _dbg("google_ai_overview → token_response.ai_overview", res2.get("ai_overview"))
-            ai2 = res2.get("ai_overview")
-            if ai2 and ai2.get("text_blocks"):
-                return "AIO: " + _extract_ai_overview(ai2)[:900]
-
-        # 3️⃣ fallback paths
-        if res.get("answer_box", {}).get("snippet"):
-            return "Direct Answer: " + res["answer_box"]["snippet"]
-
-        kg = res.get("knowledge_graph")
-        if kg and kg.get("title"):
-            return f"KG: {kg['title']} – {kg.get('type','')}"
-
-        # last resort: organic snippet
-        org = res.get("organic_results", [])
-        if org and org[0].get("snippet"):
-            return org[0]["title"] + ": " + org[0]["snippet"]
-
-        return "Google search produced no useful snippet"
+        return await _cached_search("aio", q_en, _fetch_ai_overview)
     except Exception as e:
         return f"AIO error: {e}"
 
 # ── Standard Google fallback (organic / overview) ─────────────────
+async def _fetch_google(q_en: str) -> str:
+    params = {
+        "engine":"google","q":q_en,"hl":"en","gl":"in","num":10,
+        "api_key":SERPAPI_API_KEY
+    }
+    res: dict = await http_client.get_json("serpapi", "/search.json", params=params)
+    _dbg("google_search → raw", res)
+
+    snips=[r["snippet"] for r in res.get("organic_results",[]) if r.get("snippet")]
+    snips=_filter_recent(snips)[:3]
+    return "\\n".join(snips) if snips else "Google: no useful snippet"
+
 @tool
 async def google_search_snippets(query: str) -> str:
     """
@@ -131,21 +163,25 @@ async def google_search_snippets(query: str) -> str:
         return "Google: API key missing"
 
     try:
-        params = {
-            "engine":"google","q":q_en,"hl":"en","gl":"in","num":10,
-            "api_key":SERPAPI_API_KEY
-        }
-        # Updated usage for new serpapi package
-        res: dict = serpapi.search(params)
-        _dbg("google_search → raw", res)
-
-        snips=[r["snippet"] for r in res.get("organic_results",[]) if r.get("snippet")]
-        snips=_filter_recent(snips)[:3]
-        return "\\n".join(snips) if snips else "Google: no useful snippet"
+        return await _cached_search("google", q_en, _fetch_google)
     except Exception as e:
         return f"Google error: {e}"
 
 # ── Tavily snippets (news) ────────────────────────────────────────
+async def _fetch_tavily(q_en: str) -> str:
+    data=await http_client.post_json(
+        "tavily", "/search",
+        headers={"Authorization":f"Bearer {TAVILY_API_KEY}",
+                 "Content-Type":"application/json"},
+        json={"query":q_en,"topic":"news","search_depth":"advanced",
+              "max_results":15,"include_answer":False})
+    _dbg("tavily_search → raw", data)
+
+    snips=[f"{r['title']}: {r.get('content','')}"
+           for r in data.get("results",[]) if r.get("content")]
+    snips=_filter_recent(snips)[:3]
+    return "\\n".join(snips) if snips else "Tavily: no useful snippet"
+
 @tool
 async def tavily_search_snippets(query: str) -> str:
     """
@@ -159,18 +195,6 @@ async def tavily_search_snippets(query: str) -> str:
         return "Tavily: API key missing"
 
     try:
-        data=requests.post(
-            "https://api.tavily.com/search",
-            headers={"Authorization":f"Bearer {TAVILY_API_KEY}",
-                     "Content-Type":"application/json"},
-            json={"query":q_en,"topic":"news","search_depth":"advanced",
-                  "max_results":15,"include_answer":False},
-            timeout=20).json()
-        _dbg("tavily_search → raw", data)
-
-        snips=[f"{r['title']}: {r.get('content','')}"
-               for r in data.get("results",[]) if r.get("content")]
-        snips=_filter_recent(snips)[:3]
-        return "\\n".join(snips) if snips else "Tavily: no useful snippet"
+        return await _cached_search("tavily", q_en, _fetch_tavily)
     except Exception as e:
-        return f"Tavily error: {e}"
\ No newline at end of file
+        return f"Tavily error: {e}"
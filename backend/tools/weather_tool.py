@@ -1,38 +1,150 @@
 import os
-import requests
+import time
+import asyncio
+import logging
+from collections import Counter, deque
+import httpx
 from langchain_core.tools import tool
 
+from services import http_client
+from services.cache import CoalescingCache, MemoryCache
+from tools.gazetteer import GAZETTEER
+
+logger = logging.getLogger(__name__)
+
 OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
 
+# ── Current-conditions cache (keyed by canonical place) ───────────
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_MAXSIZE = int(os.getenv("WEATHER_CACHE_MAXSIZE", "512"))
+# The N most-asked places are re-fetched before their entry expires; 0 disables
+WEATHER_REFRESH_TOP_N = int(os.getenv("WEATHER_REFRESH_TOP_N", "10"))
+WEATHER_REFRESH_INTERVAL = float(os.getenv("WEATHER_REFRESH_INTERVAL", str(WEATHER_CACHE_TTL * 0.75)))
+
+weather_cache = CoalescingCache(MemoryCache(maxsize=WEATHER_CACHE_MAXSIZE, default_ttl=WEATHER_CACHE_TTL))
+_popularity = Counter()           # Place -> recent requests (halved every refresh)
+_latencies = deque(maxlen=256)    # seconds per provider call
+_call_times = deque(maxlen=1024)  # monotonic timestamps of provider calls
+_refresh_task = None
+provider_stats = {"provider_calls": 0, "provider_errors": 0, "refreshes": 0}
+
+def _cache_key(location: str, place) -> str:
+    # Every spelling of a known place shares one entry; free-form names are normalized
+    return f"place:{place.name}" if place else f"q:{' '.join(location.lower().split())}"
+
+async def _fetch(params: dict) -> dict:
+    """One OpenWeatherMap call, reduced to the fields the report uses."""
+    started = time.monotonic()
+    provider_stats["provider_calls"] += 1
+    _call_times.append(started)
+    try:
+        response = await http_client.request("openweathermap", "GET", "/data/2.5/weather",
+                                             params={**params, "appid": OPENWEATHERMAP_API_KEY, "units": "metric"})
+        response.raise_for_status()
+    except Exception:
+        provider_stats["provider_errors"] += 1
+        raise
+    finally:
+        _latencies.append(time.monotonic() - started)
+    data = response.json()
+    return {
+        "conditions": data['weather'][0]['description'],
+        "temperature": data['main']['temp'],
+        "feels_like": data['main']['feels_like'],
+        "humidity": data['main']['humidity'],
+    }
+
+def _params(location: str, place) -> dict:
+    return {"lat": place.lat, "lon": place.lon} if place else {"q": location}
+
 @tool
-def get_current_weather(location: str) -> str:
+async def get_current_weather(location: str) -> str:
     """
     Get the current weather information for a specified location.
     """
     if not OPENWEATHERMAP_API_KEY:
         return "Weather API key is not configured."
 
+    # Known places are queried by coordinates and reported under their canonical name
+    place = GAZETTEER.find(location)
+    if place:
+        location = place.name
+        _popularity[place] += 1
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={OPENWEATHERMAP_API_KEY}&units=metric"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        weather_description = data['weather'][0]['description']
-        temperature = data['main']['temp']
-        feels_like = data['main']['feels_like']
-        humidity = data['main']['humidity']
-
+        report = await weather_cache.get_or_load(_cache_key(location, place),
+                                                 lambda: _fetch(_params(location, place)))
         return (
             f"Current weather in {location}:\n"
-            f"- Conditions: {weather_description}\n"
-            f"- Temperature: {temperature}°C\n"
-            f"- Feels Like: {feels_like}°C\n"
-            f"- Humidity: {humidity}%"
+            f"- Conditions: {report['conditions']}\n"
+            f"- Temperature: {report['temperature']}°C\n"
+            f"- Feels Like: {report['feels_like']}°C\n"
+            f"- Humidity: {report['humidity']}%"
         )
-    except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 404:
+    except httpx.HTTPStatusError as http_err:
+        if http_err.response.status_code == 404:
             return f"Could not find weather data for '{location}'. Please check the location name."
         return f"HTTP error occurred while fetching weather: {http_err}"
     except Exception as e:
-        return f"An error occurred while fetching weather data: {str(e)}"
\ No newline at end of file
+        return f"An error occurred while fetching weather data: {str(e)}"
+
+# ── Background refresh of the hottest places ──────────────────────
+async def refresh_hot_places():
+    """
+    Re-fetch the WEATHER_REFRESH_TOP_N most requested places and overwrite
+    their cache entries, so popular queries are always served from memory.
+    Counts are halved afterwards, letting places that stopped being asked
+    about drop out.
+    """
+    hot = [place for place, _ in _popularity.most_common(WEATHER_REFRESH_TOP_N)]
+    for place in list(_popularity):
+        _popularity[place] //= 2
+        if not _popularity[place]:
+            del _popularity[place]
+
+    async def refresh(place):
+        report = await _fetch(_params(place.name, place))
+        await weather_cache.backend.set(_cache_key(place.name, place), report)
+        provider_stats["refreshes"] += 1
+
+    results = await asyncio.gather(*(refresh(place) for place in hot), return_exceptions=True)
+    for place, result in zip(hot, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Weather refresh for {place.name} failed: {str(result)}")
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(WEATHER_REFRESH_INTERVAL)
+        try:
+            await refresh_hot_places()
+        except Exception as e:
+            logger.warning(f"Weather refresh failed: {str(e)}")
+
+def start_refresh():
+    """Start the background refresher (called from the app lifespan)."""
+    global _refresh_task
+    if WEATHER_REFRESH_TOP_N > 0 and OPENWEATHERMAP_API_KEY and _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+async def stop_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+def stats() -> dict:
+    """Cache counters plus provider call rate and latency (recent calls)."""
+    now = time.monotonic()
+    latencies = sorted(_latencies)
+    return {
+        **weather_cache.stats(),
+        "entries": len(weather_cache.backend),
+        **provider_stats,
+        "provider_calls_last_minute": sum(1 for t in _call_times if now - t <= 60),
+        "provider_latency_ms_avg": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "provider_latency_ms_p95": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0,
+        "hot_places": [place.name for place, _ in _popularity.most_common(WEATHER_REFRESH_TOP_N)],
+    }
@@ -1043,6 +1043,28 @@ const handleStopRecording = async () => {
     }
   }, []);
 
+  // A new chat's LLM title may land after /chat has answered (titlePending);
+  // pick it up from the sidebar listing unless the user renamed the chat meanwhile
+  const refreshPendingTitle = useCallback(async (userId: string, sessionId: string, placeholder: string) => {
+    for (const delay of [1000, 2000, 4000]) {
+      await new Promise(resolve => setTimeout(resolve, delay));
+      try {
+        const res = await fetch(`${API_BASE_URL}/chats/${userId}?limit=20`, { cache: 'no-cache' });
+        if (!res.ok) continue;
+        const page: { chats: { id: string; name: string }[] } = await res.json();
+        const name = page.chats.find(c => c.id === sessionId)?.name;
+        if (name && name !== placeholder) {
+          setSessions(prev => prev.map(s =>
+            s.id === sessionId && s.name === placeholder ? { ...s, name } : s
+          ));
+          return;
+        }
+      } catch (error) {
+        console.error("Failed to refresh chat title:", error);
+      }
+    }
+  }, []);
+
   // Send message function
   const sendMessage = useCallback(async (messageText?: string) => {
     const textToSend = messageText || messageInput.trim();
@@ -1124,6 +1146,10 @@ const handleStopRecording = async () => {
       // Reorder sessions after successful message
       setSessions(prev => sortSessionsByDateTime(prev));
 
+      if (data.titlePending && data.newName) {
+        refreshPendingTitle(user.$id, optimisticSessionId, data.newName);
+      }
+
       // TTS for assistant response if enabled
       if (isTTSEnabled && data.response && !isTTSPlaying) {
         setIsTTSPlaying(true);
@@ -1194,7 +1220,7 @@ const handleStopRecording = async () => {
     } finally {
       setAssistantTyping(false);
     }
-  }, [messageInput, user, currentSessionId, assistantTyping, currentView, isTTSEnabled, isTTSPlaying, currentAudio, t]);
+  }, [messageInput, user, currentSessionId, assistantTyping, currentView, isTTSEnabled, isTTSPlaying, currentAudio, t, refreshPendingTitle]);
 
   // Initialize component - Updated
   useEffect(() => {